@@ -0,0 +1,42 @@
+# benchmarks/bench_categorical_memory.py
+"""
+Đo bộ nhớ của các cột ít giá trị trước (object) và sau khi chuyển sang categorical.
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_categorical_memory
+"""
+import json
+
+import pandas as pd
+
+from src.common_utils import normalize_series
+from src.inventory_store import CATEGORICAL_COLUMNS, COLUMNS_TO_NORMALIZE, apply_categorical_dtypes
+
+
+def main(data_path='data/inventory.json', config_path='data/config.json'):
+    with open(data_path, 'r', encoding='utf-8') as f:
+        frame = pd.DataFrame(json.load(f))
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config_data = json.load(f)
+
+    columns = []
+    for col in CATEGORICAL_COLUMNS:
+        if col not in frame.columns:
+            continue
+        columns.append(col)
+        if col in COLUMNS_TO_NORMALIZE:
+            frame[f'{col}_normalized'] = normalize_series(frame[col])
+            columns.append(f'{col}_normalized')
+
+    before = frame[columns].memory_usage(deep=True, index=False)
+    after = apply_categorical_dtypes(frame[columns].copy(), config_data).memory_usage(deep=True, index=False)
+
+    print(f"{len(frame)} dòng")
+    print(f"{'Cột':<36}{'object (KB)':>14}{'category (KB)':>16}{'giảm':>8}")
+    for col in columns:
+        print(f"{col:<36}{before[col] / 1024:>14.1f}{after[col] / 1024:>16.1f}{1 - after[col] / before[col]:>8.0%}")
+    print(f"{'Tổng':<36}{before.sum() / 1024:>14.1f}{after.sum() / 1024:>16.1f}{1 - after.sum() / before.sum():>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
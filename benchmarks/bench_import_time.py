@@ -0,0 +1,47 @@
+# benchmarks/bench_import_time.py
+"""
+Đo thời gian import của các module (python -X importtime trong tiến trình mới, lấy trung vị nhiều lần chạy)
+và liệt kê các module con tốn thời gian nhất.
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_import_time [module ...]
+"""
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ['src.chatbot_logic']
+
+
+def _import_times(module):
+    """{tên module: thời gian tích lũy (µs)} của một lần import trong tiến trình mới."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times.setdefault(name.strip(), int(cumulative))
+    return times
+
+
+def main(modules=None, repeat=5, top=8):
+    for module in modules or DEFAULT_MODULES:
+        runs = [_import_times(module) for _ in range(repeat)]
+        total = statistics.median(run.get(module, 0) for run in runs)
+        print(f"import {module}: {total / 1000:.0f} ms (trung vị {repeat} lần)")
+
+        heavy = {}
+        for name in runs[0]:
+            if name != module and '.' not in name.replace('src.', '', 1):
+                heavy[name] = statistics.median(run.get(name, 0) for run in runs)
+        for name, cumulative in sorted(heavy.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {name:<32}{cumulative / 1000:>8.0f} ms")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or None)
@@ -0,0 +1,106 @@
+# benchmarks/bench_intent_matcher.py
+"""
+So sánh NLPProcessor.process_query hiện tại (một regex gộp mọi từ khóa, quét một lần)
+với cách làm cũ (mỗi từ khóa một re.search/re.sub, biên dịch mẫu theo từng truy vấn),
+đo số truy vấn/giây trên các câu hỏi trong log chat và kiểm tra hai cách cho cùng kết quả.
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_intent_matcher [số lần lặp]
+"""
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+import sys
+import time
+
+from src.common_utils import remove_accents_and_normalize
+from src.nlp_processor import NLPProcessor
+
+
+def legacy_remove_keywords(text, keywords_to_remove_list):
+    """Bản sao của NLPProcessor._remove_keywords cũ, dùng làm mốc so sánh."""
+    cleaned_text = text
+    sorted_keywords = sorted(keywords_to_remove_list, key=len, reverse=True)
+    for kw in sorted_keywords:
+        kw_pattern = r'\b' + r'\s*'.join(re.escape(word) for word in kw.split()) + r'\b'
+        cleaned_text = re.sub(kw_pattern, ' ', cleaned_text, flags=re.IGNORECASE).strip()
+    cleaned_text = re.sub(r'^\W+|\W+$', '', cleaned_text).strip()
+    cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
+    return cleaned_text
+
+
+def legacy_process_query(nlp, query):
+    """Bản sao của process_query cũ (bỏ các dòng in DEBUG)."""
+    query_normalized = remove_accents_and_normalize(query).strip()
+    if any(re.search(r'\b' + re.escape(kw) + r'\b', query_normalized) for kw in nlp.command_guidance_phrases_list):
+        return {"intent": "request_guidance", "original_query": query}
+    if any(re.search(r'\b' + re.escape(kw) + r'\b', query_normalized) for kw in nlp.command_show_more_phrases_list):
+        return {"intent": "show_more", "original_query": query}
+    if re.search(nlp.api_guidance_regex, query_normalized):
+        return {"intent": "request_api_guidance", "original_query": query}
+    if any(re.search(r'\b' + re.escape(kw) + r'\b', query_normalized) for kw in nlp.upload_log_command_phrases_list):
+        return {"intent": "upload_logs_to_github", "original_query": query}
+    all_command_keywords = list(set(
+        nlp.command_search_verbs_list + nlp.command_location_phrases_list +
+        nlp.command_quantity_phrases_list + nlp.command_status_phrases_list +
+        nlp.general_stopwords_list + nlp.command_guidance_phrases_list +
+        nlp.upload_log_command_phrases_list +
+        nlp.problem_keywords_list + nlp.unit_words_list +
+        nlp.item_type_keywords_list +
+        nlp.command_list_verbs_list +
+        nlp.report_command_keywords_list +
+        nlp.command_api_guidance_phrases_list
+    ))
+    return {"intent": "search_item", "query": legacy_remove_keywords(query_normalized, all_command_keywords), "original_query": query}
+
+
+def load_queries(logs_dir='logs'):
+    queries = []
+    for path in sorted(glob.glob(os.path.join(logs_dir, '**', '*.jsonl'), recursive=True)):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    query = json.loads(line).get("user_query")
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(query, str) and query.strip():
+                    queries.append(query)
+    return queries
+
+
+def _queries_per_second(func, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    return repeat * len(queries) / (time.perf_counter() - start)
+
+
+def main(repeat=20):
+    with contextlib.redirect_stdout(io.StringIO()):
+        nlp = NLPProcessor()
+    queries = load_queries() or ["tìm axit sulfuric", "H2SO4 ở đâu", "có bao nhiêu ống nghiệm", "xem thêm", "hướng dẫn"]
+
+    mismatches = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in queries:
+            if nlp.process_query(query) != legacy_process_query(nlp, query):
+                mismatches.append(query)
+        current_qps = _queries_per_second(nlp.process_query, queries, repeat)
+    legacy_qps = _queries_per_second(lambda query: legacy_process_query(nlp, query), queries, repeat)
+
+    print(f"{len(queries)} truy vấn từ log, lặp {repeat} lần")
+    print(f"{'Cách làm':<40}{'truy vấn/giây':>16}")
+    print(f"{'cũ (re.search/re.sub từng từ khóa)':<40}{legacy_qps:>16,.0f}")
+    print(f"{'hiện tại (một regex, quét một lần)':<40}{current_qps:>16,.0f}")
+    print(f"Tăng tốc: {current_qps / legacy_qps:.1f}x")
+    print(f"Kết quả khác nhau: {len(mismatches)}")
+    for query in mismatches[:10]:
+        print(f"  {query!r}: cũ={legacy_process_query(nlp, query)} mới={nlp.process_query(query)}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
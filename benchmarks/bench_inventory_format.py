@@ -0,0 +1,72 @@
+# benchmarks/bench_inventory_format.py
+"""
+So sánh kích thước file, thời gian đọc và kích thước git object của các định dạng lưu inventory:
+định dạng cũ (thụt lề 4, kèm cột *_normalized) và các định dạng theo schema (JSON gọn, gzip, Parquet).
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_inventory_format [file dữ liệu]
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+from src.common_utils import normalize_series
+from src.inventory_schema import read_inventory, write_inventory
+from src.inventory_store import COLUMNS_TO_NORMALIZE
+
+import pandas as pd
+
+
+def _git_object_size(data):
+    # Kích thước loose object của git: zlib("blob <len>\0" + nội dung)
+    return len(zlib.compress(b"blob %d\0" % len(data) + data))
+
+
+def _parse_seconds(path, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read_inventory(path)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def _write_legacy(path, records):
+    """Định dạng cũ: toàn bộ DataFrame (kể cả cột *_normalized), indent=4."""
+    df = pd.DataFrame(records)
+    for col in COLUMNS_TO_NORMALIZE:
+        df[f'{col}_normalized'] = normalize_series(df[col])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(df.astype(object).where(df.notna(), None).to_dict(orient='records'), f, ensure_ascii=False, indent=4)
+
+
+def main(data_path='data/inventory.json'):
+    records = read_inventory(data_path)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        variants = {
+            'cũ (indent=4 + *_normalized)': os.path.join(tmp_dir, 'legacy.json'),
+            'JSON gọn': os.path.join(tmp_dir, 'inventory.json'),
+            'JSON gọn + gzip': os.path.join(tmp_dir, 'inventory.json.gz'),
+            'Parquet': os.path.join(tmp_dir, 'inventory.parquet'),
+        }
+        for label, path in variants.items():
+            if label.startswith('cũ'):
+                _write_legacy(path, records)
+            else:
+                write_inventory(path, records)
+
+        print(f"{len(records)} bản ghi")
+        print(f"{'Định dạng':<32}{'file (KB)':>12}{'đọc (ms)':>12}{'git object (KB)':>18}")
+        for label, path in variants.items():
+            with open(path, 'rb') as f:
+                data = f.read()
+            print(f"{label:<32}{len(data) / 1024:>12.1f}{_parse_seconds(path) * 1000:>12.1f}"
+                  f"{_git_object_size(data) / 1024:>18.1f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
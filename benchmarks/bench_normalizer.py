@@ -0,0 +1,94 @@
+# benchmarks/bench_normalizer.py
+"""
+So sánh hàm chuẩn hóa tiếng Việt hiện tại (bảng str.translate + memo + API theo cột)
+với cách làm cũ (NFKD + encode/decode cho từng chuỗi, áp dụng bằng Series.apply).
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_normalizer [hệ số nhân số dòng]
+"""
+import json
+import sys
+import time
+import unicodedata
+
+import pandas as pd
+
+from src.common_utils import _normalize_text, normalize_series, remove_accents_and_normalize
+from src.inventory_store import COLUMNS_TO_NORMALIZE
+
+
+def legacy_remove_accents_and_normalize(input_str):
+    """Bản sao của hàm chuẩn hóa cũ, dùng làm mốc so sánh."""
+    if pd.isna(input_str):
+        return ''
+    if not isinstance(input_str, str):
+        return str(input_str)
+    input_str = input_str.replace('đ', 'd').replace('Đ', 'D')
+    nfkd_form = unicodedata.normalize('NFKD', input_str)
+    only_ascii = nfkd_form.encode('ascii', 'ignore').decode('utf-8')
+    return only_ascii.lower()
+
+
+def check_equivalence(frame):
+    """Kiểm tra kết quả trùng khớp trên mọi ký tự của BMP và trên toàn bộ dữ liệu tồn kho."""
+    for code in range(0x10000):
+        if 0xD800 <= code <= 0xDFFF:
+            continue
+        char = chr(code)
+        assert remove_accents_and_normalize(char) == legacy_remove_accents_and_normalize(char), hex(code)
+    for col in frame.columns:
+        expected = frame[col].apply(legacy_remove_accents_and_normalize)
+        assert normalize_series(frame[col]).tolist() == expected.tolist(), col
+
+
+def timeit(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(scale=1, data_path='data/inventory.json'):
+    with open(data_path, 'r', encoding='utf-8') as f:
+        frame = pd.DataFrame(json.load(f))
+    frame = frame[[col for col in COLUMNS_TO_NORMALIZE if col in frame.columns]]
+
+    check_equivalence(frame)
+    print("Kết quả trùng khớp với hàm cũ trên toàn bộ BMP và dữ liệu tồn kho.")
+    if scale > 1:
+        frame = pd.concat([frame] * scale, ignore_index=True)
+
+    def legacy():
+        for col in frame.columns:
+            frame[col].apply(legacy_remove_accents_and_normalize)
+
+    def scalar_cold():
+        _normalize_text.cache_clear()
+        for col in frame.columns:
+            frame[col].apply(remove_accents_and_normalize)
+
+    def batch_cold():
+        _normalize_text.cache_clear()
+        for col in frame.columns:
+            normalize_series(frame[col])
+
+    def batch_warm():
+        for col in frame.columns:
+            normalize_series(frame[col])
+
+    results = {
+        "cũ (NFKD + Series.apply)": timeit(legacy),
+        "mới, từng chuỗi (cache rỗng)": timeit(scalar_cold),
+        "mới, theo cột (cache rỗng)": timeit(batch_cold),
+        "mới, theo cột (cache đã có)": timeit(batch_warm),
+    }
+    baseline = results["cũ (NFKD + Series.apply)"]
+    print(f"{len(frame)} dòng x {len(frame.columns)} cột:")
+    for name, seconds in results.items():
+        print(f"  {name:<32} {seconds * 1000:8.2f} ms  (x{baseline / seconds:.1f})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
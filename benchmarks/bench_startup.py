@@ -0,0 +1,52 @@
+# benchmarks/bench_startup.py
+"""
+Đo thời gian tới lần hiển thị đầu tiên của ứng dụng (chạy src/main.py bằng streamlit AppTest
+trong tiến trình mới) và liệt kê các module src.* đã được import, cho hai trường hợp:
+chưa đăng nhập, và đã đăng nhập bằng tài khoản administrator đầu tiên trong users.json (trang mặc định).
+
+Chạy từ thư mục gốc của dự án (cần .streamlit/secrets.toml như khi chạy ứng dụng):
+    python -m benchmarks.bench_startup [số lần chạy]
+"""
+import json
+import statistics
+import subprocess
+import sys
+
+_RUN_ONCE = """
+import json, sys, time
+import jwt
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file('src/main.py', default_timeout=120)
+if sys.argv[1] == 'logged_in':
+    with open('data/users.json', 'r', encoding='utf-8') as f:
+        users = json.load(f)
+    email = next(email for email, info in users.items() if info.get('role') == 'administrator')
+    app.session_state['token'] = {'id_token': jwt.encode({'email': email, 'name': 'bench'}, 'bench')}
+framework_ready = time.perf_counter()
+app.run()
+end = time.perf_counter()
+print(json.dumps({
+    'render_ms': (end - framework_ready) * 1000,
+    'exception': [str(e.value) for e in app.exception],
+    'modules': sorted(name for name in sys.modules if name.startswith('src.')),
+}))
+"""
+
+
+def _run_once(scenario):
+    result = subprocess.run([sys.executable, '-c', _RUN_ONCE, scenario], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(repeat=5):
+    for scenario, label in (('logged_out', "chưa đăng nhập"), ('logged_in', "đã đăng nhập, trang mặc định")):
+        runs = [_run_once(scenario) for _ in range(repeat)]
+        render_ms = statistics.median(run['render_ms'] for run in runs)
+        print(f"Thời gian tới lần hiển thị đầu tiên ({label}): {render_ms:.0f} ms (trung vị {repeat} lần)")
+        if runs[0]['exception']:
+            print(f"  Lỗi khi chạy: {runs[0]['exception']}")
+        print(f"  {len(runs[0]['modules'])} module src.* đã import: {', '.join(runs[0]['modules'])}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
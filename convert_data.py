@@ -1,8 +1,9 @@
 import pandas as pd
-import json
 import os
 from pathlib import Path
 
+from src.inventory_schema import write_inventory
+
 # Đường dẫn đến file CSV của bạn
 current_dir = Path(__file__).parent
 csv_file_path = current_dir / 'Danhmuc.csv' # Đảm bảo tên file chính xác
@@ -160,8 +161,7 @@ os.makedirs(json_file_path.parent, exist_ok=True)
 
 # Lưu dữ liệu đã chuyển đổi vào file JSON
 try:
-    with open(json_file_path, 'w', encoding='utf-8') as f:
-        json.dump(transformed_data, f, ensure_ascii=False, indent=2)
+    write_inventory(str(json_file_path), transformed_data)
     print(f"\nĐã chuyển đổi thành công '{csv_file_path}' sang '{json_file_path}'.")
     print(f"Tổng số bản ghi đã xử lý: {len(transformed_data)}.")
 except Exception as e:
@@ -8,30 +8,12 @@ import os
 import shutil
 
 # Import các lớp quản lý và tiện ích
-from src.database_manager import DatabaseManager
-from src.database_admin import AdminDatabaseManager
-from src.common_utils import remove_accents_and_normalize
+from src.database_admin import SAVED_LOCALLY, get_admin_db_manager
 from src.convert_data import convert_csv_to_json_data
 
-# --- CẢI TIẾN KIẾN TRÚC ---
-# Khởi tạo các đối tượng manager một lần duy nhất và cache lại.
-@st.cache_resource
-def get_managers():
-    """
-    Khởi tạo các đối tượng manager. 
-    Vì AdminDatabaseManager kế thừa từ DatabaseManager, chúng ta chỉ cần tạo 
-    một đối tượng duy nhất là đủ cho mọi tác vụ.
-    """
-    admin_instance = AdminDatabaseManager()
-    return {
-        "db_manager": admin_instance,
-        "admin_db_manager": admin_instance
-    }
-
-# Lấy các đối tượng manager từ cache
-managers = get_managers()
-db_manager = managers["db_manager"]
-admin_db_manager = managers["admin_db_manager"]
+# Trang này chỉ được import khi người dùng mở trang Quản lý (xem main.py), nên manager dùng chung
+# được lấy ở đây. AdminDatabaseManager kế thừa DatabaseManager nên một đối tượng đủ cho mọi tác vụ.
+db_manager = admin_db_manager = get_admin_db_manager()
 
 def sort_options(options):
     """Sắp xếp danh sách tùy chọn, giữ các giá trị đặc biệt ở đầu."""
@@ -41,6 +23,16 @@ def sort_options(options):
     other_values = sorted([v for v in options if v not in special_values and v.strip() != ""])
     return special_values + other_values
 
+def display_push_status():
+    """Hiển thị trạng thái của luồng nền đẩy dữ liệu lên GitHub."""
+    status = admin_db_manager.get_push_status()
+    last_pushed = status["last_pushed"].strftime("%d/%m/%Y %H:%M:%S") if status["last_pushed"] else "chưa có"
+    message = f"☁️ Đồng bộ GitHub — đang chờ: {status['pending']}, lần đẩy gần nhất: {last_pushed}"
+    if status["last_error"]:
+        st.warning(f"{message}\n\nLỗi gần nhất: {status['last_error']}")
+    else:
+        st.caption(message)
+
 def admin_page():
     """Hàm chính để vẽ giao diện trang quản lý."""
     user_role = st.session_state.get("user_role")
@@ -49,6 +41,7 @@ def admin_page():
         st.stop()
 
     st.title("⚙️ Trang Quản lý & Theo dõi Vật tư")
+    display_push_status()
 
     if "admin_update_mode" not in st.session_state:
         st.session_state["admin_update_mode"] = "none"
@@ -113,10 +106,18 @@ def update_data_section():
 
                         # Lưu dữ liệu mới vào inventory.json và đẩy lên GitHub
                         commit_message = f"feat(data): Cập nhật dữ liệu tồn kho từ CSV ngày {datetime.now().strftime('%d-%m-%Y')}"
-                        if admin_db_manager.save_and_push_json(old_file_path, new_data, commit_message):
+                        if admin_db_manager.save_and_push_inventory(new_data, commit_message):
+                            journal = admin_db_manager.store.journal
+                            had_journal_entries = journal is not None and journal.entry_count > 0
+                            admin_db_manager.reload_data(source_replaced=True)
+                            if had_journal_entries:
+                                # Nhật ký cũ không còn áp dụng cho dữ liệu mới
+                                admin_db_manager.push_to_github(
+                                    journal.journal_path,
+                                    "chore(data): Làm trống nhật ký thay đổi sau khi nhập CSV"
+                                )
                             st.session_state['admin_search_results'] = pd.DataFrame()
                             st.session_state['admin_current_item_id'] = None
-                            st.cache_resource.clear()
                             st.rerun()
                         else:
                             st.error("Có lỗi xảy ra khi lưu hoặc đẩy dữ liệu mới.")
@@ -246,35 +247,35 @@ def update_quantity_form(item_data):
 def handle_update(item_id, updates):
     """Hàm xử lý logic cập nhật chung."""
     with st.spinner("Đang xử lý..."):
-        idx_to_update = db_manager.inventory_data[db_manager.inventory_data['id'] == item_id].index
-        if idx_to_update.empty:
+        idx_to_update = db_manager.store.find_positions_by_id(item_id)
+        if not idx_to_update:
             st.error("Lỗi: Không tìm thấy ID để cập nhật.")
             return
 
-        if "note" in updates and updates["note"].strip():
-            old_note = db_manager.inventory_data.loc[idx_to_update[0], 'note']
-            if pd.isna(old_note): old_note = ""
-            
-            timestamp = datetime.now().strftime("%d/%m/%Y %H:%M")
-            new_dated_note = f"{timestamp}: {updates['note'].strip()}"
-            final_note_value = f"{old_note}\n{new_dated_note}".strip()
-            
-            db_manager.inventory_data.loc[idx_to_update, 'note'] = final_note_value
-            db_manager.inventory_data.loc[idx_to_update, 'note_normalized'] = remove_accents_and_normalize(final_note_value)
-        
-        for key, value in updates.items():
-            if key != "note":
-                db_manager.inventory_data.loc[idx_to_update, key] = value
-                if f"{key}_normalized" in db_manager.inventory_data.columns:
-                    db_manager.inventory_data.loc[idx_to_update, f"{key}_normalized"] = remove_accents_and_normalize(value)
+        updates = dict(updates)
+        if "note" in updates:
+            note_input = updates.pop("note").strip()
+            if note_input:
+                old_note = db_manager.inventory_data.iloc[idx_to_update[0]]['note']
+                if pd.isna(old_note): old_note = ""
+                
+                timestamp = datetime.now().strftime("%d/%m/%Y %H:%M")
+                new_dated_note = f"{timestamp}: {note_input}"
+                updates["note"] = f"{old_note}\n{new_dated_note}".strip()
+
+        # Cập nhật trực tiếp vào kho dữ liệu dùng chung (tự đồng bộ các cột *_normalized)
+        admin_db_manager.update_item(item_id, updates)
 
-        data_to_save = db_manager.inventory_data.to_dict(orient='records')
         commit_message = f"feat(admin): Cập nhật thông tin cho ID {item_id}"
-        if admin_db_manager.save_and_push_json(admin_db_manager.data_path, data_to_save, commit_message):
-            st.success("Đã đẩy thay đổi lên GitHub thành công!")
+        # Backend JSON chỉ commit nhật ký thay đổi; backend SQLite xuất JSON để commit lên git
+        saved = admin_db_manager.save_item_update(commit_message)
+        if saved:
+            if saved == SAVED_LOCALLY:
+                st.warning("Đã lưu thay đổi trên máy chủ, nhưng không thể đẩy lên GitHub (thiếu GITHUB_TOKEN).")
+            else:
+                st.success("Đã lưu thay đổi; thay đổi sẽ được đẩy lên GitHub ở nền.")
             st.session_state['admin_search_results'] = db_manager.get_by_id(item_id)
             st.session_state['admin_update_mode'] = "none"
-            st.cache_resource.clear()
             st.rerun()
         else:
-            st.error("Lỗi: Không thể đẩy thay đổi lên GitHub.")
\ No newline at end of file
+            st.error("Lỗi: Không thể lưu thay đổi.")
\ No newline at end of file
@@ -1,8 +1,11 @@
 # src/admin_settings_page.py
 
+import pandas as pd
 import streamlit as st
 from src.database_manager import DatabaseManager
 from src.database_admin import AdminDatabaseManager
+from src.data_epochs import get_cache_stats, get_epochs
+from src.query_cache import get_query_cache_stats
 
 # --- CÁC HÀM TRỢ GIÚP ---
 
@@ -12,16 +15,20 @@ def save_settings_and_push(config_key, new_value, admin_db_manager, db_manager,
         db_manager.config_data[config_key] = sorted(new_value)
     else:
         db_manager.config_data[config_key] = new_value
+    _save_config_and_rerun(f"feat(config): Cập nhật cài đặt '{config_key}'", admin_db_manager)
 
-    if admin_db_manager.save_config_to_json():
-        st.success("Đã lưu thay đổi vào file config.json.")
-        commit_message = f"feat(config): Cập nhật cài đặt '{config_key}'"
-        if admin_db_manager.push_to_github(admin_db_manager.config_path, commit_message):
-            st.success("Đã đẩy thay đổi lên GitHub! Ứng dụng sẽ tải lại để áp dụng.")
-            st.cache_resource.clear() # Xóa cache để đảm bảo các manager được tải lại với config mới
-            st.rerun()
-        else:
-            st.error("Lỗi: Không thể đẩy thay đổi lên GitHub.")
+def save_system_settings_and_push(updates, admin_db_manager, db_manager):
+    """Gộp từng khóa của `updates` vào cấu hình hiện tại rồi lưu một lần."""
+    for key, value in updates.items():
+        db_manager.config_data[key] = value
+    _save_config_and_rerun("feat(config): Cập nhật cài đặt hệ thống", admin_db_manager)
+
+def _save_config_and_rerun(commit_message, admin_db_manager):
+    # Lưu và đưa vào hàng đợi push một lần duy nhất (trước đây file được push hai lần)
+    if admin_db_manager.save_config_to_json(commit_message):
+        # save_config_to_json đã tăng epoch cấu hình: chỉ các cache phụ thuộc cấu hình được dựng lại
+        st.success("Đã lưu thay đổi vào file config.json; thay đổi sẽ được đẩy lên GitHub ở nền.")
+        st.rerun()
     else:
         st.error("Lỗi: Không thể lưu thay đổi vào file config.json.")
 
@@ -65,6 +72,29 @@ def display_list_editor(title, config_key, current_list, db_manager, admin_db_ma
 
 # --- CÁC THÀNH PHẦN GIAO DIỆN ---
 
+def display_cache_stats():
+    """Hiển thị epoch dữ liệu và số lần dùng lại/dựng lại của từng cache."""
+    with st.expander("📈 Bộ nhớ đệm (cache) theo epoch dữ liệu"):
+        epochs = get_epochs()
+        st.write("Epoch hiện tại: " + ", ".join(f"**{domain}**: {epoch}" for domain, epoch in epochs.items()))
+        stats = get_cache_stats()
+        if stats:
+            stats_df = pd.DataFrame(
+                [{"Cache": name, "Dùng lại": s["hits"], "Dựng lại": s["rebuilds"]} for name, s in sorted(stats.items())]
+            )
+            st.table(stats_df)
+        else:
+            st.info("Chưa có cache nào được sử dụng.")
+
+        query_stats = get_query_cache_stats()
+        if query_stats:
+            st.write("Cache câu hỏi/câu trả lời của Chatbot:")
+            st.table(pd.DataFrame([
+                {"Cache": name, "Số mục": s["entries"], "Tối đa": s["max_entries"], "Trúng": s["hits"],
+                 "Trượt": s["misses"], "Tỉ lệ trúng": f"{s['hit_rate']:.0%}"}
+                for name, s in sorted(query_stats.items())
+            ]))
+
 def display_system_settings(db_manager: DatabaseManager, admin_db_manager: AdminDatabaseManager):
     """Hiển thị các cài đặt hệ thống như Site URL và Gemini API."""
     st.header("⚙️ Cài đặt hệ thống & API")
@@ -83,20 +113,22 @@ def display_system_settings(db_manager: DatabaseManager, admin_db_manager: Admin
         current_prompt = db_manager.config_data.get('ai_full_prompt', '')
         new_prompt = st.text_area("Full Prompt của Trợ lý AI:", value=current_prompt, height=300)
 
+        st.markdown("---")
+
+        current_page_size = int(db_manager.config_data.get("chatbot_page_size", 10))
+        new_page_size = st.number_input("Số kết quả mỗi câu trả lời của Chatbot:", min_value=1, max_value=50, value=current_page_size, step=1)
+
         submitted = st.form_submit_button("Lưu tất cả cài đặt hệ thống")
         if submitted:
             # Tạo một từ điển chứa các cập nhật
             updates = {
                 "site_url": new_site_url.strip(),
-                "gemini_api_key": new_api_key.strip(),
-                "ai_full_prompt": new_prompt.strip()
+                "gemini_model_name": new_model.strip(),
+                "ai_full_prompt": new_prompt.strip(),
+                "chatbot_page_size": int(new_page_size)
             }
-            # Cập nhật tất cả các giá trị vào config data
-            for key, value in updates.items():
-                db_manager.config_data[key] = value
-            
-            # Lưu một lần
-            save_settings_and_push("system_settings", db_manager.config_data, admin_db_manager, db_manager, is_list=False)
+            # Gộp các cập nhật vào cấu hình và lưu một lần
+            save_system_settings_and_push(updates, admin_db_manager, db_manager)
 
 def admin_settings_page(db_manager: DatabaseManager, admin_db_manager: AdminDatabaseManager):
     """Hàm chính, entry point của trang cài đặt."""
@@ -109,6 +141,7 @@ def admin_settings_page(db_manager: DatabaseManager, admin_db_manager: AdminData
 
     # Hiển thị các cài đặt hệ thống & API
     display_system_settings(db_manager, admin_db_manager)
+    display_cache_stats()
     st.markdown("---")
 
     # Hiển thị các trình chỉnh sửa danh sách
@@ -1,8 +1,9 @@
 # src/ai_assistant_page.py
 
 import streamlit as st
-from src.database_manager import DatabaseManager
+from src.database_manager import get_db_manager
 from src.gemini_chatbot import GeminiChatbot
+from src.data_epochs import CONFIG, epoch_cached
 import sys
 from pathlib import Path
 
@@ -11,7 +12,8 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-@st.cache_resource
+# Tên mô hình lấy từ config.json nên client được dựng lại khi cấu hình thay đổi
+@epoch_cached("gemini_chatbot", CONFIG)
 def get_gemini_chatbot(api_key):
     try:
         return GeminiChatbot(api_key)
@@ -31,7 +33,7 @@ def ai_assistant_page():
     st.write("Sử dụng Trợ lý AI để thiết kế thí nghiệm, tính toán hóa chất và nhiều hơn nữa. Bạn không thể tìm vị trí hoặc thông tin về vật tư ở đây. Hãy hỏi Chatbot trong menu điều hướng bên trái hoặc mũi tên >> ở trên cùng.")
 
     # Lấy API Key từ config.json hoặc session state
-    db_manager = DatabaseManager()
+    db_manager = get_db_manager()
     gemini_api_key = st.secrets.get('gemini_api_key', '')
     
     if not gemini_api_key:
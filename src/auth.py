@@ -1,40 +1,51 @@
 # src/auth.py
 
+import json
 import streamlit as st
-from streamlit_oauth import OAuth2Component
-import jwt # <-- Thư viện mới để giải mã token
+from src.data_epochs import CONFIG, epoch_cached
 
-# Lấy thông tin từ Streamlit secrets
-CLIENT_ID = st.secrets.get("GOOGLE_CLIENT_ID")
-CLIENT_SECRET = st.secrets.get("GOOGLE_CLIENT_SECRET")
 AUTHORIZE_ENDPOINT = "https://accounts.google.com/o/oauth2/v2/auth"
 TOKEN_ENDPOINT = "https://oauth2.googleapis.com/token"
 REVOKE_ENDPOINT = "https://oauth2.googleapis.com/revoke"
+DEFAULT_SITE_URL = "http://localhost:8501"
 
 def initialize_oauth_component():
-    """Khởi tạo component OAuth2."""
-    if not all([CLIENT_ID, CLIENT_SECRET]):
+    """Khởi tạo component OAuth2 (đọc secrets và import streamlit_oauth chỉ khi cần nút đăng nhập)."""
+    client_id = st.secrets.get("GOOGLE_CLIENT_ID")
+    client_secret = st.secrets.get("GOOGLE_CLIENT_SECRET")
+    if not all([client_id, client_secret]):
         st.error("Lỗi cấu hình: Vui lòng cung cấp GOOGLE_CLIENT_ID và GOOGLE_CLIENT_SECRET trong secrets.")
         return None
-    
+
+    from streamlit_oauth import OAuth2Component
     return OAuth2Component(
-        CLIENT_ID,
-        CLIENT_SECRET,
+        client_id,
+        client_secret,
         AUTHORIZE_ENDPOINT,
         TOKEN_ENDPOINT,
         TOKEN_ENDPOINT,
         REVOKE_ENDPOINT
     )
 
-oauth2 = initialize_oauth_component()
+# Component OAuth được tạo ở lần đầu hiển thị nút đăng nhập rồi dùng chung
+@epoch_cached("oauth_component")
+def get_oauth_component():
+    return initialize_oauth_component()
+
+# Redirect URI lấy từ config.json mà không cần nạp dữ liệu tồn kho (trang đăng nhập không dùng đến)
+@epoch_cached("site_url", CONFIG)
+def get_redirect_uri(config_path='data/config.json'):
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("site_url", DEFAULT_SITE_URL)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Lỗi khi đọc site_url từ {config_path}: {e}")
+        return DEFAULT_SITE_URL
 
 def get_user_info(redirect_uri): # <-- SỬA: Thêm tham số redirect_uri
     """
     Hàm chính xử lý toàn bộ logic đăng nhập.
     """
-    if not oauth2:
-        return None
-
     # Nếu token đã tồn tại trong session, người dùng đã đăng nhập
     if 'token' in st.session_state:
         token = st.session_state['token']
@@ -42,6 +53,7 @@ def get_user_info(redirect_uri): # <-- SỬA: Thêm tham số redirect_uri
         
         if id_token:
             try:
+                import jwt
                 # Giải mã id_token để lấy thông tin người dùng
                 user_info = jwt.decode(id_token, options={"verify_signature": False})
                 st.session_state.user_info = user_info
@@ -51,6 +63,9 @@ def get_user_info(redirect_uri): # <-- SỬA: Thêm tham số redirect_uri
                 return None
 
     # Nếu chưa có token, hiển thị nút đăng nhập
+    oauth2 = get_oauth_component()
+    if not oauth2:
+        return None
     result = oauth2.authorize_button(
         name="Đăng nhập bằng Google",
         icon="https://www.google.com/favicon.ico",
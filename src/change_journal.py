@@ -0,0 +1,109 @@
+# src/change_journal.py
+
+import json
+import os
+import threading
+from datetime import datetime
+
+# Ngưỡng gộp nhật ký vào snapshot inventory.json
+COMPACT_MAX_ENTRIES = 100
+COMPACT_MAX_BYTES = 64 * 1024
+
+
+def _json_default(value):
+    # Giá trị kiểu numpy (ví dụ numpy.float64 từ DataFrame) được đổi về kiểu Python
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def get_journal_path(data_path):
+    """Đường dẫn file nhật ký đi kèm một file dữ liệu, ví dụ data/inventory.journal.jsonl."""
+    return f"{os.path.splitext(data_path)[0]}.journal.jsonl"
+
+
+class ChangeJournal:
+    """
+    Nhật ký thay đổi dạng JSONL chỉ ghi nối thêm: mỗi lần sửa một vật tư ghi một dòng
+    {"seq", "timestamp", "id", "updates"}. Khi tải dữ liệu, các dòng được áp dụng lại
+    lên snapshot inventory.json; khi nhật ký quá dài thì được gộp (compact) vào snapshot.
+    Khi gộp hoặc xóa, dòng đầu file là mốc {"seq": N, "base": true} ghi lại seq cuối đã dùng,
+    để seq tiếp tục tăng sau khi khởi động lại (các tiến trình khác lọc dòng mới theo seq).
+    """
+    def __init__(self, journal_path, max_entries=COMPACT_MAX_ENTRIES, max_bytes=COMPACT_MAX_BYTES):
+        self.journal_path = journal_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        lines = self._read_lines()
+        self.entry_count = sum(1 for line in lines if not line.get("base"))
+        self.last_seq = max((line.get("seq", 0) for line in lines), default=0)
+
+    def read_entries(self):
+        """Đọc các dòng thay đổi hợp lệ (bỏ qua mốc seq và dòng hỏng, ví dụ dòng ghi dở cuối file)."""
+        return [entry for entry in self._read_lines() if not entry.get("base")]
+
+    def _read_lines(self):
+        if not os.path.exists(self.journal_path):
+            return []
+        entries = []
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Bỏ qua dòng nhật ký không hợp lệ trong {self.journal_path}")
+        return entries
+
+    def append(self, item_id, updates):
+        """Ghi nối một thay đổi vào cuối nhật ký. Chi phí chỉ tỉ lệ với kích thước thay đổi."""
+        with self.lock:
+            self.last_seq += 1
+            entry = {
+                "seq": self.last_seq,
+                "timestamp": datetime.now().isoformat(timespec='seconds'),
+                "id": item_id,
+                "updates": updates,
+            }
+            dir_name = os.path.dirname(self.journal_path)
+            if dir_name:
+                os.makedirs(dir_name, exist_ok=True)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=_json_default) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.entry_count += 1
+            return entry
+
+    def needs_compaction(self):
+        """Nhật ký đã vượt ngưỡng số dòng hoặc kích thước và nên được gộp vào snapshot."""
+        size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        return self.entry_count >= self.max_entries or size >= self.max_bytes
+
+    def truncate_through(self, seq):
+        """Bỏ các dòng đã được gộp vào snapshot (seq <= seq), giữ lại các dòng mới hơn."""
+        with self.lock:
+            remaining = [entry for entry in self.read_entries() if entry.get("seq", 0) > seq]
+            self._rewrite(remaining)
+
+    def clear(self):
+        """Xóa toàn bộ nhật ký (ví dụ khi inventory.json được thay thế hoàn toàn bằng dữ liệu CSV mới)."""
+        # Giữ lại file (chỉ còn mốc seq) để bản trên git cũng được làm trống khi commit
+        with self.lock:
+            self._rewrite([])
+
+    def _rewrite(self, entries):
+        # Mốc seq đứng đầu file: seq không quay lại từ đầu dù nhật ký đã được làm trống
+        marker = {"seq": self.last_seq, "base": True}
+        dir_name = os.path.dirname(self.journal_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in [marker] + entries:
+                f.write(json.dumps(entry, ensure_ascii=False, default=_json_default) + '\n')
+        os.replace(tmp_path, self.journal_path)
+        self.entry_count = len(entries)
@@ -0,0 +1,53 @@
+# src/chat_analytics_page.py
+
+import os
+from datetime import datetime
+
+import streamlit as st
+
+from src.log_analytics import (
+    daily_volume, get_summary_path, intent_distribution, load_summary_frame, top_queries, update_summary,
+    zero_result_queries,
+)
+
+
+def chat_analytics_page():
+    st.title("💬 Phân tích Chatbot")
+    st.markdown("---")
+    st.write("Thống kê câu hỏi của người dùng từ các log chat đã lưu trữ (logs/archive/). "
+             "Số liệu đọc từ bảng tổng hợp, bấm cập nhật để đọc thêm các log mới.")
+
+    if st.button("Cập nhật từ log lưu trữ"):
+        with st.spinner("Đang đọc log mới..."):
+            result = update_summary()
+        st.success(f"Đã đọc {result['lines']} dòng mới từ {result['files']} file.")
+
+    summary_path = get_summary_path()
+    df = load_summary_frame()
+    if df.empty:
+        st.info("Chưa có bảng tổng hợp. Bấm 'Cập nhật từ log lưu trữ' để tạo.")
+        return
+
+    updated_at = datetime.fromtimestamp(os.path.getmtime(summary_path)).strftime("%d/%m/%Y %H:%M")
+    days = daily_volume(df)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Tổng số câu hỏi", int(days['count'].sum()))
+    col2.metric("Không có kết quả", int(days['zero_results'].sum()))
+    col3.metric("Cập nhật lần cuối", updated_at)
+
+    st.subheader("Số câu hỏi theo ngày")
+    st.line_chart(days.rename(columns={'count': 'Câu hỏi', 'zero_results': 'Không có kết quả'}))
+
+    st.subheader("Phân bố ý định")
+    st.bar_chart(intent_distribution(df).rename('Số lượt'))
+
+    limit = st.number_input("Số câu hỏi hiển thị", min_value=5, max_value=200, value=20, step=5)
+    col_top, col_zero = st.columns(2)
+    with col_top:
+        st.write("##### Câu hỏi nhiều nhất")
+        st.dataframe(top_queries(df, limit).rename(columns={
+            'label': 'Câu hỏi', 'count': 'Số lượt', 'zero_results': 'Không có kết quả'}), hide_index=True)
+    with col_zero:
+        st.write("##### Câu hỏi không có kết quả")
+        st.dataframe(zero_result_queries(df, limit).rename(columns={
+            'label': 'Câu hỏi', 'zero_results': 'Không có kết quả', 'count': 'Số lượt'}), hide_index=True)
@@ -1,18 +1,26 @@
 # src/chatbot_logic.py (đã cập nhật)
 import pandas as pd
-from src.database_manager import DatabaseManager
+from src.common_utils import remove_accents_and_normalize
+from src.database_manager import get_db_manager
+from src.log_writer import FLUSH_SECONDS, ROTATE_BYTES, ROTATE_SECONDS, get_log_writer, new_issue_id
 from src.nlp_processor import NLPProcessor
-import re
+from src.query_cache import DEFAULT_MAX_ENTRIES, VersionedLRUCache, most_frequent_queries
 import os
-import json
-from src.gemini_chatbot import GeminiChatbot
-import streamlit as st
+import threading
 
 class ChatbotLogic:
     LOG_FILE = "chat_log.jsonl"
+    # Số kết quả mặc định trong mỗi câu trả lời (config "chatbot_page_size"); phần còn lại xem bằng lệnh "xem thêm"
+    RESULTS_PAGE_SIZE = 10
+    # Khóa trong session (st.session_state) lưu tập kết quả của lần tìm kiếm gần nhất để phân trang
+    LAST_SEARCH_SESSION_KEY = "chatbot_last_search"
+    # Số câu hỏi thường gặp nhất trong log được trả lời trước khi khởi động (config "chatbot_cache_warm_queries")
+    CACHE_WARM_QUERIES = 50
+    # Câu trả lời phụ thuộc trạng thái phiên hoặc có tác dụng phụ: không lưu cache
+    UNCACHED_INTENTS = {"show_more", "report_issue"}
     
     def __init__(self):
-        self.db_manager = DatabaseManager()
+        self.db_manager = get_db_manager()
         self.nlp_processor = NLPProcessor()
         self.logs_base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'logs'))
         
@@ -20,6 +28,22 @@ class ChatbotLogic:
             os.makedirs(self.logs_base_dir)
         
         self.log_filepath = os.path.join(self.logs_base_dir, self.LOG_FILE)
+        self.issues_dir = os.path.join(self.logs_base_dir, "issues")
+
+        # Log được ghi ở luồng nền theo lô và tự chuyển vào logs/archive/ khi quá lớn hoặc quá cũ
+        config = self.db_manager.config_data
+        self.log_writer = get_log_writer(
+            self.log_filepath,
+            flush_seconds=float(config.get("chat_log_flush_seconds", FLUSH_SECONDS)),
+            rotate_bytes=int(config.get("chat_log_rotate_bytes", ROTATE_BYTES)),
+            rotate_seconds=float(config.get("chat_log_rotate_hours", ROTATE_SECONDS / 3600)) * 3600,
+            compress=bool(config.get("chat_log_gzip", False)),
+        )
+
+        # Kết quả phân tích câu hỏi (không phụ thuộc dữ liệu) và câu trả lời (gắn với data_version)
+        cache_size = self.db_manager.config_data.get("chatbot_cache_size", DEFAULT_MAX_ENTRIES)
+        self.parse_cache = VersionedLRUCache("chatbot_parse", cache_size)
+        self.response_cache = VersionedLRUCache("chatbot_response", cache_size)
 
     GUIDANCE_MESSAGE = """
     Chào bạn! Tôi có thể giúp bạn tra cứu vật tư và hóa chất trong phòng thí nghiệm. Dưới đây là các loại câu lệnh bạn có thể sử dụng:
@@ -52,24 +76,113 @@ class ChatbotLogic:
     Nếu bạn cần hướng dẫn này bất cứ lúc nào, chỉ cần hỏi "hướng dẫn" hoặc "cách tìm kiếm".
     """
 
-    def _format_results(self, results, query_context=""):
-        """Hàm trợ giúp để định dạng kết quả tìm kiếm và thêm gợi ý hướng dẫn."""
+    @property
+    def results_page_size(self):
+        try:
+            return max(int(self.db_manager.config_data.get("chatbot_page_size", self.RESULTS_PAGE_SIZE)), 1)
+        except (TypeError, ValueError):
+            return self.RESULTS_PAGE_SIZE
+
+    def _not_found_message(self, query_context=""):
+        return_message = f"Xin lỗi, tôi không tìm thấy vật tư/hóa chất nào liên quan đến '*{query_context}*'." if query_context else "Xin lỗi, tôi không tìm thấy kết quả nào phù hợp."
+        return_message += "\n\nHãy thử tìm kiếm bằng công thức hoặc tên tiếng Anh hoặc sử dụng từ khóa khác ngắn hơn. Hãy nói tôi hướng dẫn nếu bạn cần chi tiết hơn."
+        "Nếu muốn hỏi về quy trình hoặc hướng dẫn thí nghiệm, hãy sử dụng trợ lý AI trong menu điều hướng bên trái hoặc mũi tên >> ở trên cùng."
+        return return_message
+
+    @staticmethod
+    def _format_row(row, style="detail"):
+        if style == "status":
+            return f"- **{row['name']}** (ID: {row['id']}, Vị trí: {row['location']}): {row['description']}\n\n"
+        return (f"- **{row['name']}** (ID: {row['id']}, Loại: {row['type']})\n"
+                f"  Số lượng: {row['quantity']} {row['unit']}, Vị trí: {row['location']}.\n"
+                f"  Mô tả: {row['description']},\n"
+                f"  Theo dõi: {row['tracking']}\n\n")
+
+    def _stream_results(self, results, query_context="", total=None, page=0, style="detail", header=None):
+        """
+        Sinh từng đoạn của câu trả lời cho một trang kết quả: dòng tiêu đề, mỗi kết quả một đoạn,
+        rồi gợi ý "xem thêm" nếu còn kết quả. Số đoạn bị chặn bởi kích thước trang, không phụ thuộc tổng số kết quả.
+        """
         if results.empty:
-            return_message = f"Xin lỗi, tôi không tìm thấy vật tư/hóa chất nào liên quan đến '*{query_context}*'." if query_context else "Xin lỗi, tôi không tìm thấy kết quả nào phù hợp."
-            return_message += "\n\nHãy thử tìm kiếm bằng công thức hoặc tên tiếng Anh hoặc sử dụng từ khóa khác ngắn hơn. Hãy nói tôi hướng dẫn nếu bạn cần chi tiết hơn."
-            "Nếu muốn hỏi về quy trình hoặc hướng dẫn thí nghiệm, hãy sử dụng trợ lý AI trong menu điều hướng bên trái hoặc mũi tên >> ở trên cùng."
-            return return_message
-        
-        response = f"Tôi tìm thấy **{len(results)}** kết quả:\n\n"
-        for index, row in results.iterrows():
-            response += (f"- **{row['name']}** (ID: {row['id']}, Loại: {row['type']})\n"
-                         f"  Số lượng: {row['quantity']} {row['unit']}, Vị trí: {row['location']}.\n"
-                         f"  Mô tả: {row['description']},\n"
-                         f"  Theo dõi: {row['tracking']}\n\n")
-        return response.strip()
+            yield self._not_found_message(query_context)
+            return
+
+        if total is None:
+            total = len(results)
+        start = page * self.results_page_size
+        end = start + len(results)
+
+        if header:
+            yield header
+        elif total > len(results):
+            yield f"Tôi tìm thấy **{total}** kết quả (hiển thị {start + 1}-{end} theo mức độ liên quan):\n\n"
+        else:
+            yield f"Tôi tìm thấy **{total}** kết quả:\n\n"
+        for row in results.to_dict('records'):
+            yield self._format_row(row, style)
+        if end < total:
+            yield f"Gõ **xem thêm** để xem các kết quả tiếp theo ({end}/{total})."
+
+    def _search_ranked(self, query_text, query_context, session, style="detail"):
+        """
+        Tìm kiếm có xếp hạng trang đầu tiên và ghi nhớ tập kết quả (vị trí khớp, phiên bản dữ liệu) trong session,
+        để "xem thêm" chỉ xếp hạng tiếp trên tập đã có thay vì tìm kiếm lại.
+        """
+        with self.db_manager.store.lock:
+            positions, exact_positions = self.db_manager.search_positions(query_text)
+            result_set = {
+                "query": query_text, "context": query_context, "style": style, "page": 0,
+                "data_version": self.db_manager.data_version,
+                "positions": positions, "exact_positions": sorted(exact_positions),
+            }
+        if session is not None and positions:
+            session[self.LAST_SEARCH_SESSION_KEY] = result_set
+        return self._result_page(result_set, 0), len(positions)
+
+    def _result_page(self, result_set, page):
+        """Các dòng của trang `page` trong tập kết quả đã lưu (tìm lại nếu dữ liệu đã đổi phiên bản)."""
+        page_size = self.results_page_size
+        start = page * page_size
+        # Kiểm tra phiên bản, xếp hạng và lấy dòng trên cùng một phiên bản dữ liệu
+        with self.db_manager.store.lock:
+            if result_set["data_version"] != self.db_manager.data_version:
+                positions, exact_positions = self.db_manager.search_positions(result_set["query"])
+                result_set.update(data_version=self.db_manager.data_version,
+                                  positions=positions, exact_positions=sorted(exact_positions))
+            if start >= len(result_set["positions"]):
+                return self.db_manager.inventory_data.iloc[[]]
+            ranked = self.db_manager.rank_search_positions(
+                result_set["query"], result_set["positions"], set(result_set["exact_positions"]), start + page_size
+            )
+            return self.db_manager.inventory_data.iloc[ranked[start:]]
+
+    def _fuzzy_fallback(self, query_text):
+        """
+        Khi tìm kiếm chính xác/chuỗi con không có kết quả, thử tìm gần đúng theo tên
+        để chấp nhận lỗi chính tả. Trả về bộ sinh các đoạn câu trả lời hoặc None nếu vẫn không có gì.
+        """
+        results, suggestions = self.db_manager.search_fuzzy(query_text, self.results_page_size)
+        if results.empty:
+            return None
+        response = f"Tôi không tìm thấy chính xác '*{query_text}*'."
+        if suggestions:
+            response += " Có phải bạn muốn tìm: " + ", ".join(f"**{term}**" for term in suggestions) + "?"
+        return self._chain(response + "\n\n", self._stream_results(results, query_text))
+
+    @staticmethod
+    def _chain(*parts):
+        for part in parts:
+            if isinstance(part, str):
+                yield part
+            else:
+                yield from part
 
     def _log_interaction(self, user_query, chatbot_response_text, parsed_query, log_type="chat"):
-        """Ghi lại tương tác của người dùng và phản hồi của chatbot vào file log."""
+        """
+        Ghi lại tương tác của người dùng và phản hồi của chatbot vào file log.
+        Bản ghi chỉ được đưa vào hàng đợi của log_writer (không ghi đĩa trên luồng trả lời);
+        mỗi phản ánh sự cố được ghi vào file riêng logs/issues/log_issue_<issue_id>.jsonl.
+        """
         log_entry = {
             "timestamp": pd.Timestamp.now().isoformat(),
             "user_query": user_query,
@@ -77,32 +190,122 @@ class ChatbotLogic:
             "parsed_intent": parsed_query.get("intent"),
             "parsed_entities": {k: v for k, v in parsed_query.items() if k != "intent"}
         }
-        log_dir = self.logs_base_dir
-        log_file = self.LOG_FILE
-        
+        path = None
         if log_type == "issue":
-            log_dir = os.path.join(self.logs_base_dir, "issues")
-            if not os.path.exists(log_dir):
-                os.makedirs(log_dir)
-            timestamp_str = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-            log_file = f"log_issue_{timestamp_str}.jsonl"
-
-        full_log_filepath = os.path.join(log_dir, log_file)
+            issue_id = parsed_query.get("issue_id") or new_issue_id()
+            path = os.path.join(self.issues_dir, f"log_issue_{issue_id}.jsonl")
 
         try:
-            mode = 'a' if log_type == 'chat' else 'w'
-            with open(full_log_filepath, mode, encoding='utf-8') as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
+            self.log_writer.write(log_entry, path=path)
         except Exception as e:
             print(f"Lỗi khi ghi log ({log_type}): {e}")
 
-    def get_response(self, user_query):
-        parsed_query = self.nlp_processor.process_query(user_query)
+    @staticmethod
+    def _query_key(user_query):
+        """Khóa cache của câu hỏi: chuỗi đã chuẩn hóa (bỏ dấu, chữ thường), gộp khoảng trắng."""
+        return " ".join(remove_accents_and_normalize(user_query).split())
+
+    def _parse_query(self, user_query):
+        key = self._query_key(user_query)
+        parsed_query = self.parse_cache.get(key)
+        if parsed_query is None:
+            parsed_query = self.nlp_processor.process_query(user_query)
+            self.parse_cache.put(key, parsed_query)
+        return dict(parsed_query, original_query=user_query)
+
+    def get_response(self, user_query, session=None):
+        """Trả lời một câu hỏi dưới dạng một chuỗi (gộp các đoạn của get_response_stream)."""
+        return "".join(self.get_response_stream(user_query, session)).strip()
+
+    def get_response_stream(self, user_query, session=None, log=True):
+        """
+        Trả lời một câu hỏi dưới dạng bộ sinh các đoạn văn bản (dùng với st.write_stream).
+        `session` (thường là st.session_state) dùng để ghi nhớ tập kết quả của lần tìm kiếm gần nhất,
+        cho phép người dùng gõ "xem thêm" để xem trang tiếp theo.
+        Câu trả lời được lấy từ cache nếu cùng ý định/từ khóa đã được trả lời ở phiên bản dữ liệu hiện tại.
+        """
+        parsed_query = self._parse_query(user_query)
         intent = parsed_query.get("intent")
-        
+        state = session if session is not None else {}
+        if intent == "report_issue":
+            # Mã riêng của phản ánh: dùng trong câu trả lời và tên file log của phản ánh
+            parsed_query["issue_id"] = new_issue_id()
+
+        if intent in self.UNCACHED_INTENTS:
+            chunks = []
+            for chunk in self._response_chunks(parsed_query, state):
+                chunks.append(chunk)
+                yield chunk
+        else:
+            # Các câu hỏi khác nhau nhưng cùng ý định và từ khóa (ví dụ "tìm axit" và "axit") dùng chung câu trả lời
+            key = (tuple(sorted((k, v) for k, v in parsed_query.items() if k != "original_query")), self.results_page_size)
+            version = self.db_manager.data_version
+            cached = self.response_cache.get(key, version)
+            if cached is not None:
+                chunks, result_set = cached
+                if result_set is not None:
+                    # Khôi phục tập kết quả để "xem thêm" vẫn hoạt động với câu trả lời lấy từ cache
+                    state[self.LAST_SEARCH_SESSION_KEY] = dict(result_set)
+                yield from chunks
+            else:
+                previous_result_set = state.get(self.LAST_SEARCH_SESSION_KEY)
+                chunks = []
+                for chunk in self._response_chunks(parsed_query, state):
+                    chunks.append(chunk)
+                    yield chunk
+                result_set = state.get(self.LAST_SEARCH_SESSION_KEY)
+                result_set = dict(result_set, page=0) if result_set is not previous_result_set else None
+                self.response_cache.put(key, (tuple(chunks), result_set), version)
+
+        if log:
+            final_response = "".join(chunks).strip()
+            log_type = "issue" if intent == "report_issue" else "chat"
+            self._log_interaction(user_query, final_response, parsed_query, log_type=log_type)
+
+    def warm_cache(self, limit=None):
+        """Trả lời trước (không ghi log) các câu hỏi xuất hiện nhiều nhất trong log chat và log lưu trữ."""
+        if limit is None:
+            limit = self.db_manager.config_data.get("chatbot_cache_warm_queries", self.CACHE_WARM_QUERIES)
+        queries = most_frequent_queries(self.logs_base_dir, limit, normalize=self._query_key)
+        for query in queries:
+            try:
+                for _ in self.get_response_stream(query, log=False):
+                    pass
+            except Exception as e:
+                print(f"Lỗi khi làm nóng cache chatbot với '{query}': {e}")
+        # Tỉ lệ trúng chỉ tính các câu hỏi thật của người dùng
+        self.parse_cache.reset_stats()
+        self.response_cache.reset_stats()
+        print(f"Đã làm nóng cache chatbot với {len(queries)} câu hỏi thường gặp.")
+        return len(queries)
+
+    def start_cache_warmup(self):
+        """Làm nóng cache ở luồng nền để không làm chậm lần hiển thị đầu tiên."""
+        threading.Thread(target=self.warm_cache, daemon=True).start()
+
+    def get_cache_stats(self):
+        return {"parse": self.parse_cache.stats(), "response": self.response_cache.stats()}
+
+    def _response_chunks(self, parsed_query, session):
+        intent = parsed_query.get("intent")
+
         if intent in ["greeting", "request_guidance"]:
-            final_response = self.GUIDANCE_MESSAGE
-        
+            yield self.GUIDANCE_MESSAGE
+
+        elif intent == "show_more":
+            last_search = session.get(self.LAST_SEARCH_SESSION_KEY) if session is not None else None
+            if not last_search:
+                yield "Bạn muốn xem thêm kết quả của tìm kiếm nào? Vui lòng nhập từ khóa tìm kiếm trước."
+                return
+            next_page = last_search["page"] + 1
+            results = self._result_page(last_search, next_page)
+            total = len(last_search["positions"])
+            if results.empty:
+                yield f"Đã hiển thị hết **{total}** kết quả cho '*{last_search['query']}*'."
+                return
+            last_search["page"] = next_page
+            yield from self._stream_results(results, last_search["context"], total, next_page, last_search["style"])
+
         elif intent == "report_issue":
             reported_id = parsed_query.get("reported_id")
             reported_item_name = parsed_query.get("reported_item_name")
@@ -116,67 +319,59 @@ class ChatbotLogic:
                 context_info = f"vật tư/hóa chất '{reported_item_name}'"
             elif reported_location:
                 context_info = f"vị trí '{reported_location}'"
-            
-            final_response = f"Phản ánh về {context_info} (vấn đề: '{problem_description}') đã được ghi nhận. Cám ơn bạn đã phản hồi về tình trạng này."
-            
-            self._log_interaction(user_query, final_response, parsed_query, log_type="issue")
-            return final_response
-        
+
+            issue_id = parsed_query.get("issue_id")
+            issue_ref = f" (mã phản ánh: `{issue_id}`)" if issue_id else ""
+            yield f"Phản ánh về {context_info} (vấn đề: '{problem_description}') đã được ghi nhận{issue_ref}. Cám ơn bạn đã phản hồi về tình trạng này."
+
         elif intent == "get_location":
             item_name = parsed_query.get("item_name")
             if not item_name:
-                final_response = "Bạn muốn hỏi vị trí của vật tư/hóa chất nào?"
+                yield "Bạn muốn hỏi vị trí của vật tư/hóa chất nào?"
+                return
+            location = self.db_manager.get_location(item_name)
+            if location:
+                yield f"**{item_name.capitalize()}** được đặt tại: **{location}**."
             else:
-                location = self.db_manager.get_location(item_name)
-                if location:
-                    final_response = f"**{item_name.capitalize()}** được đặt tại: **{location}**."
-                else:
-                    results_general = self.db_manager.search_item(item_name)
-                    if not results_general.empty:
-                        final_response = self._format_results(results_general, f"có thể liên quan đến '{item_name}' (và vị trí)")
-                    else:
-                        final_response = self._format_results(pd.DataFrame(), item_name)
+                yield from self._search_or_fallback(item_name, f"có thể liên quan đến '{item_name}' (và vị trí)", session)
 
         elif intent == "get_quantity":
             item_name = parsed_query.get("item_name")
             if not item_name:
-                final_response = "Bạn muốn hỏi số lượng của vật tư/hóa chất nào?"
+                yield "Bạn muốn hỏi số lượng của vật tư/hóa chất nào?"
+                return
+            qty, unit = self.db_manager.get_quantity(item_name)
+            if qty is not None:
+                yield f"Số lượng **{item_name.capitalize()}** hiện có là **{qty} {unit}**."
             else:
-                qty, unit = self.db_manager.get_quantity(item_name)
-                if qty is not None:
-                    final_response = f"Số lượng **{item_name.capitalize()}** hiện có là **{qty} {unit}**."
-                else:
-                    results_general = self.db_manager.search_item(item_name)
-                    if not results_general.empty:
-                        final_response = self._format_results(results_general, f"có thể liên quan đến '{item_name}' (và số lượng)")
-                    else:
-                        final_response = self._format_results(pd.DataFrame(), item_name)
+                yield from self._search_or_fallback(item_name, f"có thể liên quan đến '{item_name}' (và số lượng)", session)
 
         elif intent == "get_status":
             item_name = parsed_query.get("item_name")
             if not item_name:
-                final_response = "Bạn muốn hỏi tình trạng của vật tư/hóa chất nào?"
+                yield "Bạn muốn hỏi tình trạng của vật tư/hóa chất nào?"
+                return
+            results, total = self._search_ranked(item_name, item_name, session, style="status")
+            if results.empty:
+                yield from self._fuzzy_fallback(item_name) or [self._not_found_message(item_name)]
             else:
-                results = self.db_manager.search_item(item_name)
-                if not results.empty:
-                    response_parts = [f"Tôi tìm thấy các mục liên quan đến **{item_name.capitalize()}** với tình trạng:\n\n"]
-                    for index, row in results.iterrows():
-                        response_parts.append(f"- **{row['name']}** (ID: {row['id']}, Vị trí: {row['location']}): {row['description']}\n\n")
-                    final_response = "".join(response_parts).strip()
-                else:
-                    final_response = self._format_results(pd.DataFrame(), item_name)
-        
+                header = f"Tôi tìm thấy **{total}** mục liên quan đến **{item_name.capitalize()}** với tình trạng:\n\n"
+                yield from self._stream_results(results, item_name, total, style="status", header=header)
+
         elif intent == "search_item":
             query_text = parsed_query.get("query")
             if not query_text or len(query_text.strip()) < 2:
-                final_response = "Bạn muốn tôi tìm kiếm thông tin gì? Vui lòng nhập từ khóa cụ thể hơn."
-            else:
-                results = self.db_manager.search_item(query_text)
-                final_response = self._format_results(results, query_text)
+                yield "Bạn muốn tôi tìm kiếm thông tin gì? Vui lòng nhập từ khóa cụ thể hơn."
+                return
+            yield from self._search_or_fallback(query_text, query_text, session, fallback_context=query_text)
 
         else:
-            final_response = "Tôi không hiểu yêu cầu của bạn."
-            final_response += "\n\nBạn muốn tôi hướng dẫn tìm kiếm không?"
-        
-        self._log_interaction(user_query, final_response, parsed_query, log_type="chat")
-        return final_response
\ No newline at end of file
+            yield "Tôi không hiểu yêu cầu của bạn.\n\nBạn muốn tôi hướng dẫn tìm kiếm không?"
+
+    def _search_or_fallback(self, query_text, query_context, session, fallback_context=None):
+        """Trang đầu của tìm kiếm có xếp hạng; không có kết quả thì thử tìm gần đúng theo tên."""
+        results, total = self._search_ranked(query_text, query_context, session)
+        if not results.empty:
+            yield from self._stream_results(results, query_context, total)
+        else:
+            yield from self._fuzzy_fallback(query_text) or [self._not_found_message(fallback_context or query_text)]
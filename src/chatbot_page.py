@@ -3,11 +3,14 @@
 import streamlit as st
 import pandas as pd
 from src.chatbot_logic import ChatbotLogic
+from src.data_epochs import epoch_cached
 
-# Khởi tạo chatbot logic một lần duy nhất và cache lại
-@st.cache_resource
+# Khởi tạo chatbot logic một lần duy nhất và cache lại (không phụ thuộc dữ liệu: tra cứu qua kho dùng chung)
+@epoch_cached("chatbot_logic")
 def get_chatbot_logic():
-    return ChatbotLogic()
+    chatbot = ChatbotLogic()
+    chatbot.start_cache_warmup()
+    return chatbot
 
 def chatbot_page():
     st.title("🧪 Chatbot Lab")
@@ -28,9 +31,8 @@ def chatbot_page():
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        with st.spinner("Đang xử lý..."):
-            response = chatbot.get_response(prompt)
-        
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        # Các đoạn câu trả lời hiển thị ngay khi được tạo; mỗi câu trả lời tối đa một trang kết quả
         with st.chat_message("assistant"):
-            st.markdown(response)
\ No newline at end of file
+            response = st.write_stream(chatbot.get_response_stream(prompt, session=st.session_state))
+
+        st.session_state.messages.append({"role": "assistant", "content": response.strip()})
\ No newline at end of file
@@ -0,0 +1,166 @@
+# src/chemistry_utils.py
+
+import re
+from collections import Counter
+
+ELEMENTS = {
+    'H', 'He', 'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne', 'Na', 'Mg', 'Al', 'Si', 'P', 'S',
+    'Cl', 'Ar', 'K', 'Ca', 'Sc', 'Ti', 'V', 'Cr', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn', 'Ga',
+    'Ge', 'As', 'Se', 'Br', 'Kr', 'Rb', 'Sr', 'Y', 'Zr', 'Nb', 'Mo', 'Tc', 'Ru', 'Rh', 'Pd',
+    'Ag', 'Cd', 'In', 'Sn', 'Sb', 'Te', 'I', 'Xe', 'Cs', 'Ba', 'La', 'Ce', 'Pr', 'Nd', 'Pm',
+    'Sm', 'Eu', 'Gd', 'Tb', 'Dy', 'Ho', 'Er', 'Tm', 'Yb', 'Lu', 'Hf', 'Ta', 'W', 'Re', 'Os',
+    'Ir', 'Pt', 'Au', 'Hg', 'Tl', 'Pb', 'Bi', 'Po', 'At', 'Rn', 'Fr', 'Ra', 'Ac', 'Th', 'Pa',
+    'U', 'Np', 'Pu', 'Am', 'Cm', 'Bk', 'Cf', 'Es', 'Fm', 'Md', 'No', 'Lr',
+}
+_ELEMENTS_LOWER = {symbol.lower(): symbol for symbol in ELEMENTS}
+
+# Dấu phân cách phần hydrat/muối kép: "CuSO4.5H2O", "CuSO4·5H2O", "CuSO4*5H2O"
+_HYDRATE_SEPARATORS = re.compile(r'[.·•*]')
+_OPEN_BRACKETS = '([{'
+_CLOSE_BRACKETS = ')]}'
+# Ký tự có thể có trong một công thức (sau khi bỏ khoảng trắng)
+_FORMULA_CHARS = re.compile(r'[A-Za-z0-9()\[\]{}.·•*]+')
+# Truy vấn của người dùng chỉ được coi là công thức khi là một từ ngắn (không có khoảng trắng)
+MAX_FORMULA_QUERY_LENGTH = 40
+
+
+def _read_number(text, i):
+    start = i
+    while i < len(text) and text[i].isdigit():
+        i += 1
+    return (int(text[start:i]) if i > start else 1), i
+
+
+def _parse_group(text, i, ignore_case, memo):
+    """
+    Phân tích một dãy nguyên tố/nhóm bắt đầu tại vị trí i cho tới dấu đóng ngoặc hoặc hết chuỗi.
+    Trả về (Counter, vị trí kết thúc) hoặc None nếu không phân tích được.
+    Khi ignore_case=True, thử ký hiệu 1 chữ cái trước rồi mới tới 2 chữ cái, có quay lui;
+    kết quả tại mỗi vị trí được ghi nhớ trong `memo` nên mỗi vị trí chỉ được phân tích một lần.
+    """
+    if i not in memo:
+        memo[i] = _parse_group_at(text, i, ignore_case, memo)
+    return memo[i]
+
+
+def _parse_group_at(text, i, ignore_case, memo):
+    if i == len(text) or text[i] in _CLOSE_BRACKETS:
+        return Counter(), i
+
+    if text[i] in _OPEN_BRACKETS:
+        inner = _parse_group(text, i + 1, ignore_case, memo)
+        if inner is None:
+            return None
+        inner_counts, j = inner
+        if j >= len(text) or text[j] not in _CLOSE_BRACKETS or not inner_counts:
+            return None
+        multiplier, j = _read_number(text, j + 1)
+        rest = _parse_group(text, j, ignore_case, memo)
+        if rest is None:
+            return None
+        counts = Counter({element: n * multiplier for element, n in inner_counts.items()})
+        counts.update(rest[0])
+        return counts, rest[1]
+
+    for length in (1, 2):
+        symbol_text = text[i:i + length]
+        if len(symbol_text) < length:
+            break
+        if ignore_case:
+            symbol = _ELEMENTS_LOWER.get(symbol_text.lower())
+        else:
+            symbol = symbol_text if symbol_text in ELEMENTS else None
+            # Ký hiệu viết hoa/thường đúng chuẩn: không tách "Cl" thành "C" + "l"
+            if length == 1 and symbol and i + 1 < len(text) and text[i + 1].islower():
+                symbol = None
+        if symbol is None:
+            continue
+        count, j = _read_number(text, i + length)
+        rest = _parse_group(text, j, ignore_case, memo)
+        if rest is not None:
+            counts = Counter({symbol: count})
+            counts.update(rest[0])
+            return counts, rest[1]
+    return None
+
+
+def _parse_component(text, ignore_case):
+    multiplier, i = _read_number(text, 0)
+    parsed = _parse_group(text, i, ignore_case, {})
+    if parsed is None or parsed[1] != len(text) or not parsed[0]:
+        return None
+    return Counter({element: n * multiplier for element, n in parsed[0].items()})
+
+
+def parse_formula(formula):
+    """
+    Phân tích công thức hóa học (hỗ trợ ngoặc, hệ số và phần hydrat như ".5H2O")
+    thành Counter {nguyên tố: số nguyên tử}. Trả về None nếu chuỗi không phải công thức.
+    Chuỗi viết sai hoa/thường chỉ được chấp nhận khi có chứa chữ số (ví dụ "h2so4", "C20H12N3NAO7S").
+    """
+    if not isinstance(formula, str):
+        return None
+    text = formula.strip().replace(' ', '')
+    if not text or len(text) > 100 or not _FORMULA_CHARS.fullmatch(text):
+        return None
+
+    attempts = [False]
+    if any(ch.isdigit() for ch in text):
+        attempts.append(True)
+
+    for ignore_case in attempts:
+        total = Counter()
+        for component in _HYDRATE_SEPARATORS.split(text):
+            counts = _parse_component(component, ignore_case) if component else None
+            if counts is None:
+                break
+            total.update(counts)
+        else:
+            return total
+    return None
+
+
+def hill_formula(counts):
+    """Viết công thức theo ký hiệu Hill: C, H trước (nếu có C), các nguyên tố khác theo thứ tự chữ cái."""
+    if 'C' in counts:
+        order = ['C'] + (['H'] if 'H' in counts else []) + sorted(e for e in counts if e not in ('C', 'H'))
+    else:
+        order = sorted(counts)
+    return ''.join(f"{element}{counts[element] if counts[element] != 1 else ''}" for element in order)
+
+
+def canonical_formula_key(formula):
+    """Khóa chuẩn (ký hiệu Hill) của một công thức, hoặc None nếu không phân tích được."""
+    counts = parse_formula(formula)
+    return hill_formula(counts) if counts else None
+
+
+def formula_query_key(query):
+    """
+    Khóa Hill của một truy vấn người dùng nếu truy vấn có thể là công thức: một từ duy nhất
+    (không có khoảng trắng), ngắn và chỉ gồm ký tự của công thức. Câu hỏi thông thường trả về None.
+    """
+    if not isinstance(query, str):
+        return None
+    text = query.strip()
+    if len(text) > MAX_FORMULA_QUERY_LENGTH or not _FORMULA_CHARS.fullmatch(text):
+        return None
+    return canonical_formula_key(text)
+
+
+def normalize_cas(cas_number):
+    """
+    Chuẩn hóa số CAS về dạng "NNNNNNN-NN-N" và kiểm tra chữ số kiểm tra.
+    Chấp nhận số CAS có hoặc không có dấu gạch. Trả về None nếu không hợp lệ.
+    """
+    if not isinstance(cas_number, str):
+        return None
+    text = cas_number.strip()
+    if not re.fullmatch(r'\d{2,7}-?\d{2}-?\d', text):
+        return None
+    digits = text.replace('-', '')
+    body, check_digit = digits[:-1], int(digits[-1])
+    checksum = sum(int(digit) * weight for weight, digit in enumerate(reversed(body), start=1))
+    if checksum % 10 != check_digit:
+        return None
+    return f"{digits[:-3]}-{digits[-3:-1]}-{digits[-1]}"
@@ -1,18 +1,69 @@
 import unicodedata
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd # Cần import pandas để xử lý pd.isna
 
+
+def _normalize_text_slow(text):
+    """Cách chuẩn hóa gốc (NFKD + bỏ ký tự ngoài ASCII), dùng cho các ký tự nằm ngoài bảng dịch."""
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    nfkd_form = unicodedata.normalize('NFKD', text)
+    only_ascii = nfkd_form.encode('ascii', 'ignore').decode('utf-8')
+    return only_ascii.lower()
+
+
+def _build_translation_table():
+    """
+    Dựng bảng str.translate cho ASCII, Latin-1, Latin Extended, dấu kết hợp và khối
+    Latin Extended Additional (chứa toàn bộ chữ tiếng Việt có dấu).
+    Mỗi ký tự được ánh xạ đúng bằng kết quả của cách chuẩn hóa gốc trên ký tự đó.
+    """
+    code_ranges = [(0x0000, 0x0250), (0x0300, 0x0370), (0x1E00, 0x1F00)]
+    table = {}
+    for start, end in code_ranges:
+        for code in range(start, end):
+            char = chr(code)
+            normalized = _normalize_text_slow(char)
+            if normalized != char:
+                table[code] = normalized
+    return table
+
+
+_TRANSLATION_TABLE = _build_translation_table()
+
+
+@lru_cache(maxsize=65536)
+def _normalize_text(text):
+    translated = text.translate(_TRANSLATION_TABLE)
+    if translated.isascii():
+        return translated
+    # Còn ký tự ngoài bảng (ví dụ ký tự tương thích như 'ﬁ'): dùng lại cách chuẩn hóa gốc.
+    return _normalize_text_slow(translated)
+
+
 def remove_accents_and_normalize(input_str):
     """
     Loại bỏ dấu tiếng Việt, chuyển chữ 'đ'/'Đ' thành 'd'/'D', và chuẩn hóa chuỗi về chữ thường.
     Hàm này được dùng chung trên toàn bộ dự án.
     """
+    # Kiểm tra chuỗi trước vì đây là trường hợp phổ biến nhất và pd.isna khá chậm
+    if isinstance(input_str, str):
+        return _normalize_text(input_str)
     if pd.isna(input_str):
         return ''
-    if not isinstance(input_str, str):
-        return str(input_str)
-    
-    input_str = input_str.replace('đ', 'd').replace('Đ', 'D')
-    
-    nfkd_form = unicodedata.normalize('NFKD', input_str)
-    only_ascii = nfkd_form.encode('ascii', 'ignore').decode('utf-8')
-    return only_ascii.lower()
\ No newline at end of file
+    return str(input_str)
+
+
+def normalize_series(values):
+    """
+    Chuẩn hóa cả một cột (pandas Series, mảng Arrow hoặc list) bằng remove_accents_and_normalize.
+    Mỗi giá trị khác nhau chỉ được chuẩn hóa một lần; giá trị rỗng (NaN/None) trở thành ''.
+    """
+    if not isinstance(values, pd.Series):
+        values = values.to_pandas() if hasattr(values, 'to_pandas') else pd.Series(values)
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    # Phần tử cuối là '' để mã -1 (giá trị rỗng) trỏ tới chuỗi rỗng.
+    normalized = np.array([remove_accents_and_normalize(value) for value in uniques] + [''], dtype=object)
+    return pd.Series(normalized[codes], index=values.index, name=values.name)
@@ -0,0 +1,72 @@
+# src/data_epochs.py
+
+import functools
+import threading
+from collections import defaultdict
+
+# Các miền dữ liệu có epoch riêng: sửa tồn kho không làm mới tài nguyên chỉ phụ thuộc cấu hình, v.v.
+INVENTORY = "inventory"
+CONFIG = "config"
+USERS = "users"
+
+_EPOCHS = {INVENTORY: 0, CONFIG: 0, USERS: 0}
+_EPOCHS_LOCK = threading.Lock()
+
+# Bộ đếm cho từng cache: số lần dùng lại (hits) và số lần phải dựng lại (rebuilds)
+CACHE_STATS = defaultdict(lambda: {"hits": 0, "rebuilds": 0})
+
+
+def get_epoch(domain):
+    with _EPOCHS_LOCK:
+        return _EPOCHS[domain]
+
+
+def get_epochs():
+    """Trả về bản sao epoch hiện tại của tất cả các miền dữ liệu."""
+    with _EPOCHS_LOCK:
+        return dict(_EPOCHS)
+
+
+def bump_epoch(*domains):
+    """Đánh dấu dữ liệu của các miền đã thay đổi; các cache phụ thuộc sẽ được dựng lại khi dùng tới."""
+    with _EPOCHS_LOCK:
+        for domain in domains:
+            _EPOCHS[domain] += 1
+
+
+def get_cache_stats():
+    """Bản sao bộ đếm hits/rebuilds của các cache, dùng để kiểm chứng số lần dựng lại."""
+    with _EPOCHS_LOCK:
+        return {name: dict(stats) for name, stats in CACHE_STATS.items()}
+
+
+def epoch_cached(name, *domains):
+    """
+    Decorator thay cho st.cache_resource: kết quả được dùng chung trong tiến trình theo tham số
+    và chỉ được dựng lại khi epoch của một trong các miền `domains` thay đổi.
+    Không có `domains` nghĩa là tài nguyên không phụ thuộc dữ liệu và chỉ dựng một lần.
+    """
+    def decorator(builder):
+        entries = {}
+        build_lock = threading.Lock()
+
+        @functools.wraps(builder)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            with build_lock:
+                with _EPOCHS_LOCK:
+                    epochs = tuple(_EPOCHS[domain] for domain in domains)
+                entry = entries.get(key)
+                if entry is not None and entry[0] == epochs:
+                    with _EPOCHS_LOCK:
+                        CACHE_STATS[name]["hits"] += 1
+                    return entry[1]
+                value = builder(*args, **kwargs)
+                entries[key] = (epochs, value)
+                with _EPOCHS_LOCK:
+                    CACHE_STATS[name]["rebuilds"] += 1
+                return value
+
+        wrapper.cache_name = name
+        return wrapper
+    return decorator
@@ -0,0 +1,116 @@
+# src/data_watcher.py
+
+import os
+import threading
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from src.change_journal import get_journal_path
+from src.data_epochs import USERS, bump_epoch
+
+# Chờ file ghi xong (nhiều sự kiện liên tiếp khi ghi file tạm rồi đổi tên) trước khi đồng bộ
+DEBOUNCE_SECONDS = 0.5
+
+
+class _DataFileHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (getattr(event, 'src_path', None), getattr(event, 'dest_path', None)):
+            if path:
+                self.watcher.notify(os.path.abspath(path))
+
+
+class DataFileWatcher:
+    """
+    Theo dõi inventory.json (kèm nhật ký thay đổi), config.json và users.json bằng watchdog.
+    Khi file thay đổi trên đĩa, chỉ phần dữ liệu tương ứng được đồng bộ:
+    tồn kho qua InventoryStore.sync_from_disk, cấu hình qua reload_config,
+    người dùng bằng cách tăng epoch để UserManager được đọc lại.
+    """
+    def __init__(self, store, users_path=None, debounce_seconds=DEBOUNCE_SECONDS):
+        self.store = store
+        self.debounce_seconds = debounce_seconds
+        self._handlers = {
+            os.path.abspath(store.data_path): self._sync_inventory,
+            os.path.abspath(get_journal_path(store.data_path)): self._sync_inventory,
+            os.path.abspath(store.config_path): self._sync_config,
+        }
+        if users_path:
+            self._handlers[os.path.abspath(users_path)] = self._sync_users
+        self._timers = {}
+        self._lock = threading.Lock()
+        self._observer = None
+
+    def start(self):
+        self._observer = Observer()
+        handler = _DataFileHandler(self)
+        for directory in {os.path.dirname(path) for path in self._handlers}:
+            if os.path.isdir(directory):
+                self._observer.schedule(handler, directory, recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        return self
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+
+    def notify(self, path):
+        """Ghi nhận sự kiện trên một file; việc đồng bộ chạy sau khi file ngừng thay đổi."""
+        sync = self._handlers.get(path)
+        if sync is None:
+            return
+        with self._lock:
+            timer = self._timers.get(sync)
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(self.debounce_seconds, self._run, args=(sync,))
+            timer.daemon = True
+            self._timers[sync] = timer
+            timer.start()
+
+    def _run(self, sync):
+        with self._lock:
+            self._timers.pop(sync, None)
+        try:
+            sync()
+        except Exception as e:
+            print(f"Lỗi khi đồng bộ dữ liệu từ đĩa: {e}")
+
+    def _sync_inventory(self):
+        self.store.sync_from_disk()
+
+    def _sync_config(self):
+        # Bỏ qua khi chính ứng dụng vừa ghi config.json với nội dung đang có trong bộ nhớ
+        self.store.reload_config(only_if_changed=True)
+
+    def _sync_users(self):
+        bump_epoch(USERS)
+
+
+_WATCHERS = {}
+_WATCHERS_LOCK = threading.Lock()
+
+
+def start_data_watcher(store, users_path=None):
+    """Khởi động (một lần cho mỗi kho dữ liệu) luồng theo dõi file dữ liệu."""
+    with _WATCHERS_LOCK:
+        watcher = _WATCHERS.get(id(store))
+        if watcher is None:
+            try:
+                watcher = DataFileWatcher(store, users_path).start()
+            except Exception as e:
+                print(f"Lỗi khi khởi động theo dõi file dữ liệu: {e}")
+                return None
+            _WATCHERS[id(store)] = watcher
+        return watcher
@@ -2,11 +2,18 @@
 
 import json
 import os
-import git
+import threading
 import streamlit as st
 
 # Import lớp cha để kế thừa
 from src.database_manager import DatabaseManager
+from src.data_epochs import CONFIG, bump_epoch, epoch_cached
+from src.git_worker import get_git_worker
+from src.inventory_schema import write_inventory
+
+# Kết quả của save_item_update (False nếu lưu thất bại)
+SAVED_AND_QUEUED = "queued"   # đã lưu trên máy chủ và đưa vào hàng đợi push lên GitHub
+SAVED_LOCALLY = "local"       # đã lưu trên máy chủ nhưng không push được (ví dụ thiếu GITHUB_TOKEN)
 
 class AdminDatabaseManager(DatabaseManager):
     """
@@ -17,28 +24,99 @@ class AdminDatabaseManager(DatabaseManager):
         # Gọi hàm __init__ của lớp cha (DatabaseManager) để tải dữ liệu.
         super().__init__(data_path, config_path)
 
-    def save_inventory_to_json(self):
-        """Lưu dữ liệu kho hàng hiện tại vào file inventory.json."""
+    def update_item(self, item_id, updates):
+        """Cập nhật các trường của một vật tư trong kho dữ liệu dùng chung (chưa ghi ra file)."""
+        return self.store.update_item(item_id, updates)
+
+    def save_inventory_to_json(self, commit_message=None):
+        """
+        Lưu dữ liệu kho hàng hiện tại vào file inventory.json.
+        Với backend SQLite, các thay đổi đã được ghi theo từng dòng; file JSON chỉ là bản xuất để commit lên git.
+        """
         if self.inventory_data.empty:
             print("Không có dữ liệu trong inventory_data để lưu.")
             return False
-        
-        original_cols = [
-            'id', 'name', 'type', 'quantity', 'unit', 'location', 'description',
-            'iupac_name', 'vietnamese_name', 'chemical_formula', 'cas_number',
-            'state_or_concentration', 'status', 'purpose', 'tracking', 'note'
-        ]
-        
-        cols_to_save = [col for col in original_cols if col in self.inventory_data.columns]
-        data_to_save = self.inventory_data[cols_to_save].to_dict(orient='records')
-        
-        commit_message = f"feat(admin): Cập nhật thông tin từ giao diện Admin"
-        return self.save_and_push_json(self.data_path, data_to_save, commit_message)
-
-    def save_config_to_json(self):
-        """Lưu cấu hình hiện tại vào file config.json."""
-        commit_message = f"feat(config): Cập nhật cài đặt từ giao diện Admin"
-        return self.save_and_push_json(self.config_path, self.config_data, commit_message)
+
+        commit_message = commit_message or f"feat(admin): Cập nhật thông tin từ giao diện Admin"
+
+        if self.store.backend is not None:
+            # Mỗi lần sửa đã được ghi vào SQLite; bản xuất JSON (toàn bộ bảng) được tạo ở luồng git,
+            # một lần cho mỗi lô yêu cầu được gộp, không chạy trên luồng giao diện
+            return self.push_to_github(self.data_path, commit_message, before_commit=self._export_sqlite_json)
+
+        return self.save_and_push_inventory(self.store.get_records(), commit_message)
+
+    def _export_sqlite_json(self):
+        self.store.backend.export_json(self.data_path)
+
+    def save_and_push_inventory(self, records, commit_message, extra_paths=()):
+        """Ghi dữ liệu tồn kho theo schema (chỉ trường gốc, JSON gọn) và đẩy lên GitHub (kèm extra_paths nếu có)."""
+        try:
+            # Chờ lần gộp nhật ký đang chạy (nếu có) để hai luồng không cùng ghi inventory.json.tmp
+            with self.store.snapshot_lock:
+                count = write_inventory(self.data_path, records)
+            print(f"Đã lưu {count} bản ghi vào {self.data_path} thành công.")
+        except Exception as e:
+            st.error(f"Lỗi khi lưu dữ liệu tồn kho: {e}")
+            print(f"Lỗi khi lưu dữ liệu tồn kho: {e}")
+            return False
+        return self.push_to_github([self.data_path] + list(extra_paths), commit_message)
+
+    def save_item_update(self, commit_message):
+        """
+        Lưu một lần sửa vật tư đã được áp dụng bằng update_item.
+        Backend JSON: thay đổi đã nằm trong nhật ký, chỉ commit file nhật ký (nhỏ) lên git;
+        khi nhật ký vượt ngưỡng thì gộp vào inventory.json ở luồng nền.
+        Ảnh chụp thống kê của ngày chỉ được ghi ở lần lưu đầu tiên trong ngày (và khi gộp nhật ký),
+        commit cùng với dữ liệu trong một yêu cầu.
+        Trả về SAVED_AND_QUEUED, SAVED_LOCALLY (không có GITHUB_TOKEN để push) hoặc False nếu lưu thất bại.
+        """
+        snapshot_paths = [path for path in [self.record_daily_snapshot(only_if_missing=True)] if path]
+        journal = self.store.journal
+        if self.store.backend is not None:
+            # Dòng đã được ghi vào SQLite; bản xuất JSON được tạo ở luồng git cùng commit với ảnh chụp
+            if not self.push_available():
+                return SAVED_LOCALLY
+            saved = self.push_to_github([self.data_path] + snapshot_paths, commit_message,
+                                        before_commit=self._export_sqlite_json)
+            return SAVED_AND_QUEUED if saved else SAVED_LOCALLY
+        if journal is None:
+            saved = self.save_and_push_inventory(self.store.get_records(), commit_message, extra_paths=snapshot_paths)
+            return SAVED_AND_QUEUED if saved else False
+
+        # Gộp nhật ký là thao tác cục bộ: chạy cả khi không push được lên GitHub.
+        # Chỉ một luồng gộp tại một thời điểm (compact_journal cũng tự kiểm tra khóa)
+        if journal.needs_compaction() and not self.store.compaction_in_progress():
+            threading.Thread(target=self._compact_and_push, daemon=True).start()
+
+        # Thay đổi đã được ghi (fsync) vào nhật ký bởi update_item
+        if not self.push_available():
+            return SAVED_LOCALLY
+        paths = [journal.journal_path] + snapshot_paths
+        return SAVED_AND_QUEUED if self.push_to_github(paths, commit_message) else SAVED_LOCALLY
+
+    def _compact_and_push(self):
+        """Gộp nhật ký vào inventory.json và commit cả hai file (chạy ở luồng nền)."""
+        try:
+            if not self.store.compact_journal():
+                return
+            # Ảnh chụp của ngày được cập nhật theo dữ liệu vừa gộp
+            snapshot_paths = [path for path in [self.record_daily_snapshot()] if path]
+            if self.push_available():
+                self.push_to_github(
+                    [self.data_path, self.store.journal.journal_path] + snapshot_paths,
+                    "chore(data): Gộp nhật ký thay đổi vào inventory.json"
+                )
+        except Exception as e:
+            print(f"Lỗi khi gộp nhật ký thay đổi: {e}")
+
+    def save_config_to_json(self, commit_message=None):
+        """Lưu cấu hình hiện tại vào file config.json và đưa vào hàng đợi push."""
+        commit_message = commit_message or f"feat(config): Cập nhật cài đặt từ giao diện Admin"
+        saved = self.save_and_push_json(self.config_path, self.config_data, commit_message)
+        # config_data đã được sửa trực tiếp; chỉ làm mới các cache phụ thuộc cấu hình
+        bump_epoch(CONFIG)
+        return saved
 
     def save_and_push_json(self, file_path, data, commit_message):
         """Hàm chung để lưu dữ liệu vào file JSON và đẩy lên GitHub."""
@@ -47,8 +125,15 @@ class AdminDatabaseManager(DatabaseManager):
             if dir_name:
                 os.makedirs(dir_name, exist_ok=True)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            # Ghi file tạm rồi đổi tên: lỗi giữa chừng không làm hỏng file đang có
+            tmp_path = f"{file_path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=4)
+                os.replace(tmp_path, file_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
             
             print(f"Đã lưu dữ liệu vào {file_path} thành công.")
             
@@ -59,55 +144,30 @@ class AdminDatabaseManager(DatabaseManager):
             print(f"Lỗi khi lưu và đẩy file JSON: {e}")
             return False
 
-    def push_to_github(self, file_path_to_push, commit_message):
-        """Thực hiện git add, commit và git push cho một file cụ thể."""
+    def push_available(self):
+        """Có GITHUB_TOKEN để push lên GitHub hay không."""
+        return bool(st.secrets.get("GITHUB_TOKEN"))
+
+    def push_to_github(self, file_path_to_push, commit_message, before_commit=None):
+        """
+        Đưa một file (hoặc danh sách file) vào hàng đợi commit/push của luồng nền và trả về ngay.
+        `before_commit`: hàm tạo file cần commit, chạy ở luồng nền trước khi commit (xem GitPersistenceWorker.submit).
+        Trạng thái push (đang chờ, lần push gần nhất, lỗi gần nhất) xem qua get_push_status().
+        """
         github_token = st.secrets.get("GITHUB_TOKEN")
 
         if not github_token:
             st.error("Lỗi: Không tìm thấy GitHub Personal Access Token trong secrets.")
             return False
-        
-        try:
-            # Giả định thư mục hiện tại là gốc của repo khi chạy trên cloud
-            repo_path = "."
-            repo = git.Repo(repo_path)
-            
-            # Cấu hình user git
-            with repo.config_writer() as cw:
-                cw.set_value('user', 'email', 'streamlit.app@email.com').release()
-                cw.set_value('user', 'name', 'Streamlit App').release()
-            
-            # Add và commit
-            repo.index.add([file_path_to_push])
-            repo.index.commit(commit_message)
-            print(f"Đã commit '{file_path_to_push}' với thông báo: {commit_message}")
-
-            # Dùng phương thức push của GitPython thay vì subprocess
-            remote = repo.remote(name='origin')
-            original_url = remote.url
-            
-            # Tạo URL với token để xác thực
-            if original_url.startswith("https://"):
-                repo_url_with_auth = original_url.replace("https://", f"https://oauth2:{github_token}@")
-            else:
-                st.error(f"Định dạng URL remote không được hỗ trợ: {original_url}")
-                return False
-
-            # Tạm thời thay đổi URL của remote để push, sau đó trả về như cũ
-            try:
-                remote.set_url(repo_url_with_auth)
-                remote.push(repo.active_branch.name)
-                print(f"Đã đẩy '{file_path_to_push}' lên GitHub thành công.")
-            finally:
-                remote.set_url(original_url) # Khôi phục URL gốc
 
-            return True
+        return get_git_worker(".", token=github_token).submit(file_path_to_push, commit_message, before_commit)
 
-        except git.GitCommandError as e:
-            st.error(f"Lỗi Git khi đẩy lên GitHub: {e.stderr or e.stdout}")
-            print(f"Lỗi Git khi đẩy lên GitHub: {e.stderr or e.stdout}")
-            return False
-        except Exception as e:
-            st.error(f"Lỗi không xác định khi đẩy lên GitHub: {e}")
-            print(f"Lỗi không xác định khi đẩy lên GitHub: {e}")
-            return False
\ No newline at end of file
+    def get_push_status(self):
+        """Trạng thái của luồng nền commit/push lên GitHub."""
+        return get_git_worker(".").status()
+
+
+# Một AdminDatabaseManager dùng chung cho các trang quản trị, chỉ được tạo khi lần đầu cần đến
+@epoch_cached("admin_db_manager")
+def get_admin_db_manager():
+    return AdminDatabaseManager()
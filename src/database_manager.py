@@ -1,76 +1,60 @@
 # src/database_manager.py
 
 import pandas as pd
-import json
 import os
 import git
-from datetime import datetime
+from datetime import date
 import streamlit as st
 import subprocess
+import re
 from src.common_utils import remove_accents_and_normalize
+from src.data_epochs import epoch_cached
+from src.inventory_store import get_inventory_store
+from src.chemistry_utils import formula_query_key, normalize_cas
+from src.facet_index import build_facet_index
+from src.fuzzy_index import build_fuzzy_index
+from src.summary_cube import build_summary_cube, get_snapshot_path, load_daily_snapshots, save_daily_snapshot
+from src.search_index import (
+    SEARCH_COLUMNS, build_trigram_index, build_normalized_id_index, build_name_index,
+    build_formula_index, build_cas_index, rank_positions
+)
+
+REGEX_SPECIAL_CHARS = set('.^$*+?{}[]\\|()')
 
 # (Dòng "from src.database_manager import DatabaseManager" đã được xóa để sửa lỗi import vòng lặp)
 
 class DatabaseManager:
+    """
+    Lớp truy vấn dữ liệu tồn kho. Mọi đối tượng DatabaseManager cùng đọc từ một
+    InventoryStore dùng chung của tiến trình nên việc khởi tạo không tải lại dữ liệu.
+    """
     def __init__(self, data_path='data/inventory.json', config_path='data/config.json'):
         # Sử dụng trực tiếp string path để tương thích cloud
         self.data_path = data_path
         self.config_path = config_path
-        
-        self.inventory_data = self._load_data()
-        self.config_data = self._load_config()
+        self.store = get_inventory_store(data_path, config_path)
 
-    def _load_data(self):
-        # Dùng os.path.exists để kiểm tra file
-        if not os.path.exists(self.data_path):
-            print(f"Lỗi: Không tìm thấy file dữ liệu tại {self.data_path}")
-            return pd.DataFrame()
-        try:
-            with open(self.data_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            df = pd.DataFrame(data)
-            
-            # Vòng lặp để chuẩn hóa các cột cần thiết cho việc tìm kiếm
-            columns_to_normalize = [
-                'id', 'name', 'type', 'location', 'chemical_formula',
-                'cas_number', 'state_or_concentration', 'status',
-                'purpose', 'tracking', 'iupac_name', 'vietnamese_name',
-                'description', 'note'
-            ]
-
-            for col in columns_to_normalize:
-                if col in df.columns:
-                    df[f'{col}_normalized'] = df[col].apply(remove_accents_and_normalize)
-                elif col == 'note':
-                    df['note'] = None
-                    df['note_normalized'] = None
-
-            return df
-        except json.JSONDecodeError:
-            print(f"Lỗi: File {self.data_path} không phải là JSON hợp lệ.")
-            return pd.DataFrame()
-        except Exception as e:
-            print(f"Lỗi khi tải dữ liệu: {e}")
-            return pd.DataFrame()
+    @property
+    def inventory_data(self):
+        return self.store.inventory_data
+
+    @property
+    def config_data(self):
+        return self.store.config_data
+
+    @property
+    def data_version(self):
+        """Phiên bản dữ liệu tồn kho, tăng mỗi khi dữ liệu thay đổi."""
+        return self.store.version
+
+    @property
+    def load_time(self):
+        return self.store.load_time
+
+    def reload_data(self, source_replaced=False):
+        """Tải lại dữ liệu tồn kho và cấu hình từ đĩa cho toàn bộ tiến trình."""
+        self.store.reload(source_replaced=source_replaced)
 
-    def _load_config(self):
-        """Tải cấu hình từ file config.json."""
-        # Dùng os.path.exists để kiểm tra file
-        if not os.path.exists(self.config_path):
-            print(f"Lỗi: Không tìm thấy file cấu hình tại {self.config_path}")
-            return {}
-        try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            return config
-        except json.JSONDecodeError:
-            print(f"Lỗi: File {self.config_path} không phải là JSON hợp lệ.")
-            return {}
-        except Exception as e:
-            print(f"Lỗi khi tải file cấu hình: {e}")
-            return {}
-            
     # --- Các hàm lấy dữ liệu từ file config ---
     def get_all_locations_from_config(self):
         locations = self.config_data.get('locations', [])
@@ -85,43 +69,184 @@ class DatabaseManager:
         return sorted(tracking_statuses)
 
     # --- Các hàm truy vấn dữ liệu từ DataFrame ---
+    def find_by_chemical_key(self, query):
+        """
+        Tra cứu chính xác theo công thức hóa học (so khớp dạng Hill, ví dụ "SO4H2" = "H2SO4")
+        hoặc số CAS (có hoặc không có dấu gạch). Trả về danh sách vị trí dòng theo thứ tự file.
+        """
+        if self.inventory_data.empty or not isinstance(query, str):
+            return []
+        positions = set()
+        cas_key = normalize_cas(query)
+        if cas_key:
+            positions.update(self.store.get_index('cas', build_cas_index).get(cas_key))
+        formula_key = formula_query_key(query)
+        if formula_key:
+            positions.update(self.store.get_index('formula', build_formula_index).get(formula_key))
+        return sorted(positions)
+
+    def _substring_positions(self, query_normalized):
+        """Vị trí các dòng có trường tìm kiếm chứa truy vấn (dùng chỉ mục trigram nếu có thể)."""
+        # Truy vấn chứa ký tự đặc biệt của regex giữ nguyên cách so khớp cũ (str.contains dạng regex).
+        if any(ch in REGEX_SPECIAL_CHARS for ch in query_normalized):
+            return self.inventory_data.index.get_indexer(self._scan_search(query_normalized).index).tolist()
+        if self.store.backend is not None and len(query_normalized) >= 3:
+            # Backend SQLite: dùng bảng FTS5 (tokenizer trigram) cho tìm kiếm chuỗi con
+            return self.store.positions_for_rowids(self.store.backend.search_rowids(query_normalized))
+        trigram_index = self.store.get_index('trigram', build_trigram_index)
+        return trigram_index.search(query_normalized)
+
     def search_item(self, query):
         if self.inventory_data.empty:
             return pd.DataFrame()
 
+        with self.store.lock:
+            positions, _ = self.search_positions(query)
+            return self.inventory_data.iloc[positions]
+
+    def search_positions(self, query):
+        """Vị trí (theo thứ tự trong file) của mọi dòng khớp truy vấn, kèm tập vị trí khớp chính xác công thức/CAS."""
         query_normalized = remove_accents_and_normalize(query)
-        search_cols_normalized = [
-            'id_normalized', 'name_normalized', 'type_normalized', 
-            'location_normalized', 'description_normalized', 
-            'chemical_formula_normalized', 'cas_number_normalized',
-            'iupac_name_normalized', 'vietnamese_name_normalized',
-            'note_normalized'
-        ]
-        
-        existing_search_cols = [col for col in search_cols_normalized if col in self.inventory_data.columns]
+        positions = self._substring_positions(query_normalized)
+        exact_positions = set(self.find_by_chemical_key(query))
+        if exact_positions:
+            positions = sorted(set(positions).union(exact_positions))
+        return positions, exact_positions
+
+    def search_snapshot(self, query):
+        """
+        (DataFrame, vị trí khớp, vị trí khớp chính xác, chỉ mục trigram) lấy cùng một phiên bản dữ liệu,
+        để có thể xếp hạng sau (ngoài khóa) trên đúng các dòng đã tìm thấy.
+        """
+        with self.store.lock:
+            positions, exact_positions = self.search_positions(query)
+            trigram_index = self.store.get_index('trigram', build_trigram_index)
+            return self.inventory_data, positions, exact_positions, trigram_index
+
+    def rank_search_positions(self, query, positions, exact_positions, limit, least_relevant=False, trigram_index=None):
+        """
+        `limit` vị trí có mức độ liên quan cao nhất trong số các vị trí khớp của search_positions
+        (least_relevant=True: thấp nhất, ít liên quan nhất trước).
+        trigram_index: chỉ mục của phiên bản dữ liệu đã dùng để tìm `positions` (mặc định: phiên bản hiện tại,
+        khi đó người gọi cần giữ store.lock từ lúc tìm tới lúc xếp hạng).
+        """
+        if trigram_index is None:
+            trigram_index = self.store.get_index('trigram', build_trigram_index)
+        return rank_positions(trigram_index, positions, remove_accents_and_normalize(query), limit, exact_positions,
+                              least_relevant=least_relevant)
+
+    def search_ranked(self, query, page=0, page_size=10):
+        """
+        Tìm kiếm có xếp hạng: trả về (DataFrame của trang `page`, tổng số kết quả).
+        Khớp chính xác công thức/CAS (qua chỉ mục riêng) và ID đứng trước khớp tiền tố tên,
+        rồi tới khớp trong mô tả/ghi chú.
+        """
+        if self.inventory_data.empty:
+            return pd.DataFrame(), 0
+
+        inventory_data, positions, exact_positions, trigram_index = self.search_snapshot(query)
+
+        total = len(positions)
+        page = max(int(page), 0)
+        start = page * page_size
+        if start >= total:
+            return inventory_data.iloc[[]], total
+
+        top_positions = self.rank_search_positions(query, positions, exact_positions, start + page_size,
+                                                   trigram_index=trigram_index)
+        return inventory_data.iloc[top_positions[start:]], total
+
+    def search_fuzzy(self, query, limit=10):
+        """
+        Tìm gần đúng theo tên (chấp nhận lỗi chính tả) bằng chỉ mục FuzzyNameIndex.
+        Trả về (DataFrame kết quả đã xếp hạng, danh sách từ gợi ý).
+        """
+        if self.inventory_data.empty:
+            return pd.DataFrame(), []
+        fuzzy_index = self.store.get_index('fuzzy', build_fuzzy_index)
+        positions, suggestions = fuzzy_index.search(remove_accents_and_normalize(query), limit)
+        return self.inventory_data.iloc[positions], suggestions
+
+    def _scan_search(self, query_normalized):
+        """Tìm kiếm bằng cách quét toàn bộ các cột đã chuẩn hóa."""
+        existing_search_cols = [col for col in SEARCH_COLUMNS if col in self.inventory_data.columns]
+        try:
+            re.compile(query_normalized)
+            use_regex = True
+        except re.error:
+            # Truy vấn không phải regex hợp lệ (ví dụ chỉ có "("): so khớp như chuỗi thường.
+            use_regex = False
         mask = self.inventory_data[existing_search_cols].apply(
-            lambda col: col.fillna('').astype(str).str.contains(query_normalized, na=False)
+            lambda col: col.astype(object).fillna('').astype(str).str.contains(query_normalized, regex=use_regex, na=False)
         ).any(axis=1)
 
         return self.inventory_data[mask]
 
+    def filter_by_facets(self, filters):
+        """
+        Lọc theo các cột type/location/purpose/status/tracking_status bằng chỉ mục bitmap.
+        filters: {cột lọc: giá trị hoặc None}. Trả về (DataFrame hiện tại, mảng bool các dòng khớp)
+        lấy cùng một phiên bản dữ liệu; không sao chép DataFrame.
+        """
+        with self.store.lock:
+            facet_index = self.store.get_index('facets', build_facet_index)
+            return self.inventory_data, facet_index.mask(filters)
+
+    def get_summary_cube(self):
+        """Khối tổng hợp (số dòng, tổng số lượng) của phiên bản dữ liệu hiện tại."""
+        return self.store.get_index('cube', build_summary_cube)
+
+    def summarize(self, group_by, filters=None):
+        """Tổng hợp theo một chiều của khối tổng hợp trong phạm vi bộ lọc."""
+        with self.store.lock:
+            return self.get_summary_cube().summarize(group_by, filters)
+
+    def record_daily_snapshot(self, only_if_missing=False):
+        """
+        Lưu ảnh chụp khối tổng hợp của hôm nay (gọi từ đường ghi: lần lưu đầu tiên trong ngày và khi gộp nhật ký).
+        only_if_missing=True: bỏ qua nếu hôm nay đã có ảnh chụp.
+        Trả về đường dẫn file (None nếu bỏ qua hoặc lỗi).
+        """
+        if only_if_missing and os.path.exists(get_snapshot_path(self.data_path)):
+            return None
+        if self.inventory_data.empty:
+            return None
+        with self.store.lock:
+            return save_daily_snapshot(self.get_summary_cube(), self.data_path)
+
+    def get_daily_snapshots(self):
+        """
+        Các ảnh chụp khối tổng hợp theo ngày: list (ngày ISO, SummaryCube).
+        Ngày hôm nay luôn dùng khối tổng hợp hiện tại trong bộ nhớ (không ghi file).
+        """
+        today = date.today().isoformat()
+        snapshots = [(day, cube) for day, cube in load_daily_snapshots(self.data_path) if day != today]
+        if not self.inventory_data.empty:
+            snapshots.append((today, self.get_summary_cube()))
+        return snapshots
+
     def get_by_id(self, item_id):
         if self.inventory_data.empty:
             return pd.DataFrame()
         item_id_normalized = remove_accents_and_normalize(item_id)
-        return self.inventory_data[self.inventory_data['id_normalized'] == item_id_normalized]
+        id_index = self.store.get_index('id_normalized', build_normalized_id_index)
+        return self.inventory_data.iloc[id_index.get(item_id_normalized)]
+
+    def _find_by_name(self, item_name):
+        """Tìm các dòng có tên, tên IUPAC hoặc tên tiếng Việt (đã chuẩn hóa), hoặc công thức/CAS khớp chính xác."""
+        item_name_normalized = remove_accents_and_normalize(item_name)
+        name_index = self.store.get_index('name', build_name_index)
+        positions = name_index.get(item_name_normalized)
+        if not positions:
+            # Không khớp tên: thử theo công thức hóa học hoặc số CAS
+            positions = self.find_by_chemical_key(item_name)
+        return self.inventory_data.iloc[positions]
         
     def get_quantity(self, item_name):
         if self.inventory_data.empty:
             return None, None
         
-        item_name_normalized = remove_accents_and_normalize(item_name)
-        found_item_mask = (
-            (self.inventory_data['name_normalized'] == item_name_normalized) |
-            (self.inventory_data['iupac_name_normalized'] == item_name_normalized) |
-            (self.inventory_data['vietnamese_name_normalized'] == item_name_normalized)
-        )
-        found_item = self.inventory_data[found_item_mask]
+        found_item = self._find_by_name(item_name)
 
         if not found_item.empty:
             total_quantity = found_item['quantity'].sum()
@@ -133,13 +258,7 @@ class DatabaseManager:
         if self.inventory_data.empty:
             return None
 
-        item_name_normalized = remove_accents_and_normalize(item_name)
-        found_item_mask = (
-            (self.inventory_data['name_normalized'] == item_name_normalized) |
-            (self.inventory_data['iupac_name_normalized'] == item_name_normalized) |
-            (self.inventory_data['vietnamese_name_normalized'] == item_name_normalized)
-        )
-        found_item = self.inventory_data[found_item_mask]
+        found_item = self._find_by_name(item_name)
 
         if not found_item.empty:
             unique_locations = found_item['location'].unique()
@@ -169,4 +288,10 @@ class DatabaseManager:
             return False
         except Exception as e:
             print(f"Lỗi không xác định khi tải nhật ký lên GitHub: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+# Một DatabaseManager dùng chung cho mọi trang, chỉ được tạo khi lần đầu cần đến
+@epoch_cached("db_manager")
+def get_db_manager():
+    return DatabaseManager()
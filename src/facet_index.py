@@ -0,0 +1,95 @@
+# src/facet_index.py
+
+import numpy as np
+
+# Các cột dùng làm bộ lọc trên trang thống kê; 'tracking_status' là cột dẫn xuất từ 'tracking'
+FACET_COLUMNS = ['type', 'location', 'purpose', 'status', 'tracking_status']
+TRACKING_NOTE_SEPARATOR = " - Note:"
+
+
+def tracking_status(value):
+    """Trạng thái theo dõi: phần của 'tracking' trước " - Note:" (giá trị rỗng thành '')."""
+    if not isinstance(value, str):
+        return ''
+    return value.split(TRACKING_NOTE_SEPARATOR)[0].strip()
+
+
+def _facet_value(row, facet):
+    if facet == 'tracking_status':
+        return tracking_status(row.get('tracking'))
+    value = row.get(facet)
+    return value if isinstance(value, str) else None
+
+
+class FacetIndex:
+    """
+    Chỉ mục bitmap cho các bộ lọc: mỗi giá trị của mỗi cột lọc có một mảng bool (một phần tử mỗi dòng).
+    Kết hợp bộ lọc chỉ là phép AND giữa các mảng, không cần xử lý chuỗi hay sao chép DataFrame.
+    """
+    def __init__(self, df):
+        self.size = len(df)
+        self.bitmaps = {facet: {} for facet in FACET_COLUMNS}
+        self.row_values = {}
+
+        for facet in FACET_COLUMNS:
+            source = 'tracking' if facet == 'tracking_status' else facet
+            if source not in df.columns:
+                self.row_values[facet] = [None] * self.size
+                continue
+            values = df[source].tolist()
+            if facet == 'tracking_status':
+                values = [tracking_status(value) for value in values]
+            else:
+                values = [value if isinstance(value, str) else None for value in values]
+            self.row_values[facet] = values
+
+            codes, uniques = _factorize(values)
+            for code, value in enumerate(uniques):
+                # Giá trị rỗng không bao giờ được chọn làm bộ lọc nên không cần bitmap
+                if value is not None:
+                    self.bitmaps[facet][value] = codes == code
+
+    def _bitmap(self, facet, value):
+        bitmap = self.bitmaps[facet].get(value)
+        if bitmap is None:
+            bitmap = np.zeros(self.size, dtype=bool)
+            self.bitmaps[facet][value] = bitmap
+        return bitmap
+
+    def update_row(self, pos, row):
+        """Chuyển bit của dòng pos sang giá trị mới của từng cột lọc."""
+        for facet in FACET_COLUMNS:
+            old_value = self.row_values[facet][pos]
+            new_value = _facet_value(row, facet)
+            if old_value == new_value:
+                continue
+            if old_value is not None:
+                self._bitmap(facet, old_value)[pos] = False
+            if new_value is not None:
+                self._bitmap(facet, new_value)[pos] = True
+            self.row_values[facet][pos] = new_value
+
+    def mask(self, filters):
+        """
+        Mảng bool các dòng thỏa mọi bộ lọc {cột lọc: giá trị}.
+        Bộ lọc có giá trị None được bỏ qua (tương đương "Tất cả").
+        """
+        result = np.ones(self.size, dtype=bool)
+        for facet, value in filters.items():
+            if value is None:
+                continue
+            bitmap = self.bitmaps[facet].get(value)
+            if bitmap is None:
+                return np.zeros(self.size, dtype=bool)
+            result &= bitmap
+        return result
+
+
+def _factorize(values):
+    uniques = list(dict.fromkeys(values))
+    code_of = {value: code for code, value in enumerate(uniques)}
+    return np.fromiter((code_of[value] for value in values), dtype=np.int64, count=len(values)), uniques
+
+
+def build_facet_index(df):
+    return FacetIndex(df)
@@ -0,0 +1,155 @@
+# src/fuzzy_index.py
+
+import re
+from collections import defaultdict
+
+from src.search_index import NAME_COLUMNS
+
+# Khoảng cách chỉnh sửa tối đa và độ dài tiền tố dùng để sinh các biến thể xóa ký tự (như SymSpell).
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+MIN_TERM_LENGTH = 3
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Tách chuỗi đã chuẩn hóa thành các từ (chữ và số) đủ dài để so khớp gần đúng."""
+    if not isinstance(text, str):
+        return []
+    return [token for token in _TOKEN_PATTERN.findall(text) if len(token) >= MIN_TERM_LENGTH]
+
+
+def _deletes(term, max_distance):
+    """Sinh mọi biến thể của term khi xóa tối đa max_distance ký tự."""
+    results = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for word in frontier:
+            if len(word) <= 1:
+                continue
+            for i in range(len(word)):
+                next_frontier.add(word[:i] + word[i + 1:])
+        next_frontier -= results
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Khoảng cách Damerau-Levenshtein (optimal string alignment) giữa a và b.
+    Trả về max_distance + 1 ngay khi chắc chắn vượt ngưỡng.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def allowed_distance(term):
+    """Từ ngắn chỉ cho phép sai 1 ký tự, từ dài hơn cho phép sai tới MAX_EDIT_DISTANCE."""
+    return 1 if len(term) <= 5 else MAX_EDIT_DISTANCE
+
+
+class FuzzyNameIndex:
+    """
+    Chỉ mục tra cứu gần đúng theo từ trên các cột tên đã chuẩn hóa, dựa trên từ điển
+    các biến thể xóa ký tự (SymSpell). Mỗi truy vấn chỉ tính khoảng cách chỉnh sửa
+    với các từ ứng viên lấy từ từ điển, không so sánh với từng dòng dữ liệu.
+    """
+    def __init__(self, df, columns=None):
+        self.columns = [col for col in (columns or NAME_COLUMNS) if col in df.columns]
+        self.term_positions = defaultdict(set)
+        self.deletes = defaultdict(set)
+        self.row_terms = []
+
+        if df.empty or not self.columns:
+            return
+
+        column_values = [df[col].tolist() for col in self.columns]
+        for pos, values in enumerate(zip(*column_values)):
+            terms = {term for value in values for term in tokenize(value)}
+            self.row_terms.append(terms)
+            for term in terms:
+                self._add_term(term, pos)
+
+    def _add_term(self, term, pos):
+        if term not in self.term_positions:
+            for variant in _deletes(term[:PREFIX_LENGTH], MAX_EDIT_DISTANCE):
+                self.deletes[variant].add(term)
+        self.term_positions[term].add(pos)
+
+    def update_row(self, pos, row):
+        """Cập nhật các từ của một dòng sau khi dữ liệu dòng đó thay đổi."""
+        for term in self.row_terms[pos]:
+            positions = self.term_positions.get(term)
+            if positions is not None:
+                positions.discard(pos)
+        terms = {term for col in self.columns for term in tokenize(row.get(col))}
+        self.row_terms[pos] = terms
+        for term in terms:
+            self._add_term(term, pos)
+
+    def lookup_term(self, query_term):
+        """Trả về dict {từ trong dữ liệu: khoảng cách} của các từ đủ gần với query_term."""
+        max_distance = allowed_distance(query_term)
+        candidates = set()
+        for variant in _deletes(query_term[:PREFIX_LENGTH], max_distance):
+            candidates |= self.deletes.get(variant, set())
+
+        matches = {}
+        for term in candidates:
+            if not self.term_positions.get(term):
+                continue
+            distance = edit_distance(query_term, term, max_distance)
+            if distance <= max_distance:
+                matches[term] = distance
+        return matches
+
+    def search(self, query_normalized, limit=10):
+        """
+        Tìm các dòng có tên gần đúng với truy vấn.
+        Trả về (danh sách vị trí đã xếp hạng, danh sách từ gợi ý).
+        Mỗi từ khớp đóng góp (độ dài từ truy vấn - khoảng cách) điểm, nên dòng khớp
+        nhiều từ dài và ít lỗi hơn được xếp trước.
+        """
+        query_terms = tokenize(query_normalized)
+        row_scores = defaultdict(int)
+        suggestions = []
+        for query_term in query_terms:
+            matches = self.lookup_term(query_term)
+            if not matches:
+                continue
+            best_term = min(matches, key=lambda term: (matches[term], term))
+            if matches[best_term] > 0:
+                suggestions.append(best_term)
+
+            best_distance_by_row = {}
+            for term, distance in matches.items():
+                for pos in self.term_positions[term]:
+                    if distance < best_distance_by_row.get(pos, MAX_EDIT_DISTANCE + 1):
+                        best_distance_by_row[pos] = distance
+            for pos, distance in best_distance_by_row.items():
+                row_scores[pos] += len(query_term) - distance
+
+        ranked = sorted(row_scores, key=lambda pos: (-row_scores[pos], pos))
+        return ranked[:limit], suggestions
+
+
+def build_fuzzy_index(df):
+    return FuzzyNameIndex(df)
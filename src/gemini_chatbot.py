@@ -1,9 +1,6 @@
 # src/gemini_chatbot.py
 
-import google.generativeai as genai
-import pandas as pd
-from src.database_manager import DatabaseManager
-from src.common_utils import remove_accents_and_normalize
+from src.database_manager import get_db_manager
 
 
 class GeminiChatbot:
@@ -11,10 +8,13 @@ class GeminiChatbot:
         if not api_key:
             raise ValueError("Gemini API Key is not provided.")
         
+        # Thư viện Gemini nặng (~1 giây để import): chỉ nạp khi trợ lý AI thực sự được khởi tạo
+        import google.generativeai as genai
+
         self.api_key = api_key
         genai.configure(api_key=self.api_key)
         
-        self.db_manager = DatabaseManager()
+        self.db_manager = get_db_manager()
         
         # Lấy tên mô hình từ config, mặc định là 'gemini-1.5-flash'
         model_name = self.db_manager.config_data.get('gemini_model_name', 'gemini-1.5-flash')
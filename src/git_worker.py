@@ -0,0 +1,241 @@
+# src/git_worker.py
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import git
+
+# Các yêu cầu ghi đến trong khoảng này (giây) được gộp vào một commit
+COALESCE_SECONDS = 2.0
+MAX_PUSH_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+GIT_AUTHOR = git.Actor('Streamlit App', 'streamlit.app@email.com')
+
+
+class GitPersistenceWorker:
+    """
+    Luồng nền nhận các yêu cầu (danh sách file, thông điệp commit) qua hàng đợi,
+    gộp các yêu cầu đến gần nhau thành một commit rồi push lên remote, có thử lại với
+    thời gian chờ tăng dần. Giao diện chỉ cần gọi submit() và không phải chờ git.
+    Remote có thể là GitHub (https, cần token) hoặc một repo bare cục bộ khi kiểm thử.
+    """
+    def __init__(self, repo_path=".", remote_name="origin", token=None,
+                 coalesce_seconds=COALESCE_SECONDS, max_retries=MAX_PUSH_RETRIES,
+                 backoff_seconds=BACKOFF_SECONDS, max_backoff_seconds=MAX_BACKOFF_SECONDS):
+        self.repo_path = repo_path
+        self.remote_name = remote_name
+        self.token = token
+        self.coalesce_seconds = coalesce_seconds
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0      # số yêu cầu chưa được push
+        self._unpushed = 0     # số yêu cầu đã commit nhưng push thất bại
+        self._outstanding = 0  # số yêu cầu chưa xử lý xong (đang trong hàng đợi hoặc đang chạy)
+        self._busy = False
+        self._stopping = False
+        self._last_pushed = None
+        self._last_commit = None
+        self._last_error = None
+        self._last_error_time = None
+
+        self._thread = threading.Thread(target=self._run, name="git-persistence-worker", daemon=True)
+        self._thread.start()
+
+    # --- API cho giao diện ---
+    def submit(self, paths, commit_message, before_commit=None):
+        """
+        Đưa một yêu cầu commit/push vào hàng đợi và trả về ngay.
+        `before_commit` (tùy chọn): hàm ghi các file cần commit, được gọi ở luồng nền ngay trước commit,
+        mỗi hàm một lần cho cả lô yêu cầu được gộp (ví dụ xuất SQLite ra inventory.json).
+        """
+        paths = [paths] if isinstance(paths, str) else list(paths)
+        with self._lock:
+            self._pending += 1
+            self._outstanding += 1
+        self._queue.put((paths, commit_message, before_commit))
+        return True
+
+    def status(self):
+        """Trạng thái hiện tại: số yêu cầu đang chờ, lần push gần nhất, lỗi gần nhất."""
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "busy": self._busy,
+                "last_pushed": self._last_pushed,
+                "last_commit": self._last_commit,
+                "last_error": self._last_error,
+                "last_error_time": self._last_error_time,
+            }
+
+    def flush(self, timeout=None):
+        """Chờ tới khi mọi yêu cầu trong hàng đợi đã được xử lý (commit và thử push)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._outstanding > 0:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stop(self, timeout=10):
+        """Xử lý nốt hàng đợi rồi dừng luồng nền."""
+        self.flush(timeout)
+        self._stopping = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # --- Luồng nền ---
+    def _run(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            with self._lock:
+                self._busy = True
+            batch = [request]
+            # Gộp các yêu cầu đến trong cửa sổ thời gian
+            deadline = time.monotonic() + self.coalesce_seconds
+            while not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    next_request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if next_request is None:
+                    self._stopping = True
+                    break
+                batch.append(next_request)
+
+            try:
+                self._process_batch(batch)
+            except Exception as e:
+                self._record_error(f"Lỗi không xác định khi lưu lên git: {e}")
+            finally:
+                with self._idle:
+                    self._busy = False
+                    self._outstanding -= len(batch)
+                    self._idle.notify_all()
+            if self._stopping and self._queue.empty():
+                return
+
+    def _process_batch(self, batch):
+        paths = list(dict.fromkeys(path for request_paths, _, _ in batch for path in request_paths))
+        messages = list(dict.fromkeys(message for _, message, _ in batch))
+        preparers = list(dict.fromkeys(prepare for _, _, prepare in batch if prepare is not None))
+        if len(messages) == 1:
+            commit_message = messages[0]
+        else:
+            commit_message = f"chore(data): Gộp {len(batch)} thay đổi từ giao diện Admin\n\n" + \
+                "\n".join(f"- {message}" for message in messages)
+
+        repo = git.Repo(self.repo_path)
+        try:
+            for prepare in preparers:
+                prepare()
+            self._commit(repo, paths, commit_message)
+        except Exception as e:
+            with self._lock:
+                self._pending -= len(batch)
+            self._record_error(f"Lỗi khi commit {', '.join(paths)}: {e}")
+            return
+
+        with self._lock:
+            self._unpushed += len(batch)
+        if self._push_with_retry(repo):
+            with self._lock:
+                self._pending -= self._unpushed
+                self._unpushed = 0
+                self._last_pushed = datetime.now()
+                self._last_error = None
+
+    def _commit(self, repo, paths, commit_message):
+        existing = [path for path in paths if os.path.exists(os.path.join(self.repo_path, path))]
+        removed = [path for path in paths if path not in existing]
+        if existing:
+            repo.index.add(existing)
+        if removed:
+            repo.index.remove(removed, ignore_unmatch=True)
+        if repo.head.is_valid() and not repo.index.diff("HEAD"):
+            print(f"Không có thay đổi để commit cho {', '.join(paths)}.")
+            return
+        commit = repo.index.commit(commit_message, author=GIT_AUTHOR, committer=GIT_AUTHOR)
+        with self._lock:
+            self._last_commit = commit.hexsha
+        print(f"Đã commit '{', '.join(paths)}' với thông báo: {commit_message.splitlines()[0]}")
+
+    def _push_url(self, remote):
+        url = remote.url
+        if url.startswith("https://"):
+            if not self.token:
+                raise ValueError("Không tìm thấy GitHub Personal Access Token để push qua https.")
+            return url.replace("https://", f"https://oauth2:{self.token}@")
+        # Remote cục bộ (ví dụ repo bare dùng khi kiểm thử) hoặc ssh: push trực tiếp
+        return url
+
+    def _push_with_retry(self, repo):
+        delay = self.backoff_seconds
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                remote = repo.remote(name=self.remote_name)
+                branch = repo.active_branch.name
+                # Truyền URL có token trực tiếp cho lệnh push, không sửa cấu hình remote
+                repo.git.push(self._push_url(remote), f"HEAD:refs/heads/{branch}")
+                print(f"Đã đẩy nhánh '{branch}' lên {self.remote_name} thành công.")
+                return True
+            except git.GitCommandError as e:
+                error = f"Lỗi Git khi push (lần {attempt}/{self.max_retries}): {self._redact(e.stderr or e.stdout)}"
+            except Exception as e:
+                error = f"Lỗi khi push (lần {attempt}/{self.max_retries}): {self._redact(str(e))}"
+            self._record_error(error)
+            if attempt < self.max_retries and not self._stopping:
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff_seconds)
+        return False
+
+    def _redact(self, text):
+        text = str(text or "")
+        return text.replace(self.token, "***") if self.token else text
+
+    def _record_error(self, message):
+        print(message)
+        with self._lock:
+            self._last_error = message
+            self._last_error_time = datetime.now()
+
+
+_WORKERS = {}
+_WORKERS_LOCK = threading.Lock()
+
+
+def get_git_worker(repo_path=".", token=None, **kwargs):
+    """Trả về GitPersistenceWorker dùng chung của tiến trình cho một repo."""
+    key = os.path.abspath(repo_path)
+    with _WORKERS_LOCK:
+        worker = _WORKERS.get(key)
+        if worker is None:
+            worker = GitPersistenceWorker(repo_path, token=token, **kwargs)
+            _WORKERS[key] = worker
+        elif token and not worker.token:
+            worker.token = token
+        return worker
+
+
+@atexit.register
+def _flush_workers():
+    # Cố gắng đẩy nốt các thay đổi đang chờ khi tiến trình kết thúc
+    for worker in list(_WORKERS.values()):
+        worker.stop(timeout=10)
@@ -0,0 +1,129 @@
+# src/inventory_cache.py
+
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+# Tăng số này mỗi khi thay đổi cách chuẩn hóa dữ liệu để cache cũ tự động bị bỏ qua.
+CACHE_FORMAT_VERSION = 2
+CACHE_DIR_NAME = ".cache"
+
+# Bộ đếm dùng chung trong tiến trình để kiểm chứng hiệu quả của cache.
+CACHE_STATS = {
+    "hits": 0,
+    "misses": 0,
+    "last_load_seconds": None,
+    "last_load_source": None,
+}
+
+
+def get_cache_paths(data_path):
+    """Trả về đường dẫn file Parquet và file meta tương ứng với một file dữ liệu."""
+    cache_dir = os.path.join(os.path.dirname(data_path) or ".", CACHE_DIR_NAME)
+    base_name = os.path.splitext(os.path.basename(data_path))[0]
+    return (
+        os.path.join(cache_dir, f"{base_name}.parquet"),
+        os.path.join(cache_dir, f"{base_name}.meta.json"),
+    )
+
+
+def _file_hash(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def get_source_signature(data_path, with_hash=True):
+    """Tạo chữ ký (kích thước, mtime, sha256) của file nguồn để làm khóa cache."""
+    stat = os.stat(data_path)
+    signature = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    if with_hash:
+        signature["sha256"] = _file_hash(data_path)
+    return signature
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def load_cached_frame(data_path):
+    """
+    Đọc DataFrame đã chuẩn hóa từ cache nếu cache còn khớp với file nguồn.
+    Trả về None nếu cache không tồn tại hoặc đã cũ.
+    """
+    parquet_path, meta_path = get_cache_paths(data_path)
+    meta = _read_meta(meta_path)
+    if not meta or not os.path.exists(parquet_path):
+        return None
+
+    try:
+        signature = get_source_signature(data_path, with_hash=False)
+        if meta.get("format_version") != CACHE_FORMAT_VERSION or meta.get("size") != signature["size"]:
+            return None
+
+        if meta.get("mtime_ns") != signature["mtime_ns"]:
+            # mtime thay đổi (ví dụ sau git checkout) nhưng nội dung có thể vẫn giữ nguyên.
+            if meta.get("sha256") != _file_hash(data_path):
+                return None
+            meta["mtime_ns"] = signature["mtime_ns"]
+            _write_meta(meta_path, meta)
+
+        return pd.read_parquet(parquet_path)
+    except Exception as e:
+        print(f"Lỗi khi đọc cache dữ liệu {parquet_path}: {e}")
+        return None
+
+
+def save_cached_frame(data_path, df):
+    """Ghi DataFrame đã chuẩn hóa ra file Parquet cạnh file nguồn."""
+    parquet_path, meta_path = get_cache_paths(data_path)
+    try:
+        os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+        tmp_path = f"{parquet_path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+        _write_meta(meta_path, get_source_signature(data_path))
+        return True
+    except Exception as e:
+        print(f"Lỗi khi ghi cache dữ liệu {parquet_path}: {e}")
+        return False
+
+
+def load_with_cache(data_path, build_frame):
+    """
+    Tải DataFrame từ cache; nếu cache trượt thì gọi build_frame() để dựng lại
+    và lưu kết quả vào cache. Cập nhật CACHE_STATS sau mỗi lần tải.
+    """
+    start = time.perf_counter()
+    df = load_cached_frame(data_path)
+    if df is not None:
+        CACHE_STATS["hits"] += 1
+        CACHE_STATS["last_load_source"] = "cache"
+    else:
+        CACHE_STATS["misses"] += 1
+        CACHE_STATS["last_load_source"] = "source"
+        df = build_frame()
+        if df is not None and not df.empty:
+            save_cached_frame(data_path, df)
+    CACHE_STATS["last_load_seconds"] = time.perf_counter() - start
+    return df
@@ -0,0 +1,199 @@
+# src/inventory_schema.py
+
+import gzip
+import json
+import math
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Tăng số này khi thay đổi danh sách trường hoặc kiểu dữ liệu được lưu trữ.
+# Phiên bản được ghi kèm dữ liệu (khóa "schema_version" của JSON, metadata của parquet);
+# file cũ chưa có phiên bản được coi là v0 và được nâng cấp khi đọc.
+SCHEMA_VERSION = 1
+SCHEMA_VERSION_KEY = "schema_version"
+
+# Các trường gốc được lưu trữ (theo đúng thứ tự ghi ra file) và kiểu dữ liệu của chúng.
+# Các cột *_normalized là cột dẫn xuất, không bao giờ được ghi ra file.
+INVENTORY_FIELDS = {
+    'id': 'str',
+    'name': 'str',
+    'type': 'str',
+    'quantity': 'number',
+    'unit': 'str',
+    'location': 'str',
+    'description': 'str',
+    'iupac_name': 'str',
+    'vietnamese_name': 'str',
+    'chemical_formula': 'str',
+    'cas_number': 'str',
+    'state_or_concentration': 'str',
+    'status': 'str',
+    'purpose': 'str',
+    'tracking': 'str',
+    'note': 'str',
+}
+PERSISTED_COLUMNS = list(INVENTORY_FIELDS)
+
+
+def _is_missing(value):
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def coerce_value(field, value):
+    """Đưa một giá trị về đúng kiểu của trường: chuỗi, số (số nguyên nếu không có phần lẻ) hoặc None."""
+    if _is_missing(value):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if INVENTORY_FIELDS.get(field) == 'number':
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return int(number) if number.is_integer() else number
+    if INVENTORY_FIELDS.get(field) == 'str' and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def coerce_updates(updates):
+    """Chuẩn hóa kiểu của các giá trị cập nhật; trường ngoài schema được giữ nguyên."""
+    return {key: coerce_value(key, value) if key in INVENTORY_FIELDS else value
+            for key, value in updates.items()}
+
+
+def to_persisted_record(record):
+    """Chỉ giữ các trường trong schema (theo thứ tự chuẩn) với kiểu đã chuẩn hóa."""
+    return {field: coerce_value(field, record.get(field)) for field in PERSISTED_COLUMNS}
+
+
+def to_persisted_records(records):
+    """Nhận list of dicts hoặc DataFrame, trả về list các bản ghi chỉ gồm trường gốc."""
+    if isinstance(records, pd.DataFrame):
+        records = records.to_dict(orient='records')
+    return [to_persisted_record(record) for record in records]
+
+
+def serialize_json(records):
+    """
+    JSON gọn: {"schema_version": ..., "records": [...]} không thụt lề, mỗi bản ghi một dòng trong mảng,
+    để mỗi lần sửa chỉ làm thay đổi một dòng trong git diff.
+    """
+    lines = [json.dumps(record, ensure_ascii=False, separators=(',', ':')) for record in records]
+    return f'{{"{SCHEMA_VERSION_KEY}":{SCHEMA_VERSION},"records":[\n' + ",\n".join(lines) + "\n]}\n"
+
+
+def _upgrade_records(records, version, path):
+    """
+    Kiểm tra phiên bản schema của dữ liệu đọc từ `path` và nâng cấp lên SCHEMA_VERSION.
+    v0 (mảng JSON cũ, có thể còn cột *_normalized) chỉ cần bỏ các cột ngoài schema.
+    """
+    if not isinstance(version, int) or version < 0:
+        raise ValueError(f"File {path} có phiên bản schema không hợp lệ: {version!r}.")
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"File {path} dùng schema v{version}, mới hơn phiên bản được hỗ trợ (v{SCHEMA_VERSION}).")
+    return to_persisted_records(records)
+
+
+def _parse_json_document(document, path):
+    """Tách (bản ghi, phiên bản) từ nội dung JSON: dạng có phiên bản hoặc mảng cũ (v0)."""
+    if isinstance(document, list):
+        return document, 0
+    if isinstance(document, dict) and isinstance(document.get("records"), list):
+        return document["records"], document.get(SCHEMA_VERSION_KEY)
+    raise ValueError(f"File {path} không đúng định dạng dữ liệu tồn kho.")
+
+
+def _format_of(path):
+    if path.endswith('.parquet'):
+        return 'parquet'
+    if path.endswith('.gz'):
+        return 'json.gz'
+    return 'json'
+
+
+def write_inventory(path, records):
+    """
+    Ghi dữ liệu tồn kho theo schema (ghi file tạm rồi đổi tên). Định dạng chọn theo đuôi file:
+    .json (JSON gọn), .json.gz (JSON gọn nén gzip) hoặc .parquet (dạng cột).
+    Trả về số bản ghi đã ghi.
+    """
+    records = to_persisted_records(records)
+    dir_name = os.path.dirname(path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    file_format = _format_of(path)
+    if file_format == 'parquet':
+        df = pd.DataFrame(records, columns=PERSISTED_COLUMNS)
+        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[SCHEMA_VERSION_KEY.encode('utf-8')] = str(SCHEMA_VERSION).encode('utf-8')
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+    elif file_format == 'json.gz':
+        # mtime=0 để cùng nội dung luôn cho ra cùng file nén (không tạo thay đổi giả trong git)
+        with open(tmp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+            f.write(serialize_json(records).encode('utf-8'))
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(serialize_json(records))
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def read_inventory(path):
+    """
+    Đọc file dữ liệu tồn kho (.json, .json.gz hoặc .parquet) thành list of dicts theo schema.
+    File cũ chưa có phiên bản (còn chứa cột *_normalized) vẫn đọc được; các cột dẫn xuất bị bỏ để dựng lại khi tải.
+    Báo ValueError nếu file dùng schema mới hơn SCHEMA_VERSION.
+    """
+    file_format = _format_of(path)
+    if file_format == 'parquet':
+        table = pq.read_table(path)
+        raw_version = (table.schema.metadata or {}).get(SCHEMA_VERSION_KEY.encode('utf-8'))
+        try:
+            version = int(raw_version) if raw_version is not None else 0
+        except ValueError:
+            version = raw_version
+        records = table.to_pandas().to_dict(orient='records')
+    else:
+        if file_format == 'json.gz':
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                document = json.load(f)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        records, version = _parse_json_document(document, path)
+    return _upgrade_records(records, version, path)
+
+
+def main(argv):
+    """
+    Dòng lệnh:
+        python -m src.inventory_schema convert <file nguồn> <file đích>
+    Định dạng file đích chọn theo đuôi: .json, .json.gz hoặc .parquet.
+    """
+    if len(argv) != 4 or argv[1] != "convert":
+        print(main.__doc__)
+        return 1
+    count = write_inventory(argv[3], read_inventory(argv[2]))
+    print(f"Đã ghi {count} bản ghi (schema v{SCHEMA_VERSION}) từ {argv[2]} ra {argv[3]} "
+          f"({os.path.getsize(argv[3])} byte).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
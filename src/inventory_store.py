@@ -0,0 +1,492 @@
+# src/inventory_store.py
+
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from src.change_journal import ChangeJournal, get_journal_path, COMPACT_MAX_ENTRIES, COMPACT_MAX_BYTES
+from src.common_utils import remove_accents_and_normalize, normalize_series
+from src.data_epochs import INVENTORY, CONFIG, bump_epoch
+from src.inventory_cache import load_with_cache, CACHE_STATS
+# PERSISTED_COLUMNS được định nghĩa trong schema, nhập lại ở đây để các module khác dùng chung
+from src.inventory_schema import (
+    PERSISTED_COLUMNS, coerce_updates, read_inventory, to_persisted_record, write_inventory
+)
+from src.search_index import build_id_index
+
+COLUMNS_TO_NORMALIZE = [
+    'id', 'name', 'type', 'location', 'chemical_formula',
+    'cas_number', 'state_or_concentration', 'status',
+    'purpose', 'tracking', 'iupac_name', 'vietnamese_name',
+    'description', 'note'
+]
+
+# Các cột ít giá trị khác nhau được lưu dạng categorical; giá trị là khóa danh sách tương ứng trong config.json
+CATEGORICAL_COLUMNS = {
+    'type': 'item_types',
+    'location': 'locations',
+    'unit': 'units',
+    'tracking': 'tracking_statuses',
+    'status': 'statuses',
+    'purpose': 'purposes',
+    'state_or_concentration': None,
+}
+
+
+def _ordered_unique(values):
+    seen = set()
+    result = []
+    for value in values:
+        if isinstance(value, str) and value not in seen:
+            seen.add(value)
+            result.append(value)
+    return result
+
+
+def apply_categorical_dtypes(df, config_data):
+    """
+    Chuyển các cột ít giá trị (và cột *_normalized đi kèm) sang kiểu categorical.
+    Danh mục lấy từ danh sách trong config.json, bổ sung các giá trị chỉ có trong dữ liệu.
+    """
+    for col, config_key in CATEGORICAL_COLUMNS.items():
+        if col not in df.columns:
+            continue
+        config_values = config_data.get(config_key, []) if config_key else []
+        categories = _ordered_unique(list(config_values) + df[col].tolist())
+        df[col] = pd.Categorical(df[col], categories=categories)
+
+        normalized_col = f'{col}_normalized'
+        if normalized_col in df.columns:
+            normalized_categories = _ordered_unique(
+                [remove_accents_and_normalize(value) for value in categories] + df[normalized_col].tolist()
+            )
+            df[normalized_col] = pd.Categorical(df[normalized_col], categories=normalized_categories)
+    return df
+
+
+def _file_signature(path):
+    """(kích thước, mtime) của file, hoặc None nếu file không tồn tại."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _set_cell_values(df, labels, column, value):
+    """Gán giá trị cho một cột, tự thêm danh mục mới nếu cột là categorical."""
+    if isinstance(df[column].dtype, pd.CategoricalDtype) and isinstance(value, str) \
+            and value not in df[column].cat.categories:
+        df[column] = df[column].cat.add_categories([value])
+    df.loc[labels, column] = value
+
+
+class InventoryStore:
+    """
+    Kho dữ liệu tồn kho dùng chung cho toàn bộ tiến trình: một DataFrame đã chuẩn hóa,
+    cấu hình và các chỉ mục dựng từ DataFrame đó.
+    Mỗi lần dữ liệu thay đổi, `version` tăng lên để các bên sử dụng biết cần làm mới.
+    Mặc định dữ liệu đọc từ inventory.json; nếu config.json có "storage_backend": "sqlite"
+    thì đọc/ghi qua SQLiteInventoryBackend (file .db cạnh file JSON).
+    Với backend JSON, mỗi lần sửa được ghi nối vào nhật ký thay đổi (inventory.journal.jsonl)
+    và áp dụng lại khi tải; nhật ký được gộp vào inventory.json khi vượt ngưỡng.
+    """
+    def __init__(self, data_path='data/inventory.json', config_path='data/config.json'):
+        self.data_path = data_path
+        self.config_path = config_path
+        self.lock = threading.RLock()
+        self.version = 0
+        self.load_time = None
+        self.inventory_data = pd.DataFrame()
+        self.config_data = {}
+        self._indexes = {}
+        self.backend = None
+        self.journal = None
+        self._rowid_positions = {}
+        self._snapshot_signature = None
+        self._applied_seq = 0
+        # Chỉ một lần ghi snapshot inventory.json (gộp nhật ký hoặc lưu toàn bộ) tại một thời điểm
+        self.snapshot_lock = threading.Lock()
+        self.reload()
+
+    # --- Tải dữ liệu ---
+    def reload(self, source_replaced=False):
+        """
+        Tải lại toàn bộ dữ liệu tồn kho và cấu hình từ đĩa.
+        source_replaced=True: inventory.json vừa được thay thế hoàn toàn (ví dụ sau khi import CSV),
+        nên nhập lại CSDL SQLite hoặc bỏ nhật ký thay đổi cũ.
+        """
+        config_data = self._load_config()
+        if config_data is None:
+            config_data = self.config_data
+        if config_data.get('storage_backend') == 'sqlite':
+            self.journal = None
+            inventory_data = self._load_from_sqlite(config_data, source_replaced)
+        else:
+            self.backend = None
+            self.journal = ChangeJournal(
+                get_journal_path(self.data_path),
+                max_entries=config_data.get('journal_max_entries', COMPACT_MAX_ENTRIES),
+                max_bytes=config_data.get('journal_max_bytes', COMPACT_MAX_BYTES),
+            )
+            if source_replaced:
+                self.journal.clear()
+            self._snapshot_signature = _file_signature(self.data_path)
+            inventory_data = self._load_data()
+            self._applied_seq = self.journal.last_seq
+        if not inventory_data.empty:
+            inventory_data = apply_categorical_dtypes(inventory_data, config_data)
+        with self.lock:
+            self.inventory_data = inventory_data
+            self.config_data = config_data
+            self._bump_version()
+        bump_epoch(INVENTORY, CONFIG)
+
+    def reload_config(self, only_if_changed=False):
+        """
+        Chỉ tải lại file cấu hình. only_if_changed=True: bỏ qua nếu nội dung không đổi.
+        File thiếu hoặc đang ghi dở (JSON không hợp lệ) thì giữ nguyên cấu hình đang dùng.
+        """
+        config_data = self._load_config()
+        if config_data is None:
+            return
+        if only_if_changed and config_data == self.config_data:
+            return
+        with self.lock:
+            self.config_data = config_data
+        bump_epoch(CONFIG)
+
+    def _load_data(self):
+        # Dùng os.path.exists để kiểm tra file
+        if not os.path.exists(self.data_path):
+            print(f"Lỗi: Không tìm thấy file dữ liệu tại {self.data_path}")
+            return pd.DataFrame()
+
+        # Dữ liệu đã chuẩn hóa được cache ra file Parquet, chỉ dựng lại khi inventory.json thay đổi.
+        df = load_with_cache(self.data_path, self._build_normalized_frame)
+        if df is None:
+            return pd.DataFrame()
+        # Các thay đổi sau snapshot nằm trong nhật ký, cache Parquet vẫn dùng được
+        replayed = self._replay_journal(df)
+        self.load_time = CACHE_STATS["last_load_seconds"]
+        print(f"Đã tải dữ liệu từ {CACHE_STATS['last_load_source']} trong {self.load_time * 1000:.1f} ms "
+              f"(cache hit: {CACHE_STATS['hits']}, miss: {CACHE_STATS['misses']}, "
+              f"nhật ký: {replayed} thay đổi)")
+        return df
+
+    def _replay_journal(self, df):
+        """Áp dụng lần lượt các thay đổi trong nhật ký lên DataFrame vừa tải. Trả về số dòng nhật ký."""
+        entries = self.journal.read_entries() if self.journal else []
+        if not entries or df.empty or 'id' not in df.columns:
+            return 0
+        positions_by_id = {}
+        for pos, item_id in enumerate(df['id'].tolist()):
+            positions_by_id.setdefault(item_id, []).append(pos)
+        for entry in entries:
+            positions = positions_by_id.get(entry.get('id'))
+            if not positions:
+                continue
+            labels = df.index[positions]
+            for key, value in entry.get('updates', {}).items():
+                if key not in df.columns:
+                    df[key] = None
+                df.loc[labels, key] = value
+                if f"{key}_normalized" in df.columns:
+                    df.loc[labels, f"{key}_normalized"] = remove_accents_and_normalize(value)
+        return len(entries)
+
+    def _load_from_sqlite(self, config_data, source_replaced):
+        # Import muộn vì SQLite là backend tùy chọn
+        from src.sqlite_backend import SQLiteInventoryBackend
+
+        db_path = config_data.get('sqlite_path') or f"{os.path.splitext(self.data_path)[0]}.db"
+        backend = SQLiteInventoryBackend(db_path)
+        try:
+            if (source_replaced or not backend.exists()) and os.path.exists(self.data_path):
+                count = backend.migrate_from_json(self.data_path)
+                print(f"Đã chuyển {count} dòng từ {self.data_path} sang {db_path}.")
+            start = time.perf_counter()
+            df, row_ids = backend.load_frame()
+            self.load_time = time.perf_counter() - start
+        except Exception as e:
+            print(f"Lỗi khi tải dữ liệu từ SQLite {db_path}: {e}")
+            return pd.DataFrame()
+
+        self.backend = backend
+        self._rowid_positions = {row_id: pos for pos, row_id in enumerate(row_ids)}
+        print(f"Đã tải dữ liệu từ SQLite trong {self.load_time * 1000:.1f} ms")
+        return df
+
+    def positions_for_rowids(self, row_ids):
+        """Đổi danh sách rowid của SQLite sang vị trí dòng trong DataFrame."""
+        return [self._rowid_positions[row_id] for row_id in row_ids if row_id in self._rowid_positions]
+
+    def _build_normalized_frame(self):
+        """Đọc file dữ liệu theo schema (chỉ trường gốc) và dựng lại các cột *_normalized dùng cho tìm kiếm."""
+        try:
+            df = pd.DataFrame(read_inventory(self.data_path), columns=PERSISTED_COLUMNS)
+
+            # Vòng lặp để chuẩn hóa các cột cần thiết cho việc tìm kiếm
+            for col in COLUMNS_TO_NORMALIZE:
+                if col in df.columns:
+                    df[f'{col}_normalized'] = normalize_series(df[col])
+                elif col == 'note':
+                    df['note'] = None
+                    df['note_normalized'] = None
+
+            return df
+        except json.JSONDecodeError:
+            print(f"Lỗi: File {self.data_path} không phải là JSON hợp lệ.")
+            return pd.DataFrame()
+        except Exception as e:
+            print(f"Lỗi khi tải dữ liệu: {e}")
+            return pd.DataFrame()
+
+    def _load_config(self):
+        """Tải cấu hình từ file config.json. Trả về None nếu không đọc được (người gọi giữ cấu hình cũ)."""
+        # Dùng os.path.exists để kiểm tra file
+        if not os.path.exists(self.config_path):
+            print(f"Lỗi: Không tìm thấy file cấu hình tại {self.config_path}, giữ cấu hình đang dùng.")
+            return None
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Lỗi: File {self.config_path} không phải là JSON hợp lệ, giữ cấu hình đang dùng.")
+            return None
+        except Exception as e:
+            print(f"Lỗi khi tải file cấu hình: {e}, giữ cấu hình đang dùng.")
+            return None
+        if not isinstance(config, dict):
+            print(f"Lỗi: File {self.config_path} không chứa một đối tượng JSON, giữ cấu hình đang dùng.")
+            return None
+        return config
+
+    # --- Phiên bản dữ liệu và chỉ mục ---
+    def _bump_version(self):
+        self.version += 1
+        self._indexes.clear()
+
+    def get_index(self, name, builder):
+        """
+        Trả về chỉ mục `name` của phiên bản dữ liệu hiện tại,
+        dựng bằng builder(inventory_data) nếu chưa có.
+        """
+        with self.lock:
+            index = self._indexes.get(name)
+            if index is None:
+                index = builder(self.inventory_data)
+                self._indexes[name] = index
+            return index
+
+    def _refresh_indexes(self, positions):
+        """
+        Cập nhật tăng dần các chỉ mục đang có cho những dòng vừa thay đổi.
+        Chỉ mục không hỗ trợ update_row sẽ bị bỏ để dựng lại khi cần.
+        """
+        for name, index in list(self._indexes.items()):
+            update_row = getattr(index, 'update_row', None)
+            if update_row is None:
+                del self._indexes[name]
+                continue
+            for pos in positions:
+                update_row(pos, self.inventory_data.iloc[pos])
+
+    # --- Cập nhật dữ liệu ---
+    def find_positions_by_id(self, item_id):
+        """Trả về danh sách vị trí (theo thứ tự dòng) của các dòng có id đúng bằng item_id."""
+        if self.inventory_data.empty or 'id' not in self.inventory_data.columns:
+            return []
+        return self.get_index('id', build_id_index).get(item_id)
+
+    def update_item(self, item_id, updates):
+        """
+        Cập nhật các trường của (các) dòng có id = item_id, đồng bộ cột *_normalized,
+        cập nhật các chỉ mục và tăng phiên bản dữ liệu. Trả về False nếu không tìm thấy ID.
+        """
+        updates = coerce_updates(updates)
+        with self.lock:
+            positions = self.find_positions_by_id(item_id)
+            if not positions:
+                return False
+
+            labels = self.inventory_data.index[positions]
+            changed_values = {}
+            for key, value in updates.items():
+                _set_cell_values(self.inventory_data, labels, key, value)
+                changed_values[key] = value
+                if f"{key}_normalized" in self.inventory_data.columns:
+                    normalized_value = remove_accents_and_normalize(value)
+                    _set_cell_values(self.inventory_data, labels, f"{key}_normalized", normalized_value)
+                    changed_values[f"{key}_normalized"] = normalized_value
+
+            if self.backend is not None:
+                # Chỉ ghi dòng bị sửa vào SQLite thay vì ghi lại toàn bộ file
+                self.backend.update_item(item_id, changed_values)
+            elif self.journal is not None:
+                # Chỉ ghi nối thay đổi vào nhật ký thay vì ghi lại toàn bộ inventory.json
+                entry = self.journal.append(item_id, updates)
+                self._applied_seq = entry["seq"]
+
+            self.version += 1
+            self._refresh_indexes(positions)
+        bump_epoch(INVENTORY)
+        return True
+
+
+    def get_records(self, columns=None):
+        """
+        Trả về dữ liệu tồn kho dạng list of dicts để ghi ra JSON.
+        Giá trị rỗng của các cột categorical được đổi về None thay vì NaN.
+        """
+        with self.lock:
+            df = self.inventory_data if columns is None else self.inventory_data[columns]
+            df = df.copy()
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(object).where(df[col].notna(), None)
+        return df.to_dict(orient='records')
+
+    def compact_journal(self):
+        """
+        Gộp nhật ký thay đổi vào snapshot: ghi các trường gốc ra inventory.json theo schema
+        và bỏ các dòng nhật ký đã nằm trong snapshot. Dòng nhật ký ghi thêm trong lúc
+        gộp được giữ lại. Trả về True nếu đã gộp; False nếu không cần gộp hoặc đang có lần gộp khác.
+        """
+        if not self.snapshot_lock.acquire(blocking=False):
+            return False
+        try:
+            with self.lock:
+                journal = self.journal
+                if journal is None or self.backend is not None or self.inventory_data.empty:
+                    return False
+                compacted_seq = journal.last_seq
+                columns = [col for col in PERSISTED_COLUMNS if col in self.inventory_data.columns]
+                records = self.get_records(columns)
+
+            write_inventory(self.data_path, records)
+            with self.lock:
+                # Snapshot vừa ghi đã khớp với dữ liệu trong bộ nhớ, không cần đồng bộ lại
+                self._snapshot_signature = _file_signature(self.data_path)
+            journal.truncate_through(compacted_seq)
+            print(f"Đã gộp nhật ký thay đổi (tới seq {compacted_seq}) vào {self.data_path}.")
+            return True
+        finally:
+            self.snapshot_lock.release()
+
+    def compaction_in_progress(self):
+        return self.snapshot_lock.locked()
+
+    # --- Đồng bộ thay đổi từ đĩa (git pull, process khác, ...) ---
+    def sync_from_disk(self):
+        """
+        Áp dụng các thay đổi trên đĩa vào dữ liệu trong bộ nhớ.
+        Nếu chỉ nhật ký thay đổi: chỉ đọc các dòng nhật ký mới. Nếu snapshot thay đổi: so sánh
+        bản ghi cũ/mới theo id và chỉ cập nhật các dòng khác nhau; khi có dòng thêm/bớt thì tải lại toàn bộ.
+        Trả về số dòng đã cập nhật (hoặc None nếu đã tải lại toàn bộ).
+        """
+        if self.backend is not None or self.journal is None:
+            return 0
+        signature = _file_signature(self.data_path)
+        if signature is not None and signature != self._snapshot_signature:
+            return self._sync_snapshot(signature)
+        return self._sync_journal()
+
+    def _sync_journal(self):
+        entries = [entry for entry in self.journal.read_entries() if entry.get("seq", 0) > self._applied_seq]
+        if not entries:
+            return 0
+        changes = {}
+        with self.lock:
+            for entry in entries:
+                for pos in self.find_positions_by_id(entry.get("id")):
+                    changes.setdefault(pos, {}).update(coerce_updates(entry.get("updates", {})))
+            last_seq = max(entry["seq"] for entry in entries)
+            self._applied_seq = last_seq
+            self.journal.last_seq = max(self.journal.last_seq, last_seq)
+        return self._apply_position_changes(changes)
+
+    def _sync_snapshot(self, signature):
+        try:
+            records = read_inventory(self.data_path)
+        except Exception as e:
+            print(f"Lỗi khi đọc lại {self.data_path}: {e}")
+            return 0
+        entries = self.journal.read_entries()
+        positions_by_id = {}
+        for pos, record in enumerate(records):
+            positions_by_id.setdefault(record['id'], []).append(pos)
+        for entry in entries:
+            for pos in positions_by_id.get(entry.get('id'), []):
+                records[pos].update(coerce_updates(entry.get('updates', {})))
+
+        with self.lock:
+            columns = [col for col in PERSISTED_COLUMNS if col in self.inventory_data.columns]
+            current = [to_persisted_record(record) for record in self.get_records(columns)]
+            same_rows = len(current) == len(records) and all(
+                old['id'] == new['id'] for old, new in zip(current, records)
+            )
+            if same_rows:
+                changes = {}
+                for pos, (old, new) in enumerate(zip(current, records)):
+                    diff = {field: value for field, value in new.items() if old.get(field) != value}
+                    if diff:
+                        changes[pos] = diff
+                self._snapshot_signature = signature
+                self._applied_seq = max([self._applied_seq] + [entry.get("seq", 0) for entry in entries])
+                self.journal.last_seq = max(self.journal.last_seq, self._applied_seq)
+
+        if not same_rows:
+            # Có dòng được thêm/bớt: vị trí dòng thay đổi nên dựng lại toàn bộ
+            self.reload()
+            return None
+        return self._apply_position_changes(changes)
+
+    def _apply_position_changes(self, changes):
+        """
+        Áp dụng {vị trí dòng: {trường: giá trị}} lên một bản sao DataFrame rồi thay thế trong một bước,
+        nên người đọc không bao giờ thấy dữ liệu mới được cập nhật một nửa.
+        """
+        if not changes:
+            return 0
+        with self.lock:
+            df = self.inventory_data.copy()
+            for pos, updates in changes.items():
+                labels = df.index[[pos]]
+                for key, value in updates.items():
+                    if key not in df.columns:
+                        df[key] = None
+                    _set_cell_values(df, labels, key, value)
+                    if f"{key}_normalized" in df.columns:
+                        _set_cell_values(df, labels, f"{key}_normalized", remove_accents_and_normalize(value))
+            self.inventory_data = df
+            self.version += 1
+            self._refresh_indexes(sorted(changes))
+        bump_epoch(INVENTORY)
+        print(f"Đã đồng bộ {len(changes)} dòng thay đổi từ đĩa.")
+        return len(changes)
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_inventory_store(data_path='data/inventory.json', config_path='data/config.json'):
+    """
+    Trả về InventoryStore dùng chung của tiến trình cho cặp file dữ liệu/cấu hình.
+    Lần đầu tạo kho sẽ bật theo dõi thay đổi file trên đĩa (tắt bằng "watch_data_files": false trong config.json).
+    """
+    key = (os.path.abspath(data_path), os.path.abspath(config_path))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = InventoryStore(data_path, config_path)
+            _STORES[key] = store
+            if store.config_data.get('watch_data_files', True):
+                # Import muộn: watchdog chỉ cần khi bật theo dõi file
+                from src.data_watcher import start_data_watcher
+                start_data_watcher(store, users_path=os.path.join(os.path.dirname(data_path), 'users.json'))
+        return store
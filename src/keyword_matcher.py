@@ -0,0 +1,95 @@
+# src/keyword_matcher.py
+
+import re
+from collections import namedtuple
+
+# Một cụm từ khóa tìm thấy trong truy vấn: cụm từ, các nhóm từ khóa của nó và vị trí [start, end)
+KeywordMatch = namedtuple('KeywordMatch', ['phrase', 'categories', 'start', 'end'])
+
+
+def phrase_pattern(phrase):
+    """Mẫu regex của một cụm từ: khớp trọn từ, khoảng trắng giữa các từ có thể có hoặc không."""
+    return r'\b' + r'\s*'.join(re.escape(word) for word in phrase.split()) + r'\b'
+
+
+class KeywordMatcher:
+    """
+    Gộp mọi danh sách từ khóa (theo nhóm) thành một regex duy nhất được biên dịch một lần:
+    các cụm từ nối bằng "|" (mỗi cụm một nhóm đặt tên), đặt trong lookahead để tìm được cụm dài nhất
+    bắt đầu tại mỗi vị trí (kể cả các cụm chồng lên nhau).
+    Một lần quét truy vấn cho biết mọi cụm từ khớp cùng nhóm và vị trí, dùng chung cho
+    nhận diện ý định lẫn loại bỏ từ khóa.
+    """
+    def __init__(self, categories):
+        phrase_categories = {}
+        for category, phrases in categories.items():
+            for phrase in phrases:
+                phrase_categories.setdefault(phrase, set()).add(category)
+
+        # Cụm dài hơn đứng trước để tại mỗi vị trí regex chọn cụm dài nhất
+        self.phrases = sorted(phrase_categories, key=len, reverse=True)
+        self._phrase_index = {phrase: i for i, phrase in enumerate(self.phrases)}
+        self._phrase_regexes = [re.compile(phrase_pattern(phrase), re.IGNORECASE) for phrase in self.phrases]
+        self._own_categories = [frozenset(phrase_categories[phrase]) for phrase in self.phrases]
+
+        # Các cụm ngắn hơn bắt đầu cùng vị trí (ví dụ "con" trong "con nguyen"): regex chỉ trả về cụm dài nhất,
+        # nên nhóm của một kết quả gồm cả nhóm của các cụm tiền tố này
+        self._prefixes = []
+        self.categories = []
+        for i, phrase in enumerate(self.phrases):
+            prefixes = [j for j, regex in enumerate(self._phrase_regexes) if j != i and regex.match(phrase)]
+            self._prefixes.append(prefixes)
+            self.categories.append(self._own_categories[i].union(*(self._own_categories[j] for j in prefixes)))
+
+        alternation = "|".join(f"(?P<k{i}>{phrase_pattern(phrase)})" for i, phrase in enumerate(self.phrases))
+        self.pattern = re.compile(f"(?=(?:{alternation}))", re.IGNORECASE)
+
+    def scan(self, text):
+        """Một lần quét: danh sách KeywordMatch (cụm dài nhất tại mỗi vị trí bắt đầu), theo thứ tự vị trí."""
+        matches = []
+        for match in self.pattern.finditer(text):
+            group = match.lastgroup
+            index = int(group[1:])
+            start, end = match.span(group)
+            matches.append(KeywordMatch(self.phrases[index], self.categories[index], start, end))
+        return matches
+
+    @staticmethod
+    def matched_categories(matches):
+        categories = set()
+        for match in matches:
+            categories |= match.categories
+        return categories
+
+    def remove(self, text, matches, categories):
+        """
+        Xóa khỏi text các cụm thuộc `categories` (dùng kết quả của scan), ưu tiên cụm dài nhất, không chồng lấn.
+        Tại vị trí mà cụm dài nhất không thuộc các nhóm này, dùng cụm tiền tố dài nhất thuộc các nhóm đó.
+        """
+        pieces = []
+        last_end = 0
+        for match in matches:
+            if match.start < last_end or not (match.categories & categories):
+                continue
+            end = self._removable_end(text, match, categories)
+            if end is None:
+                continue
+            pieces.append(text[last_end:match.start])
+            pieces.append(' ')
+            last_end = end
+        pieces.append(text[last_end:])
+
+        cleaned_text = ''.join(pieces).strip()
+        cleaned_text = re.sub(r'^\W+|\W+$', '', cleaned_text).strip()
+        return re.sub(r'\s+', ' ', cleaned_text).strip()
+
+    def _removable_end(self, text, match, categories):
+        index = self._phrase_index[match.phrase]
+        if self._own_categories[index] & categories:
+            return match.end
+        for j in self._prefixes[index]:
+            if self._own_categories[j] & categories:
+                prefix_match = self._phrase_regexes[j].match(text, match.start)
+                if prefix_match:
+                    return prefix_match.end()
+        return None
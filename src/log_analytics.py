@@ -0,0 +1,280 @@
+# src/log_analytics.py
+
+import glob
+import gzip
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.common_utils import remove_accents_and_normalize
+
+LOGS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'logs'))
+ARCHIVE_PATTERNS = ("chat_log_archive_*.jsonl", "chat_log_archive_*.jsonl.gz")
+SUMMARY_DIR_NAME = "analytics"
+SUMMARY_FILE_NAME = "chat_summary.parquet"
+# Khóa trong metadata của file parquet lưu vị trí đã đọc của từng file log
+CHECKPOINT_METADATA_KEY = b"checkpoint"
+# Câu trả lời bắt đầu bằng cụm này là câu hỏi không có kết quả (xem ChatbotLogic._not_found_message)
+ZERO_RESULT_PREFIX = "Xin lỗi, tôi không tìm thấy"
+
+# Bảng tổng hợp dạng dài: mỗi dòng là một (loại chỉ số, khóa) với số lượt và số lượt không có kết quả
+METRIC_INTENT = "intent"
+METRIC_QUERY = "query"
+METRIC_DAY = "day"
+SUMMARY_COLUMNS = ["metric", "key", "label", "count", "zero_results"]
+
+
+def get_summary_path(logs_dir=LOGS_DIR):
+    return os.path.join(logs_dir, SUMMARY_DIR_NAME, SUMMARY_FILE_NAME)
+
+
+def query_key(user_query):
+    """Khóa gộp câu hỏi: chuỗi đã chuẩn hóa (bỏ dấu, chữ thường), gộp khoảng trắng."""
+    return " ".join(remove_accents_and_normalize(user_query).split())
+
+
+def list_archives(logs_dir=LOGS_DIR):
+    """Các file log lưu trữ (logs/archive/, thường hoặc nén gzip) theo thứ tự tên (tức thời điểm xoay vòng)."""
+    archive_dir = os.path.join(logs_dir, "archive")
+    paths = []
+    for pattern in ARCHIVE_PATTERNS:
+        paths.extend(glob.glob(os.path.join(archive_dir, pattern)))
+    return sorted(paths)
+
+
+class ChatLogSummary:
+    """
+    Các bộ đếm tổng hợp từ log chat: phân bố ý định, số lượt theo câu hỏi (gộp theo query_key),
+    số lượt không có kết quả và số lượt theo ngày. Bộ nhớ chỉ phụ thuộc số câu hỏi/ngày/ý định khác nhau,
+    không phụ thuộc số dòng log. `checkpoint` lưu {tên file: {"offset", "size"}} của các file đã đọc.
+    """
+    def __init__(self):
+        self.counts = {METRIC_INTENT: Counter(), METRIC_QUERY: Counter(), METRIC_DAY: Counter()}
+        self.zero_results = {METRIC_INTENT: Counter(), METRIC_QUERY: Counter(), METRIC_DAY: Counter()}
+        self.labels = {}
+        self.checkpoint = {}
+
+    def add_entry(self, entry):
+        user_query = entry.get("user_query")
+        if not isinstance(user_query, str) or not user_query.strip():
+            return False
+        response = entry.get("chatbot_response")
+        zero_result = isinstance(response, str) and response.lstrip().startswith(ZERO_RESULT_PREFIX)
+        keys = {
+            METRIC_INTENT: entry.get("parsed_intent") or "unknown",
+            METRIC_QUERY: query_key(user_query),
+            METRIC_DAY: str(entry.get("timestamp") or "")[:10] or "unknown",
+        }
+        for metric, key in keys.items():
+            self.counts[metric][key] += 1
+            if zero_result:
+                self.zero_results[metric][key] += 1
+        self.labels.setdefault(keys[METRIC_QUERY], user_query.strip())
+        return True
+
+    def to_table(self):
+        rows = {column: [] for column in SUMMARY_COLUMNS}
+        for metric, counter in self.counts.items():
+            for key, count in counter.items():
+                rows["metric"].append(metric)
+                rows["key"].append(key)
+                rows["label"].append(self.labels.get(key, key) if metric == METRIC_QUERY else key)
+                rows["count"].append(count)
+                rows["zero_results"].append(self.zero_results[metric][key])
+        table = pa.table({
+            "metric": pa.array(rows["metric"], pa.string()).dictionary_encode(),
+            "key": pa.array(rows["key"], pa.string()),
+            "label": pa.array(rows["label"], pa.string()),
+            "count": pa.array(rows["count"], pa.int64()),
+            "zero_results": pa.array(rows["zero_results"], pa.int64()),
+        })
+        metadata = {CHECKPOINT_METADATA_KEY: json.dumps(self.checkpoint, ensure_ascii=False).encode('utf-8')}
+        return table.replace_schema_metadata(metadata)
+
+    @classmethod
+    def from_table(cls, table):
+        summary = cls()
+        metadata = table.schema.metadata or {}
+        if CHECKPOINT_METADATA_KEY in metadata:
+            summary.checkpoint = json.loads(metadata[CHECKPOINT_METADATA_KEY].decode('utf-8'))
+        columns = table.to_pydict()
+        for metric, key, label, count, zero_results in zip(*(columns[name] for name in SUMMARY_COLUMNS)):
+            if metric not in summary.counts:
+                continue
+            summary.counts[metric][key] = count
+            if zero_results:
+                summary.zero_results[metric][key] = zero_results
+            if metric == METRIC_QUERY:
+                summary.labels[key] = label
+        return summary
+
+
+def _open_binary(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _consume_file(summary, path, name):
+    """
+    Đọc tiếp một file log từ vị trí đã lưu (tính theo byte chưa nén), từng dòng một.
+    Dòng cuối chưa có ký tự xuống dòng (đang ghi dở) để lại cho lần chạy sau.
+    Trả về số dòng đã đọc.
+    """
+    size = os.path.getsize(path)
+    state = summary.checkpoint.get(name, {})
+    offset = state.get("offset", 0)
+    if state.get("size") == size:
+        return 0
+    if not path.endswith('.gz') and size < offset:
+        # File bị ghi lại từ đầu: đọc lại toàn bộ
+        print(f"File log {name} nhỏ hơn vị trí đã đọc, đọc lại từ đầu.")
+        offset = 0
+
+    lines = 0
+    with _open_binary(path) as f:
+        f.seek(offset)
+        for raw_line in f:
+            if not raw_line.endswith(b'\n'):
+                break
+            offset += len(raw_line)
+            lines += 1
+            try:
+                entry = json.loads(raw_line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if isinstance(entry, dict):
+                summary.add_entry(entry)
+    summary.checkpoint[name] = {"offset": offset, "size": size}
+    return lines
+
+
+def load_summary(logs_dir=LOGS_DIR):
+    """ChatLogSummary đã lưu (kèm checkpoint), hoặc một bản rỗng nếu chưa có/không đọc được."""
+    path = get_summary_path(logs_dir)
+    if not os.path.exists(path):
+        return ChatLogSummary()
+    try:
+        return ChatLogSummary.from_table(pq.read_table(path))
+    except Exception as e:
+        print(f"Lỗi khi đọc bảng tổng hợp log {path}: {e}")
+        return ChatLogSummary()
+
+
+def load_summary_frame(logs_dir=LOGS_DIR):
+    """Bảng tổng hợp dạng DataFrame (các cột SUMMARY_COLUMNS) cho trang phân tích; rỗng nếu chưa có."""
+    path = get_summary_path(logs_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    try:
+        df = pq.read_table(path).to_pandas()
+        df['metric'] = df['metric'].astype(str)
+        return df
+    except Exception as e:
+        print(f"Lỗi khi đọc bảng tổng hợp log {path}: {e}")
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+
+def update_summary(logs_dir=LOGS_DIR, rebuild=False):
+    """
+    Đọc phần mới của các file log lưu trữ (chỉ từ vị trí đã lưu ở lần chạy trước, trừ khi `rebuild`),
+    cộng dồn vào bảng tổng hợp và ghi lại logs/analytics/chat_summary.parquet cùng checkpoint
+    (ghi file tạm rồi đổi tên). Trả về dict thống kê lần chạy.
+    """
+    summary = ChatLogSummary() if rebuild else load_summary(logs_dir)
+    files = lines = 0
+    for path in list_archives(logs_dir):
+        name = os.path.relpath(path, logs_dir)
+        try:
+            read = _consume_file(summary, path, name)
+        except (OSError, EOFError) as e:
+            print(f"Bỏ qua file log {path}: {e}")
+            continue
+        if read:
+            files += 1
+            lines += read
+
+    path = get_summary_path(logs_dir)
+    if lines or rebuild or not os.path.exists(path):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            pq.write_table(summary.to_table(), tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Lỗi khi ghi bảng tổng hợp log {path}: {e}")
+    return {"files": files, "lines": lines, "total_queries": sum(summary.counts[METRIC_DAY].values()),
+            "updated_at": datetime.now().isoformat(timespec='seconds')}
+
+
+# --- Truy vấn trên bảng tổng hợp (dùng cho trang phân tích và dòng lệnh) ---
+def _metric_rows(df, metric):
+    return df[df['metric'] == metric]
+
+
+def intent_distribution(df):
+    rows = _metric_rows(df, METRIC_INTENT).sort_values('count', ascending=False)
+    return rows.set_index('key')['count'].rename_axis('intent')
+
+
+def top_queries(df, limit=20):
+    rows = _metric_rows(df, METRIC_QUERY).sort_values(['count', 'label'], ascending=[False, True]).head(limit)
+    return rows[['label', 'count', 'zero_results']].reset_index(drop=True)
+
+
+def zero_result_queries(df, limit=20):
+    rows = _metric_rows(df, METRIC_QUERY)
+    rows = rows[rows['zero_results'] > 0].sort_values(['zero_results', 'label'], ascending=[False, True]).head(limit)
+    return rows[['label', 'zero_results', 'count']].reset_index(drop=True)
+
+
+def daily_volume(df):
+    rows = _metric_rows(df, METRIC_DAY)
+    rows = rows[rows['key'] != "unknown"].copy()
+    rows.index = pd.to_datetime(rows['key'], errors='coerce')
+    return rows[['count', 'zero_results']].sort_index()
+
+
+def main(argv):
+    """
+    Dòng lệnh:
+        python -m src.log_analytics update [--rebuild] [thư mục logs]
+        python -m src.log_analytics report [số câu hỏi] [thư mục logs]
+    "update" chỉ đọc phần mới của logs/archive/ kể từ lần chạy trước (--rebuild: đọc lại toàn bộ);
+    "report" in các bảng từ logs/analytics/chat_summary.parquet.
+    """
+    if len(argv) < 2 or argv[1] not in ("update", "report"):
+        print(main.__doc__)
+        return 1
+    args = argv[2:]
+    if argv[1] == "update":
+        rebuild = "--rebuild" in args
+        args = [arg for arg in args if arg != "--rebuild"]
+        logs_dir = args[0] if args else LOGS_DIR
+        result = update_summary(logs_dir, rebuild=rebuild)
+        print(f"Đã đọc {result['lines']} dòng mới từ {result['files']} file; "
+              f"tổng cộng {result['total_queries']} câu hỏi trong {get_summary_path(logs_dir)}.")
+    else:
+        limit = int(args[0]) if args else 20
+        logs_dir = args[1] if len(args) > 1 else LOGS_DIR
+        df = load_summary_frame(logs_dir)
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print("== Phân bố ý định ==")
+            print(intent_distribution(df).to_string())
+            print(f"\n== {limit} câu hỏi nhiều nhất ==")
+            print(top_queries(df, limit).to_string())
+            print(f"\n== {limit} câu hỏi không có kết quả nhiều nhất ==")
+            print(zero_result_queries(df, limit).to_string())
+            print("\n== Số câu hỏi theo ngày ==")
+            print(daily_volume(df).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
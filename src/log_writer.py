@@ -0,0 +1,196 @@
+# src/log_writer.py
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Các bản ghi đến trong khoảng này (giây) được ghi ra đĩa cùng một lần
+FLUSH_SECONDS = 1.0
+# Log chính được chuyển vào logs/archive/ khi vượt kích thước hoặc tồn tại quá lâu
+ROTATE_BYTES = 1024 * 1024
+ROTATE_SECONDS = 24 * 3600
+ARCHIVE_DIR_NAME = "archive"
+
+
+def new_issue_id():
+    """Mã duy nhất cho một phản ánh sự cố: thời điểm (tới giây) kèm 8 ký tự ngẫu nhiên."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+class BufferedLogWriter:
+    """
+    Ghi log JSONL qua hàng đợi trong bộ nhớ: write() chỉ đưa bản ghi vào hàng đợi và trả về ngay,
+    một luồng nền gom các bản ghi đến gần nhau và ghi theo lô (mỗi file mở một lần cho mỗi lô).
+    File log chính (`log_path`) được xoay vòng vào logs/archive/<tên>_archive_<thời điểm>.jsonl
+    (tùy chọn nén gzip) khi vượt `rotate_bytes` hoặc đã ghi lâu hơn `rotate_seconds`.
+    """
+    def __init__(self, log_path, archive_dir=None, flush_seconds=FLUSH_SECONDS,
+                 rotate_bytes=ROTATE_BYTES, rotate_seconds=ROTATE_SECONDS, compress=False):
+        self.log_path = os.path.abspath(log_path)
+        self.archive_dir = archive_dir or os.path.join(os.path.dirname(self.log_path), ARCHIVE_DIR_NAME)
+        self.flush_seconds = flush_seconds
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compress = compress
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0
+        self._stopping = False
+        self.written = 0
+        self.rotations = 0
+        self.last_error = None
+        # Mốc bắt đầu của đoạn log hiện tại (xấp xỉ bằng lần sửa cuối nếu file đã có sẵn)
+        self._segment_started = os.path.getmtime(self.log_path) if os.path.exists(self.log_path) else None
+
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    # --- API cho luồng xử lý yêu cầu ---
+    def write(self, record, path=None):
+        """Đưa một bản ghi vào hàng đợi (ghi vào `path` nếu có, mặc định là log chính); không chạm đĩa."""
+        with self._lock:
+            self._outstanding += 1
+        self._queue.put((os.path.abspath(path) if path else self.log_path, record))
+
+    def flush(self, timeout=None):
+        """Chờ tới khi mọi bản ghi đã đưa vào hàng đợi được ghi ra đĩa. Trả về False nếu hết thời gian."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._outstanding:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stop(self, timeout=None):
+        self._stopping = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def status(self):
+        with self._lock:
+            return {"pending": self._outstanding, "written": self.written,
+                    "rotations": self.rotations, "last_error": self.last_error}
+
+    # --- Luồng nền ---
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # Gom thêm các bản ghi đến trong khoảng flush_seconds để ghi một lần
+            deadline = time.monotonic() + self.flush_seconds
+            while not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._stopping = True
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+            if self._stopping:
+                # Ghi nốt những gì còn trong hàng đợi trước khi dừng
+                rest = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        rest.append(item)
+                if rest:
+                    self._write_batch(rest)
+                return
+
+    def _write_batch(self, batch):
+        lines_by_path = {}
+        for path, record in batch:
+            lines_by_path.setdefault(path, []).append(json.dumps(record, ensure_ascii=False) + '\n')
+        for path, lines in lines_by_path.items():
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if path == self.log_path:
+                    self._rotate_if_needed()
+                    if self._segment_started is None:
+                        self._segment_started = time.time()
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+                with self._lock:
+                    self.written += len(lines)
+            except Exception as e:
+                self.last_error = f"{datetime.now().isoformat()}: {e}"
+                print(f"Lỗi khi ghi log vào {path}: {e}")
+        with self._idle:
+            self._outstanding -= len(batch)
+            self._idle.notify_all()
+
+    def _rotate_if_needed(self):
+        if not os.path.exists(self.log_path):
+            return
+        too_big = os.path.getsize(self.log_path) >= self.rotate_bytes
+        too_old = self._segment_started is not None and time.time() - self._segment_started >= self.rotate_seconds
+        if too_big or too_old:
+            self.rotate()
+
+    def rotate(self):
+        """Chuyển log chính hiện tại vào thư mục archive (nén gzip nếu bật). Trả về đường dẫn file lưu trữ."""
+        if not os.path.exists(self.log_path) or os.path.getsize(self.log_path) == 0:
+            return None
+        os.makedirs(self.archive_dir, exist_ok=True)
+        base_name = os.path.splitext(os.path.basename(self.log_path))[0]
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        archive_path = os.path.join(self.archive_dir, f"{base_name}_archive_{stamp}.jsonl")
+        suffix = 1
+        while os.path.exists(archive_path) or os.path.exists(archive_path + '.gz'):
+            archive_path = os.path.join(self.archive_dir, f"{base_name}_archive_{stamp}_{suffix}.jsonl")
+            suffix += 1
+
+        os.replace(self.log_path, archive_path)
+        if self.compress:
+            with open(archive_path, 'rb') as src, gzip.open(archive_path + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(archive_path)
+            archive_path += '.gz'
+        self._segment_started = None
+        with self._lock:
+            self.rotations += 1
+        print(f"Đã chuyển log vào {archive_path}")
+        return archive_path
+
+
+_WRITERS = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def get_log_writer(log_path, **kwargs):
+    """Trả về BufferedLogWriter dùng chung của tiến trình cho một file log."""
+    key = os.path.abspath(log_path)
+    with _WRITERS_LOCK:
+        writer = _WRITERS.get(key)
+        if writer is None:
+            writer = BufferedLogWriter(log_path, **kwargs)
+            _WRITERS[key] = writer
+        return writer
+
+
+@atexit.register
+def _flush_writers():
+    # Ghi nốt các bản ghi còn trong hàng đợi khi tiến trình kết thúc
+    for writer in list(_WRITERS.values()):
+        writer.stop(timeout=5)
@@ -1,5 +1,13 @@
 # src/main.py
 
+import time
+
+# Mốc thời gian đầu mỗi lần chạy script, dùng cho nhật ký thời gian hiển thị
+_RUN_START = time.perf_counter()
+
+import importlib
+import json
+import os
 import streamlit as st
 import sys
 from pathlib import Path
@@ -9,19 +17,67 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-# Import các module cốt lõi, không phải các trang giao diện
-from src.auth import get_user_info, logout
-from src.user_manager import UserManager
-from src.database_manager import DatabaseManager
-from src.database_admin import AdminDatabaseManager
+# Chỉ import phần đăng nhập; kho dữ liệu, người dùng và các trang giao diện được nạp khi cần đến
+from src.auth import get_redirect_uri, get_user_info, logout
 
 # Cấu hình trang
 st.set_page_config(page_title="Hệ thống Quản lý Lab", layout="wide", initial_sidebar_state="expanded")
 
-# Khởi tạo các manager
-db_manager = DatabaseManager()
-admin_db_manager = AdminDatabaseManager()
-user_manager = UserManager(admin_db_manager)
+ALL_ROLES = ["guest", "user", "registered", "moderator", "administrator"]
+
+# Danh sách trang: chỉ lưu tên module/hàm, trang được chọn mới được import.
+# "args": tên các manager dùng chung cần truyền vào hàm trang (xem PAGE_DEPENDENCIES).
+PAGES = {
+    "Trang chủ": {"module": "src.home_page", "func": "home_page", "roles": ALL_ROLES, "args": []},
+    "Chatbot": {"module": "src.chatbot_page", "func": "chatbot_page", "roles": ALL_ROLES, "args": []},
+    "Trợ lý AI": {"module": "src.ai_assistant_page", "func": "ai_assistant_page", "roles": ["user", "registered", "moderator", "administrator"], "args": []},
+    "Quản lý": {"module": "src.admin_page", "func": "admin_page", "roles": ["moderator", "administrator"], "args": []},
+    "Thống kê": {"module": "src.statistics_page", "func": "statistics_page", "roles": ["moderator", "administrator"], "args": []},
+    "Phân tích Chatbot": {"module": "src.chat_analytics_page", "func": "chat_analytics_page", "roles": ["moderator", "administrator"], "args": []},
+    "Quản lý người dùng": {"module": "src.user_management_page", "func": "user_management_page", "roles": ["administrator"], "args": ["user_manager"]},
+    "Cài đặt Admin": {"module": "src.admin_settings_page", "func": "admin_settings_page", "roles": ["administrator"], "args": ["db_manager", "admin_db_manager"]},
+}
+
+# Hàm lấy các manager dùng chung: mỗi manager chỉ được tạo ở lần đầu một trang cần đến
+PAGE_DEPENDENCIES = {
+    "user_manager": ("src.user_manager", "get_user_manager"),
+    "db_manager": ("src.database_manager", "get_db_manager"),
+    "admin_db_manager": ("src.database_admin", "get_admin_db_manager"),
+}
+
+RENDER_TIMING_LOG = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'logs', 'render_timing.jsonl'))
+
+
+def _load_attribute(module_name, attribute):
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def get_dependency(name):
+    return _load_attribute(*PAGE_DEPENDENCIES[name])()
+
+
+def log_render_time(page_name):
+    """
+    In thời gian của lần chạy script hiện tại (từ đầu script tới khi trang hiển thị xong)
+    và ghi lần hiển thị đầu tiên của mỗi phiên vào logs/render_timing.jsonl.
+    """
+    elapsed_ms = (time.perf_counter() - _RUN_START) * 1000
+    first_render = not st.session_state.get("_rendered_once")
+    st.session_state["_rendered_once"] = True
+    print(f"Thời gian hiển thị '{page_name}': {elapsed_ms:.0f} ms{' (lần đầu của phiên)' if first_render else ''}")
+    if not first_render:
+        return
+    try:
+        os.makedirs(os.path.dirname(RENDER_TIMING_LOG), exist_ok=True)
+        with open(RENDER_TIMING_LOG, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "page": page_name,
+                "elapsed_ms": round(elapsed_ms, 1),
+                "src_modules": sum(1 for name in sys.modules if name.startswith("src.")),
+            }, ensure_ascii=False) + '\n')
+    except OSError as e:
+        print(f"Lỗi khi ghi nhật ký thời gian hiển thị: {e}")
 
 def setup_sidebar(user_info):
     """Thiết lập và hiển thị thanh bên (sidebar) dựa trên trạng thái đăng nhập."""
@@ -40,44 +96,14 @@ def setup_sidebar(user_info):
 def show_pages_by_role(user_role):
     """
     Hiển thị các trang chức năng trong sidebar dựa trên vai trò của người dùng.
+    Chỉ module của trang được chọn được import (lần đầu mở trang đó), tránh nạp mọi trang ở mỗi lần chạy.
+    Trả về tên trang đã hiển thị.
     """
-    # Hoãn việc import các trang giao diện để tránh lỗi circular import
-    from src.home_page import home_page
-    from src.admin_page import admin_page
-    from src.admin_settings_page import admin_settings_page
-    from src.ai_assistant_page import ai_assistant_page
-    from src.statistics_page import statistics_page
-    from src.user_management_page import user_management_page
-    from src.chatbot_page import chatbot_page
-
-    page_dependencies = {
-        "user_manager": user_manager,
-        "db_manager": db_manager,
-        "admin_db_manager": admin_db_manager
-    }
-
-    PAGES = {
-        "Trang chủ": {"func": home_page, "roles": ["guest", "user", "registered", "moderator", "administrator"], "args": {}},
-        "Chatbot": {"func": chatbot_page, "roles": ["guest", "user", "registered", "moderator", "administrator"], "args": {}},
-        "Trợ lý AI": {"func": ai_assistant_page, "roles": ["user", "registered", "moderator", "administrator"], "args": {}},
-        "Quản lý": {"func": admin_page, "roles": ["moderator", "administrator"], "args": {}},
-        "Thống kê": {"func": statistics_page, "roles": ["moderator", "administrator"], "args": {}},
-        "Quản lý người dùng": {"func": user_management_page, "roles": ["administrator"], "args": {"user_manager": page_dependencies["user_manager"]}},
-        "Cài đặt Admin": {
-            "func": admin_settings_page,
-            "roles": ["administrator"],
-            "args": {
-                "db_manager": page_dependencies["db_manager"],
-                "admin_db_manager": page_dependencies["admin_db_manager"]
-            }
-        },
-    }
-
     allowed_pages = [name for name, details in PAGES.items() if user_role in details["roles"]]
 
     if not allowed_pages:
         st.warning("Bạn không có quyền truy cập vào bất kỳ trang nào.")
-        return
+        return None
 
     selected_page_name = st.sidebar.radio(
         "Điều hướng",
@@ -85,18 +111,20 @@ def show_pages_by_role(user_role):
     )
 
     page_details = PAGES[selected_page_name]
-    page_function = page_details["func"]
-    page_args = page_details["args"]
+    page_function = _load_attribute(page_details["module"], page_details["func"])
+    page_args = {name: get_dependency(name) for name in page_details["args"]}
     page_function(**page_args)
+    return selected_page_name
 
 
 def main():
     """Hàm chính điều khiển luồng của ứng dụng."""
     
-    redirect_uri = db_manager.config_data.get("site_url", "http://localhost:8501")
+    redirect_uri = get_redirect_uri()
     user_info = get_user_info(redirect_uri) # This single call handles the login button display
     
     if user_info:
+        user_manager = get_dependency("user_manager")
         user_email = user_info.get('email')
         current_role = user_manager.get_user_role(user_email)
         
@@ -112,7 +140,8 @@ def main():
 
         st.session_state.user_email = user_email
         setup_sidebar(user_info)
-        show_pages_by_role(st.session_state.user_role)
+        page_name = show_pages_by_role(st.session_state.user_role)
+        log_render_time(page_name or "Không có trang")
     else:
         # For the logged-out state, we don't need to call get_user_info again.
         # It has already been called and displayed the login button.
@@ -121,6 +150,7 @@ def main():
         st.title("Chào mừng đến với Hệ thống Quản lý Lab")
         st.write("Vui lòng đăng nhập bằng Google ở thanh bên để bắt đầu.")
         st.info("Chức năng hệ thống sẽ được cung cấp sau khi đăng nhập. Vui lòng chọn trên thanh điều hướng.")
+        log_render_time("Đăng nhập")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+# src/query_cache.py
+
+import glob
+import gzip
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+
+DEFAULT_MAX_ENTRIES = 256
+
+# Các cache đang dùng trong tiến trình (theo tên), để trang cài đặt hiển thị tỉ lệ trúng
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+class VersionedLRUCache:
+    """
+    Cache LRU có giới hạn số mục, mỗi mục gắn với một phiên bản dữ liệu.
+    Mục có phiên bản khác phiên bản đang hỏi được coi là trượt và bị loại ngay,
+    nên mọi lần sửa tồn kho (tăng data_version) tự động vô hiệu hóa các câu trả lời cũ.
+    """
+    def __init__(self, name, max_entries=DEFAULT_MAX_ENTRIES):
+        self.name = name
+        self.max_entries = max(int(max_entries), 1)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with _CACHES_LOCK:
+            _CACHES[name] = self
+
+    def get(self, key, version=None):
+        """Giá trị của `key` ở phiên bản `version`, hoặc None nếu chưa có/đã cũ."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def get_query_cache_stats():
+    """{tên cache: thống kê} của mọi VersionedLRUCache trong tiến trình."""
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def _open_log(path):
+    # errors='replace': byte UTF-8 hỏng chỉ làm hỏng dòng chứa nó (bị bỏ qua khi parse), không dừng cả file
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def most_frequent_queries(logs_dir, limit, normalize=None):
+    """
+    Các câu hỏi xuất hiện nhiều nhất trong log chat (logs/*.jsonl và logs/archive/*.jsonl[.gz]).
+    Câu hỏi được gộp theo `normalize` (nếu có); trả về list câu hỏi gốc đại diện, nhiều nhất trước.
+    """
+    counts = Counter()
+    representatives = {}
+    paths = glob.glob(os.path.join(logs_dir, '*.jsonl')) + glob.glob(os.path.join(logs_dir, 'archive', '*.jsonl*'))
+    for path in paths:
+        try:
+            with _open_log(path) as f:
+                for line in f:
+                    try:
+                        query = json.loads(line).get("user_query")
+                    except (json.JSONDecodeError, AttributeError):
+                        continue
+                    if not isinstance(query, str) or not query.strip() or '\ufffd' in query:
+                        continue
+                    key = normalize(query) if normalize else query
+                    counts[key] += 1
+                    representatives.setdefault(key, query)
+        except (OSError, EOFError, ValueError) as e:
+            print(f"Bỏ qua file log {path}: {e}")
+    return [representatives[key] for key, _ in counts.most_common(limit)]
@@ -0,0 +1,99 @@
+# src/result_pager.py
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+# Cột hiển thị theo từng trang: mặc định bỏ các cột văn bản dài, người dùng có thể chọn thêm
+SEARCH_VIEW_COLUMNS = ['id', 'name', 'type', 'quantity', 'unit', 'location', 'status', 'tracking', 'description']
+SEARCH_DEFAULT_COLUMNS = ['id', 'name', 'type', 'quantity', 'unit', 'location', 'status', 'tracking']
+STATISTICS_VIEW_COLUMNS = ['id', 'name', 'type', 'quantity', 'unit', 'location', 'status', 'tracking', 'note', 'description']
+STATISTICS_DEFAULT_COLUMNS = ['id', 'name', 'type', 'quantity', 'unit', 'location', 'status', 'tracking']
+
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+DEFAULT_PAGE_SIZE = 25
+RELEVANCE_SORT = "Mức độ liên quan"
+FILE_ORDER_SORT = "Thứ tự trong file"
+
+COLUMN_LABELS = {
+    'id': "Mã", 'name': "Tên", 'type': "Loại", 'quantity': "Số lượng", 'unit': "Đơn vị",
+    'location': "Vị trí", 'status': "Trạng thái", 'tracking': "Theo dõi",
+    'note': "Ghi chú", 'description': "Mô tả",
+}
+
+
+def page_bounds(total, page, page_size):
+    """Giới hạn số trang vào [0, số trang - 1]; trả về (trang, vị trí bắt đầu, vị trí kết thúc)."""
+    last_page = max((total - 1) // page_size, 0)
+    page = min(max(int(page), 0), last_page)
+    start = page * page_size
+    return page, start, min(start + page_size, total)
+
+
+def sort_positions(df, positions, sort_by, ascending=True):
+    """
+    Sắp xếp các vị trí khớp theo một cột; chỉ đọc cột khóa tại các vị trí đó, không sắp xếp cả DataFrame.
+    Cột văn bản được sắp theo cột *_normalized (bỏ dấu) nếu có; giá trị rỗng luôn ở cuối.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    if sort_by is None or sort_by not in df.columns:
+        return positions
+    key_column = f"{sort_by}_normalized" if f"{sort_by}_normalized" in df.columns else sort_by
+    keys = df[key_column].iloc[positions].reset_index(drop=True)
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        # Category không có thứ tự sẽ bị sắp theo mã; so sánh trên giá trị thật
+        keys = keys.astype(object)
+    order = keys.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+    return positions[order]
+
+
+def slice_to_arrow(df, positions, columns):
+    """Chỉ chuyển các dòng của trang và các cột được chọn sang Arrow (bảng gửi tới trình duyệt)."""
+    columns = [col for col in columns if col in df.columns]
+    page_df = df.iloc[positions, [df.columns.get_loc(col) for col in columns]]
+    return pa.Table.from_pandas(page_df, preserve_index=False)
+
+
+def display_paged_table(df, positions, key, view_columns, default_columns, rank_positions=None):
+    """
+    Hiển thị các dòng khớp (`positions`) theo trang: chọn số dòng/trang, khóa sắp xếp và cột hiển thị.
+    Chỉ trang hiện tại được gửi tới trình duyệt, nên dung lượng không phụ thuộc số dòng khớp.
+    rank_positions(limit, least_relevant): trả về `limit` vị trí liên quan nhất (hoặc ít liên quan nhất)
+    theo thứ tự; có hàm này thì bật lựa chọn sắp xếp theo mức độ liên quan.
+    """
+    total = len(positions)
+    if total == 0:
+        return
+
+    sort_options = ([RELEVANCE_SORT] if rank_positions else [FILE_ORDER_SORT]) + view_columns
+    col_sort, col_order, col_size, col_page = st.columns(4)
+    sort_choice = col_sort.selectbox(
+        "Sắp xếp theo:", options=sort_options, key=f"{key}_sort",
+        format_func=lambda value: COLUMN_LABELS.get(value, value)
+    )
+    ascending = col_order.selectbox("Thứ tự:", options=["Tăng dần", "Giảm dần"], key=f"{key}_order") == "Tăng dần"
+    page_size = col_size.selectbox(
+        "Số dòng mỗi trang:", options=PAGE_SIZE_OPTIONS, index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE), key=f"{key}_size"
+    )
+    page_number = col_page.number_input("Trang:", min_value=1, value=1, step=1, key=f"{key}_page")
+    columns = st.multiselect(
+        "Cột hiển thị:", options=view_columns, default=default_columns, key=f"{key}_columns",
+        format_func=lambda value: COLUMN_LABELS.get(value, value)
+    ) or default_columns
+
+    page, start, stop = page_bounds(total, page_number - 1, page_size)
+    if sort_choice == RELEVANCE_SORT:
+        # Chỉ xếp hạng đủ số dòng tới hết trang hiện tại (giảm dần: lấy từ cuối thứ hạng)
+        page_positions = rank_positions(stop, not ascending)[start:stop]
+    elif sort_choice == FILE_ORDER_SORT:
+        ordered = np.asarray(positions, dtype=np.int64)
+        page_positions = ordered[start:stop] if ascending else ordered[::-1][start:stop]
+    else:
+        page_positions = sort_positions(df, positions, sort_choice, ascending)[start:stop]
+
+    total_pages = (total + page_size - 1) // page_size
+    if page != page_number - 1:
+        st.caption(f"Trang {page_number} vượt quá số trang; đang hiển thị trang cuối.")
+    st.write(f"Hiển thị dòng **{start + 1}–{stop}** trên tổng **{total}** (trang {page + 1}/{total_pages}).")
+    st.dataframe(slice_to_arrow(df, page_positions, columns), hide_index=True)
@@ -0,0 +1,221 @@
+# src/search_index.py
+
+import heapq
+from collections import defaultdict
+
+from src.chemistry_utils import canonical_formula_key, normalize_cas
+
+# Các cột đã chuẩn hóa được dùng cho tìm kiếm chuỗi con.
+SEARCH_COLUMNS = [
+    'id_normalized', 'name_normalized', 'type_normalized',
+    'location_normalized', 'description_normalized',
+    'chemical_formula_normalized', 'cas_number_normalized',
+    'iupac_name_normalized', 'vietnamese_name_normalized',
+    'note_normalized'
+]
+
+# Ký tự phân cách các trường trong chuỗi gộp của mỗi dòng (không bao giờ xuất hiện trong truy vấn).
+FIELD_SEPARATOR = '\x00'
+NGRAM_SIZE = 3
+
+
+def _cell_text(value):
+    """Chuyển một ô dữ liệu thành chuỗi giống fillna('').astype(str)."""
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return str(value)
+
+
+def _ngrams(text, n=NGRAM_SIZE):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class TrigramIndex:
+    """
+    Chỉ mục đảo ngược theo trigram trên các cột tìm kiếm đã chuẩn hóa.
+    Truy vấn lấy giao của các danh sách trigram để ra tập ứng viên,
+    sau đó kiểm tra lại bằng phép so khớp chuỗi con trên từng ứng viên.
+    """
+    def __init__(self, df, columns=None):
+        columns = [col for col in (columns or SEARCH_COLUMNS) if col in df.columns]
+        self.columns = columns
+        self.row_texts = []
+        self.postings = defaultdict(set)
+
+        if df.empty or not columns:
+            return
+
+        column_values = [[_cell_text(value) for value in df[col].tolist()] for col in columns]
+        for pos, fields in enumerate(zip(*column_values)):
+            self._add_row(pos, fields)
+
+    def _add_row(self, pos, fields):
+        self.row_texts.append(FIELD_SEPARATOR.join(fields))
+        for field in fields:
+            for gram in _ngrams(field):
+                self.postings[gram].add(pos)
+
+    def update_row(self, pos, row):
+        """Cập nhật lại các trigram của một dòng sau khi dữ liệu dòng đó thay đổi."""
+        fields = [_cell_text(row.get(col)) for col in self.columns]
+        old_text = self.row_texts[pos]
+        for field in old_text.split(FIELD_SEPARATOR):
+            for gram in _ngrams(field):
+                posting = self.postings.get(gram)
+                if posting is not None:
+                    posting.discard(pos)
+                    if not posting:
+                        del self.postings[gram]
+        self.row_texts[pos] = FIELD_SEPARATOR.join(fields)
+        for field in fields:
+            for gram in _ngrams(field):
+                self.postings[gram].add(pos)
+
+    def search(self, query_normalized):
+        """Trả về danh sách vị trí dòng (đã sắp xếp) có ít nhất một trường chứa truy vấn."""
+        if len(query_normalized) < NGRAM_SIZE:
+            # Truy vấn quá ngắn để dùng trigram: quét chuỗi gộp của từng dòng.
+            return [pos for pos, text in enumerate(self.row_texts) if query_normalized in text]
+
+        postings = []
+        for gram in _ngrams(query_normalized):
+            posting = self.postings.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return sorted(pos for pos in candidates if query_normalized in self.row_texts[pos])
+
+
+class ExactMatchIndex:
+    """
+    Chỉ mục băm từ giá trị (đã chuẩn hóa) của một hoặc nhiều cột tới vị trí các dòng,
+    dùng cho các phép tra cứu so khớp chính xác như ID hay tên.
+    Nếu có key_func, khóa là key_func(giá trị) (bỏ qua khi trả về None), ví dụ công thức dạng Hill.
+    """
+    def __init__(self, df, columns, key_func=None):
+        self.columns = [col for col in columns if col in df.columns]
+        self.key_func = key_func
+        self.lookup = defaultdict(set)
+        self.row_keys = []
+
+        if df.empty or not self.columns:
+            return
+
+        column_values = [df[col].tolist() for col in self.columns]
+        for pos, values in enumerate(zip(*column_values)):
+            keys = self._row_keys(values)
+            self.row_keys.append(keys)
+            for key in keys:
+                self.lookup[key].add(pos)
+
+    def _row_keys(self, values):
+        keys = {value for value in values if isinstance(value, str)}
+        if self.key_func is not None:
+            keys = {self.key_func(value) for value in keys} - {None}
+        return keys
+
+    def get(self, key):
+        """Trả về danh sách vị trí dòng (theo thứ tự trong file) có giá trị bằng key."""
+        return sorted(self.lookup.get(key, ()))
+
+    def update_row(self, pos, row):
+        """Cập nhật các khóa của một dòng sau khi dữ liệu dòng đó thay đổi."""
+        for key in self.row_keys[pos]:
+            positions = self.lookup.get(key)
+            if positions is not None:
+                positions.discard(pos)
+                if not positions:
+                    del self.lookup[key]
+        keys = self._row_keys([row.get(col) for col in self.columns])
+        self.row_keys[pos] = keys
+        for key in keys:
+            self.lookup[key].add(pos)
+
+
+# Các cột tên dùng cho tra cứu số lượng/vị trí theo tên.
+NAME_COLUMNS = ['name_normalized', 'iupac_name_normalized', 'vietnamese_name_normalized']
+
+
+def build_formula_index(df):
+    """Chỉ mục theo công thức hóa học chuẩn hóa về ký hiệu Hill (H2SO4 và SO4H2 cùng khóa)."""
+    return ExactMatchIndex(df, ['chemical_formula'], key_func=canonical_formula_key)
+
+
+def build_cas_index(df):
+    """Chỉ mục theo số CAS đã chuẩn hóa và kiểm tra chữ số kiểm tra."""
+    return ExactMatchIndex(df, ['cas_number'], key_func=normalize_cas)
+
+
+def build_trigram_index(df):
+    return TrigramIndex(df)
+
+
+def build_id_index(df):
+    """Chỉ mục theo ID gốc (chưa chuẩn hóa), dùng cho các thao tác cập nhật."""
+    return ExactMatchIndex(df, ['id'])
+
+
+def build_normalized_id_index(df):
+    return ExactMatchIndex(df, ['id_normalized'])
+
+
+def build_name_index(df):
+    return ExactMatchIndex(df, NAME_COLUMNS)
+
+
+# Trọng số theo trường: (khớp chính xác, khớp tiền tố, khớp chuỗi con).
+# Mã ID/CAS/công thức khớp chính xác được ưu tiên nhất, sau đó tới tên, cuối cùng là mô tả/ghi chú.
+FIELD_WEIGHTS = {
+    'id_normalized': (100, 30, 15),
+    'cas_number_normalized': (100, 30, 15),
+    'chemical_formula_normalized': (100, 30, 15),
+    'name_normalized': (60, 40, 20),
+    'iupac_name_normalized': (60, 40, 20),
+    'vietnamese_name_normalized': (60, 40, 20),
+    'type_normalized': (10, 5, 3),
+    'location_normalized': (10, 5, 3),
+    'description_normalized': (3, 2, 1),
+    'note_normalized': (3, 2, 1),
+}
+
+
+def score_fields(fields, columns, query_normalized):
+    """Tính điểm liên quan của một dòng: cộng trọng số của từng trường có chứa truy vấn."""
+    score = 0
+    for col, field in zip(columns, fields):
+        if query_normalized not in field:
+            continue
+        exact_weight, prefix_weight, substring_weight = FIELD_WEIGHTS.get(col, (1, 1, 1))
+        if field == query_normalized:
+            score += exact_weight
+        elif field.startswith(query_normalized):
+            score += prefix_weight
+        else:
+            score += substring_weight
+    return score
+
+
+# Điểm cộng cho dòng khớp chính xác công thức (dạng Hill) hoặc số CAS
+EXACT_KEY_BOOST = 200
+
+
+def rank_positions(index, positions, query_normalized, limit, boosted_positions=(), least_relevant=False):
+    """
+    Chấm điểm các vị trí ứng viên và trả về tối đa `limit` vị trí có điểm cao nhất
+    (bằng điểm thì giữ thứ tự trong file). Dùng heap nên không phải sắp xếp toàn bộ kết quả.
+    Các vị trí trong boosted_positions được cộng EXACT_KEY_BOOST điểm.
+    least_relevant=True: `limit` vị trí cuối của thứ hạng đó, theo thứ tự ngược (ít liên quan nhất trước).
+    """
+    def sort_key(pos):
+        fields = index.row_texts[pos].split(FIELD_SEPARATOR)
+        score = score_fields(fields, index.columns, query_normalized)
+        if pos in boosted_positions:
+            score += EXACT_KEY_BOOST
+        return (-score, pos)
+
+    if least_relevant:
+        return heapq.nlargest(limit, positions, key=sort_key)
+    return heapq.nsmallest(limit, positions, key=sort_key)
@@ -1,14 +1,14 @@
 # src/search_page.py
 
 import streamlit as st
-import pandas as pd
-from src.database_manager import DatabaseManager
+from src.database_manager import get_db_manager
+from src.result_pager import SEARCH_DEFAULT_COLUMNS, SEARCH_VIEW_COLUMNS, display_paged_table
 
 def search_page():
     st.title("🔍 Tra cứu")
     st.markdown("---")
     
-    db_manager = DatabaseManager()
+    db_manager = get_db_manager()
     
     if db_manager.inventory_data.empty:
         st.warning("Không có dữ liệu tồn kho để tra cứu.")
@@ -20,19 +20,17 @@ def search_page():
     
     if search_query:
         with st.spinner("Đang tìm kiếm..."):
-            results = db_manager.search_item(search_query)
-        
-        if not results.empty:
+            # Dữ liệu, vị trí khớp và chỉ mục xếp hạng lấy cùng một phiên bản; chỉ trang đang xem được gửi tới trình duyệt
+            inventory_data, positions, exact_positions, trigram_index = db_manager.search_snapshot(search_query)
+
+        if positions:
             st.subheader(f"Kết quả tìm kiếm cho '{search_query}'")
-            st.write(f"Tìm thấy **{len(results)}** mục phù hợp.")
-            
-            # Hiển thị kết quả dưới dạng bảng
-            st.dataframe(results[[
-                'id', 'name', 'type', 'quantity', 'unit', 'location', 
-                'status', 'tracking', 'description'
-            ]])
-            
+            display_paged_table(
+                inventory_data, positions, "search_results", SEARCH_VIEW_COLUMNS, SEARCH_DEFAULT_COLUMNS,
+                rank_positions=lambda limit, least_relevant=False: db_manager.rank_search_positions(
+                    search_query, positions, exact_positions, limit, least_relevant, trigram_index)
+            )
         else:
             st.warning(f"Không tìm thấy kết quả nào phù hợp với '{search_query}'.")
     else:
-        st.info("Vui lòng nhập từ khóa để bắt đầu tra cứu.")
\ No newline at end of file
+        st.info("Vui lòng nhập từ khóa để bắt đầu tra cứu.")
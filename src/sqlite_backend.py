@@ -0,0 +1,192 @@
+# src/sqlite_backend.py
+
+import os
+import sqlite3
+import sys
+import threading
+
+import pandas as pd
+
+from src.common_utils import normalize_series
+from src.inventory_schema import PERSISTED_COLUMNS, read_inventory, to_persisted_records, write_inventory
+from src.inventory_store import COLUMNS_TO_NORMALIZE
+from src.search_index import SEARCH_COLUMNS
+
+NORMALIZED_COLUMNS = [f'{col}_normalized' for col in COLUMNS_TO_NORMALIZE]
+ALL_COLUMNS = PERSISTED_COLUMNS + NORMALIZED_COLUMNS
+
+
+def _column_type(col):
+    return 'NUMERIC' if col == 'quantity' else 'TEXT'
+
+
+def _sql_value(value):
+    """Đổi NaN/NA của pandas về NULL và kiểu numpy về kiểu Python cho sqlite3."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+class SQLiteInventoryBackend:
+    """
+    Kho lưu trữ tồn kho bằng SQLite: bảng `inventory` (trường gốc + cột *_normalized),
+    bảng ảo FTS5 `inventory_fts` (tokenizer trigram) trên các trường tìm kiếm,
+    và chỉ mục trên id/location/type. Mỗi lần sửa chỉ chạy UPDATE cho dòng tương ứng.
+    """
+    def __init__(self, db_path='data/inventory.db'):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connect(self):
+        # Mỗi luồng (mỗi phiên Streamlit) dùng kết nối riêng
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            dir_name = os.path.dirname(self.db_path)
+            if dir_name:
+                os.makedirs(dir_name, exist_ok=True)
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def exists(self):
+        return os.path.exists(self.db_path)
+
+    def _create_schema(self, conn):
+        columns_sql = ", ".join(f'"{col}" {_column_type(col)}' for col in ALL_COLUMNS)
+        fts_columns = [col for col in SEARCH_COLUMNS if col in ALL_COLUMNS]
+        fts_columns_sql = ", ".join(f'"{col}"' for col in fts_columns)
+        new_values_sql = ", ".join(f'new."{col}"' for col in fts_columns)
+        old_values_sql = ", ".join(f'old."{col}"' for col in fts_columns)
+
+        conn.executescript(f"""
+            DROP TABLE IF EXISTS inventory_fts;
+            DROP TABLE IF EXISTS inventory;
+            CREATE TABLE inventory ({columns_sql});
+            CREATE INDEX idx_inventory_id ON inventory(id);
+            CREATE INDEX idx_inventory_location ON inventory(location);
+            CREATE INDEX idx_inventory_type ON inventory(type);
+            CREATE VIRTUAL TABLE inventory_fts USING fts5(
+                {fts_columns_sql}, content='inventory', content_rowid='rowid', tokenize='trigram'
+            );
+            CREATE TRIGGER inventory_ai AFTER INSERT ON inventory BEGIN
+                INSERT INTO inventory_fts(rowid, {fts_columns_sql}) VALUES (new.rowid, {new_values_sql});
+            END;
+            CREATE TRIGGER inventory_ad AFTER DELETE ON inventory BEGIN
+                INSERT INTO inventory_fts(inventory_fts, rowid, {fts_columns_sql})
+                VALUES ('delete', old.rowid, {old_values_sql});
+            END;
+            CREATE TRIGGER inventory_au AFTER UPDATE ON inventory BEGIN
+                INSERT INTO inventory_fts(inventory_fts, rowid, {fts_columns_sql})
+                VALUES ('delete', old.rowid, {old_values_sql});
+                INSERT INTO inventory_fts(rowid, {fts_columns_sql}) VALUES (new.rowid, {new_values_sql});
+            END;
+        """)
+
+    def import_records(self, records):
+        """Tạo lại toàn bộ CSDL từ danh sách bản ghi (list of dicts), tự tính các cột *_normalized."""
+        df = pd.DataFrame(to_persisted_records(records), columns=PERSISTED_COLUMNS)
+        for col in COLUMNS_TO_NORMALIZE:
+            df[f'{col}_normalized'] = normalize_series(df[col])
+        df = df[ALL_COLUMNS].astype(object)
+
+        conn = self._connect()
+        with conn:
+            self._create_schema(conn)
+            placeholders = ", ".join("?" for _ in ALL_COLUMNS)
+            columns_sql = ", ".join(f'"{col}"' for col in ALL_COLUMNS)
+            conn.executemany(
+                f"INSERT INTO inventory ({columns_sql}) VALUES ({placeholders})",
+                ([_sql_value(value) for value in row] for row in df.itertuples(index=False, name=None))
+            )
+        return len(df)
+
+    def migrate_from_json(self, json_path='data/inventory.json'):
+        """Chuyển một lần dữ liệu từ file inventory.json sang SQLite. Trả về số dòng đã nhập."""
+        return self.import_records(read_inventory(json_path))
+
+    def load_frame(self):
+        """
+        Đọc toàn bộ bảng inventory theo thứ tự rowid. Trả về (DataFrame, danh sách rowid).
+        Chi phí tỉ lệ với số dòng nhưng chỉ chạy một lần khi InventoryStore dùng chung được tạo
+        (hoặc tải lại toàn bộ); các lần sửa sau đó chỉ chạy UPDATE trên từng dòng.
+        """
+        conn = self._connect()
+        df = pd.read_sql_query("SELECT rowid AS _rowid, * FROM inventory ORDER BY rowid", conn)
+        row_ids = df.pop('_rowid').tolist()
+        # Giữ giá trị rỗng là chuỗi rỗng như khi chuẩn hóa từ JSON
+        for col in NORMALIZED_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].fillna('')
+        return df, row_ids
+
+    def update_item(self, item_id, values):
+        """Cập nhật các cột (kể cả *_normalized) của dòng có id = item_id bằng một câu UPDATE."""
+        columns = [col for col in values if col in ALL_COLUMNS]
+        if not columns:
+            return 0
+        assignments = ", ".join(f'"{col}" = ?' for col in columns)
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE inventory SET {assignments} WHERE id = ?",
+                [_sql_value(values[col]) for col in columns] + [item_id]
+            )
+        return cursor.rowcount
+
+    def search_rowids(self, query_normalized):
+        """
+        Tìm chuỗi con trên các trường tìm kiếm qua FTS5 (tokenizer trigram).
+        Truy vấn phải dài ít nhất 3 ký tự; trả về danh sách rowid tăng dần.
+        """
+        phrase = '"' + query_normalized.replace('"', '""') + '"'
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT rowid FROM inventory_fts WHERE inventory_fts MATCH ? ORDER BY rowid", [phrase]
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def export_records(self):
+        """Xuất các trường gốc (không có cột *_normalized) dưới dạng list of dicts."""
+        conn = self._connect()
+        columns_sql = ", ".join(f'"{col}"' for col in PERSISTED_COLUMNS)
+        cursor = conn.execute(f"SELECT {columns_sql} FROM inventory ORDER BY rowid")
+        return [dict(zip(PERSISTED_COLUMNS, row)) for row in cursor]
+
+    def export_json(self, json_path='data/inventory.json'):
+        """
+        Ghi bản xuất JSON (dùng để commit lên git phục vụ kiểm tra lịch sử thay đổi).
+        Ứng dụng gọi hàm này ở luồng git, một lần cho mỗi lô lưu được gộp; có thể chạy thủ công
+        bằng `python -m src.sqlite_backend export`.
+        """
+        return write_inventory(json_path, self.export_records())
+
+
+def main(argv):
+    """
+    Dòng lệnh:
+        python -m src.sqlite_backend migrate [inventory.json] [inventory.db]
+        python -m src.sqlite_backend export [inventory.db] [inventory.json]
+    """
+    if len(argv) < 2 or argv[1] not in ("migrate", "export"):
+        print(main.__doc__)
+        return 1
+    if argv[1] == "migrate":
+        json_path = argv[2] if len(argv) > 2 else 'data/inventory.json'
+        db_path = argv[3] if len(argv) > 3 else 'data/inventory.db'
+        count = SQLiteInventoryBackend(db_path).migrate_from_json(json_path)
+        print(f"Đã chuyển {count} dòng từ {json_path} sang {db_path}.")
+    else:
+        db_path = argv[2] if len(argv) > 2 else 'data/inventory.db'
+        json_path = argv[3] if len(argv) > 3 else 'data/inventory.json'
+        count = SQLiteInventoryBackend(db_path).export_json(json_path)
+        print(f"Đã xuất {count} dòng từ {db_path} ra {json_path}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
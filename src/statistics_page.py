@@ -1,14 +1,34 @@
 # src/statistics_page.py
 import streamlit as st
+import numpy as np
 import pandas as pd
-from src.database_manager import DatabaseManager
-
-# Khởi tạo DatabaseManager (chỉ một lần và được cache)
-@st.cache_resource
-def get_db_manager():
-    return DatabaseManager()
+from src.database_manager import get_db_manager
+from src.data_epochs import CONFIG, INVENTORY, epoch_cached
+from src.result_pager import STATISTICS_DEFAULT_COLUMNS, STATISTICS_VIEW_COLUMNS, display_paged_table
+
+@epoch_cached("statistics_filter_options", INVENTORY, CONFIG)
+def get_filter_options():
+    """Danh sách giá trị cho các bộ lọc: lấy từ config.json, bổ sung giá trị chỉ có trong dữ liệu."""
+    db_manager = get_db_manager()
+    # Sao chép để không sửa cấu hình dùng chung
+    all_types = list(db_manager.config_data.get('types', []))
+    all_locations = list(db_manager.config_data.get('locations', []))
+    all_purposes = list(db_manager.config_data.get('purposes', []))
+    all_statuses = list(db_manager.config_data.get('statuses', []))
+    all_tracking_statuses = list(db_manager.config_data.get('tracking_statuses', []))
+
+    all_types_from_data = db_manager.inventory_data['type'].dropna().unique().tolist()
+    all_types.extend([t for t in all_types_from_data if t not in all_types and t])
+    all_locations_from_data = db_manager.inventory_data['location'].dropna().unique().tolist()
+    all_locations.extend([l for l in all_locations_from_data if l not in all_locations and l])
 
-db_manager = get_db_manager()
+    return {
+        "types": all_types,
+        "locations": all_locations,
+        "purposes": all_purposes,
+        "statuses": all_statuses,
+        "tracking_statuses": all_tracking_statuses,
+    }
 
 def statistics_page():
     # --- KIỂM TRA QUYỀN TRUY CẬP ---
@@ -19,24 +39,15 @@ def statistics_page():
     # -------------------------------
 
     st.title("📊 Thống kê Vật tư & Hóa chất")
+    db_manager = get_db_manager()
     st.write("Xem thống kê và lọc dữ liệu tồn kho theo loại, vị trí hoặc trạng thái theo dõi.")
 
     if db_manager.inventory_data.empty:
         st.warning("Không có dữ liệu tồn kho để hiển thị thống kê.")
         return
 
-    # Lấy danh sách các giá trị duy nhất từ file config.json
-    all_types = db_manager.config_data.get('types', [])
-    all_locations = db_manager.config_data.get('locations', [])
-    all_purposes = db_manager.config_data.get('purposes', [])
-    all_statuses = db_manager.config_data.get('statuses', [])
-    all_tracking_statuses = db_manager.config_data.get('tracking_statuses', [])
-
-    # Bổ sung các giá trị từ inventory_data nếu chúng chưa có trong config
-    all_types_from_data = db_manager.inventory_data['type'].fillna('').unique().tolist()
-    all_types.extend([t for t in all_types_from_data if t not in all_types and t])
-    all_locations_from_data = db_manager.inventory_data['location'].fillna('').unique().tolist()
-    all_locations.extend([l for l in all_locations_from_data if l not in all_locations and l])
+    # Danh sách lựa chọn chỉ được tính lại khi dữ liệu tồn kho hoặc cấu hình thay đổi
+    filter_options = get_filter_options()
 
     # Sắp xếp và đặt "Tất cả" và "Không rõ" ở đầu
     def sort_options(options):
@@ -47,66 +58,77 @@ def statistics_page():
         return ["Tất cả"] + special_values + other_values
 
     # Bộ lọc
-    selected_type = st.selectbox("Lọc theo Loại:", options=sort_options(all_types))
-    selected_location = st.selectbox("Lọc theo Vị trí:", options=sort_options(all_locations))
-    selected_purpose = st.selectbox("Lọc theo Mục đích:", options=sort_options(all_purposes))
-    selected_status = st.selectbox("Lọc theo Trạng thái ban đầu:", options=sort_options(all_statuses))
-    selected_tracking = st.selectbox("Lọc theo Trạng thái theo dõi:", options=sort_options(all_tracking_statuses))
-
-    filtered_df = db_manager.inventory_data.copy()
-
-    # Áp dụng bộ lọc
-    if selected_type != 'Tất cả':
-        filtered_df = filtered_df[filtered_df['type'] == selected_type]
-
-    if selected_location != 'Tất cả':
-        filtered_df = filtered_df[filtered_df['location'] == selected_location]
-
-    if selected_purpose != 'Tất cả':
-        filtered_df = filtered_df[filtered_df['purpose'] == selected_purpose]
-        
-    if selected_status != 'Tất cả':
-        filtered_df = filtered_df[filtered_df['status'] == selected_status]
-
-    if selected_tracking != 'Tất cả':
-        filtered_df = filtered_df[
-            filtered_df['tracking'].fillna('').apply(lambda x: x.split(" - Note:")[0].strip() == selected_tracking)
-        ]
+    selected_type = st.selectbox("Lọc theo Loại:", options=sort_options(filter_options["types"]))
+    selected_location = st.selectbox("Lọc theo Vị trí:", options=sort_options(filter_options["locations"]))
+    selected_purpose = st.selectbox("Lọc theo Mục đích:", options=sort_options(filter_options["purposes"]))
+    selected_status = st.selectbox("Lọc theo Trạng thái ban đầu:", options=sort_options(filter_options["statuses"]))
+    selected_tracking = st.selectbox("Lọc theo Trạng thái theo dõi:", options=sort_options(filter_options["tracking_statuses"]))
+
+    # Áp dụng bộ lọc: AND giữa các bitmap dựng sẵn, không sao chép toàn bộ DataFrame
+    selected_filters = {
+        'type': selected_type,
+        'location': selected_location,
+        'purpose': selected_purpose,
+        'status': selected_status,
+        'tracking_status': selected_tracking,
+    }
+    inventory_data, mask = db_manager.filter_by_facets(
+        {facet: (None if value == 'Tất cả' else value) for facet, value in selected_filters.items()}
+    )
+    matched_positions = np.flatnonzero(mask)
 
     st.markdown("---")
     st.subheader("Kết quả Thống kê")
 
-    if filtered_df.empty:
+    if matched_positions.size == 0:
         st.info("Không có dữ liệu phù hợp với các tiêu chí lọc đã chọn.")
     else:
-        st.write(f"Tìm thấy **{len(filtered_df)}** mục phù hợp:")
-        
-        st.dataframe(filtered_df[[
-            'id', 'name', 'type', 'quantity', 'unit', 'location', 
-            'status', 'tracking', 'note', 'description'
-        ]])
+        st.write(f"Tìm thấy **{matched_positions.size}** mục phù hợp:")
+        # Phân trang phía máy chủ: chỉ trang đang xem (và các cột được chọn) được gửi tới trình duyệt
+        display_paged_table(
+            inventory_data, matched_positions, "statistics_results", STATISTICS_VIEW_COLUMNS, STATISTICS_DEFAULT_COLUMNS
+        )
 
         st.markdown("---")
         st.subheader("Tổng quan nhanh")
 
+        # Các bảng tổng hợp đọc từ khối tổng hợp (duyệt các ô, không quét lại các dòng dữ liệu)
+        cube_filters = {facet: (None if value == 'Tất cả' else value) for facet, value in selected_filters.items()}
+
+        def summary_table(dimension, label, column=0):
+            summary = db_manager.summarize(dimension, cube_filters)
+            rows = [(value, total[column]) for value, total in summary.items() if value is not None]
+            return pd.DataFrame(rows, columns=[label, 'Số lượng' if column == 0 else 'Tổng số lượng'])
+
         st.write("##### Số lượng theo loại:")
-        type_counts = filtered_df['type'].value_counts().reset_index()
-        type_counts.columns = ['Loại', 'Số lượng']
-        st.table(type_counts)
+        st.table(summary_table('type', 'Loại'))
 
         st.write("##### Số lượng theo trạng thái theo dõi:")
-        temp_tracking_status_col = filtered_df['tracking'].fillna('').apply(lambda x: x.split(" - Note:")[0].strip())
-        tracking_status_counts = temp_tracking_status_col.value_counts().reset_index()
-        tracking_status_counts.columns = ['Trạng thái Theo dõi', 'Số lượng']
-        st.table(tracking_status_counts)
+        st.table(summary_table('tracking_status', 'Trạng thái Theo dõi'))
 
         st.write("##### Số lượng theo vị trí:")
-        location_counts = filtered_df['location'].value_counts().reset_index()
-        location_counts.columns = ['Vị trí', 'Số lượng']
-        st.table(location_counts)
-
-        if 'quantity' in filtered_df.columns and 'unit' in filtered_df.columns:
-            st.write("##### Tổng số lượng:")
-            total_quantities = filtered_df.groupby('unit')['quantity'].sum().reset_index()
-            total_quantities.columns = ['Đơn vị', 'Tổng số lượng']
-            st.table(total_quantities)
\ No newline at end of file
+        st.table(summary_table('location', 'Vị trí'))
+
+        st.write("##### Tổng số lượng:")
+        st.table(summary_table('unit', 'Đơn vị', column=1).sort_values('Đơn vị', ignore_index=True))
+
+        display_daily_trend(db_manager, cube_filters)
+
+
+def display_daily_trend(db_manager, cube_filters):
+    """Biểu đồ số mục theo trạng thái theo dõi qua các ngày, dựng từ ảnh chụp khối tổng hợp hằng ngày."""
+    # Chỉ đọc: ảnh chụp được ghi khi lưu thay đổi, hôm nay lấy từ dữ liệu hiện tại
+    snapshots = db_manager.get_daily_snapshots()
+
+    st.markdown("---")
+    st.subheader("Xu hướng theo ngày")
+    if len(snapshots) < 2:
+        st.info("Cần ảnh chụp của ít nhất hai ngày để hiển thị xu hướng.")
+        return
+
+    trend = pd.DataFrame({
+        day: {value or "Không rõ": count for value, (count, _) in cube.summarize('tracking_status', cube_filters).items()}
+        for day, cube in snapshots
+    }).T.fillna(0)
+    trend.index = pd.to_datetime(trend.index)
+    st.line_chart(trend)
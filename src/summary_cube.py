@@ -0,0 +1,155 @@
+# src/summary_cube.py
+
+import json
+import math
+import os
+from collections import defaultdict
+from datetime import date
+
+from src.facet_index import tracking_status
+
+# Các chiều của khối tổng hợp: mỗi ô là một tổ hợp giá trị, lưu số dòng và tổng số lượng
+CUBE_DIMENSIONS = ['type', 'location', 'tracking_status', 'purpose', 'status', 'unit']
+SNAPSHOT_DIR_NAME = "cube_snapshots"
+
+
+def _dimension_value(row, dimension):
+    if dimension == 'tracking_status':
+        return tracking_status(row.get('tracking'))
+    value = row.get(dimension)
+    return value if isinstance(value, str) else None
+
+
+def _quantity(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(number) else number
+
+
+class SummaryCube:
+    """
+    Khối tổng hợp (số dòng, tổng số lượng) theo type × location × tracking_status × purpose × status × unit.
+    Được cập nhật tăng dần qua update_row khi admin sửa dữ liệu, nên mọi bảng tổng hợp
+    theo bộ lọc chỉ cần duyệt các ô (số tổ hợp giá trị), không phụ thuộc số dòng dữ liệu.
+    """
+    def __init__(self, df=None, cells=None):
+        self.cells = defaultdict(lambda: [0, 0.0])
+        self.row_entries = []
+        if cells:
+            for key, count, quantity in cells:
+                self.cells[tuple(key)] = [count, quantity]
+        if df is None or df.empty:
+            return
+
+        columns = {dim: df[dim].tolist() if dim in df.columns else [None] * len(df)
+                   for dim in CUBE_DIMENSIONS if dim != 'tracking_status'}
+        columns['tracking_status'] = [tracking_status(value) for value in df['tracking'].tolist()] \
+            if 'tracking' in df.columns else [''] * len(df)
+        quantities = df['quantity'].tolist() if 'quantity' in df.columns else [0] * len(df)
+
+        for pos in range(len(df)):
+            key = tuple(
+                value if isinstance(value, str) else None
+                for value in (columns[dim][pos] for dim in CUBE_DIMENSIONS)
+            )
+            quantity = _quantity(quantities[pos])
+            self.row_entries.append((key, quantity))
+            self._add(key, 1, quantity)
+
+    def _add(self, key, count, quantity):
+        cell = self.cells[key]
+        cell[0] += count
+        cell[1] += quantity
+        if cell[0] == 0:
+            del self.cells[key]
+
+    def update_row(self, pos, row):
+        """Trừ đóng góp cũ của dòng pos khỏi ô cũ và cộng đóng góp mới vào ô mới."""
+        old_key, old_quantity = self.row_entries[pos]
+        key = tuple(_dimension_value(row, dim) for dim in CUBE_DIMENSIONS)
+        quantity = _quantity(row.get('quantity'))
+        if (key, quantity) == (old_key, old_quantity):
+            return
+        self._add(old_key, -1, -old_quantity)
+        self._add(key, 1, quantity)
+        self.row_entries[pos] = (key, quantity)
+
+    def _matching_cells(self, filters):
+        checks = [(CUBE_DIMENSIONS.index(dim), value) for dim, value in (filters or {}).items() if value is not None]
+        for key, (count, quantity) in self.cells.items():
+            if all(key[i] == value for i, value in checks):
+                yield key, count, quantity
+
+    def summarize(self, group_by, filters=None):
+        """
+        Tổng hợp theo một chiều trong phạm vi bộ lọc {chiều: giá trị hoặc None}.
+        Trả về dict {giá trị: (số dòng, tổng số lượng)} sắp xếp giảm dần theo số dòng.
+        """
+        index = CUBE_DIMENSIONS.index(group_by)
+        totals = defaultdict(lambda: [0, 0.0])
+        for key, count, quantity in self._matching_cells(filters):
+            total = totals[key[index]]
+            total[0] += count
+            total[1] += quantity
+        return {value: tuple(total) for value, total in sorted(totals.items(), key=lambda item: -item[1][0])}
+
+    def to_cells(self):
+        return [[list(key), count, quantity] for key, (count, quantity) in self.cells.items()]
+
+
+def build_summary_cube(df):
+    return SummaryCube(df)
+
+
+# --- Ảnh chụp theo ngày ---
+def get_snapshot_dir(data_path):
+    return os.path.join(os.path.dirname(data_path) or ".", SNAPSHOT_DIR_NAME)
+
+
+def get_snapshot_path(data_path, day=None):
+    day = day or date.today()
+    return os.path.join(get_snapshot_dir(data_path), f"{day.isoformat()}.json")
+
+
+def save_daily_snapshot(cube, data_path, day=None):
+    """
+    Ghi ảnh chụp khối tổng hợp của ngày `day` (mặc định hôm nay) ra cube_snapshots/<ngày>.json.
+    Gọi lại trong cùng ngày sẽ ghi đè, nên mỗi ngày giữ trạng thái cuối cùng.
+    Trả về đường dẫn file đã ghi, hoặc None nếu lỗi.
+    """
+    day = day or date.today()
+    path = get_snapshot_path(data_path, day)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"date": day.isoformat(), "dimensions": CUBE_DIMENSIONS, "cells": cube.to_cells()},
+                      f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        return path
+    except Exception as e:
+        print(f"Lỗi khi lưu ảnh chụp thống kê: {e}")
+        return None
+
+
+def load_daily_snapshots(data_path):
+    """Đọc các ảnh chụp đã lưu, trả về list (ngày ISO, SummaryCube) theo thứ tự ngày."""
+    snapshot_dir = get_snapshot_dir(data_path)
+    if not os.path.isdir(snapshot_dir):
+        return []
+    snapshots = []
+    for file_name in sorted(os.listdir(snapshot_dir)):
+        if not file_name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(snapshot_dir, file_name), 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Bỏ qua ảnh chụp thống kê {file_name}: {e}")
+            continue
+        if snapshot.get("dimensions") != CUBE_DIMENSIONS:
+            continue
+        snapshots.append((snapshot["date"], SummaryCube(cells=snapshot["cells"])))
+    return snapshots
@@ -4,7 +4,8 @@ import json
 import pandas as pd
 import os
 import streamlit as st
-from src.database_admin import AdminDatabaseManager
+from src.database_admin import AdminDatabaseManager, get_admin_db_manager
+from src.data_epochs import USERS, bump_epoch, epoch_cached
 
 class UserManager:
     def __init__(self, admin_db_manager: AdminDatabaseManager, users_file='data/users.json'):
@@ -42,7 +43,9 @@ class UserManager:
         Lưu dữ liệu người dùng hiện tại và đẩy lên GitHub.
         """
         commit_message = "feat(users): Cập nhật dữ liệu người dùng"
-        return self.admin_db_manager.save_and_push_json(self.users_file, self.users_data, commit_message)
+        saved = self.admin_db_manager.save_and_push_json(self.users_file, self.users_data, commit_message)
+        bump_epoch(USERS)
+        return saved
 
     def get_all_users_as_df(self):
         """Trả về danh sách tất cả người dùng dưới dạng DataFrame của Pandas."""
@@ -67,4 +70,10 @@ class UserManager:
         if email in self.users_data:
             del self.users_data[email]
             return self.save_users()
-        return False
\ No newline at end of file
+        return False
+
+
+# Danh sách người dùng chỉ được đọc lại từ users.json khi epoch người dùng thay đổi
+@epoch_cached("user_manager", USERS)
+def get_user_manager(users_file='data/users.json'):
+    return UserManager(get_admin_db_manager(), users_file)